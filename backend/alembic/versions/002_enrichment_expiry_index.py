@@ -0,0 +1,22 @@
+"""Index enrichments by expiry for the proactive refresher.
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("idx_enrichments_expires_at", "enrichments", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_enrichments_expires_at", table_name="enrichments")
@@ -0,0 +1,29 @@
+"""Store ASN and announced network prefix on IP IOCs.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("iocs", sa.Column("asn", sa.Integer))
+    op.add_column("iocs", sa.Column("network_prefix", sa.String(43)))
+    op.create_index("idx_iocs_asn", "iocs", ["asn"])
+    op.create_index("idx_iocs_network_prefix", "iocs", ["network_prefix"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_iocs_network_prefix", table_name="iocs")
+    op.drop_index("idx_iocs_asn", table_name="iocs")
+    op.drop_column("iocs", "network_prefix")
+    op.drop_column("iocs", "asn")
@@ -0,0 +1,33 @@
+"""Track when each IOC's recency bucket next changes.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("iocs", sa.Column("next_rescore_at", sa.DateTime(timezone=True)))
+
+    # Stored scores predate recency tracking: make every IOC due once so the
+    # first decay run corrects them and computes the real next boundary.
+    op.execute("UPDATE iocs SET next_rescore_at = NOW() WHERE last_seen IS NOT NULL")
+
+    op.create_index(
+        "idx_iocs_next_rescore_at", "iocs", ["next_rescore_at"],
+        postgresql_where=sa.text("next_rescore_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_iocs_next_rescore_at", table_name="iocs")
+    op.drop_column("iocs", "next_rescore_at")
@@ -0,0 +1,187 @@
+"""Install the SQL implementation of the threat scoring formula.
+
+The SQL below is the default-profile output of ``scoring_sql`` at this
+revision, frozen so the migration does not change as the generator does.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ROW_ARGS = "jsonb, integer, bigint, timestamptz, integer, text[], text[], double precision, timestamptz"
+
+FUNCTION_SIGNATURES = (
+    "sentinel_aware_timestamptz(text)",
+    f"sentinel_threat_score({_ROW_ARGS})",
+    "sentinel_enrichment_score(uuid, timestamptz)",
+    "sentinel_score_ioc(uuid, timestamptz)",
+    "sentinel_next_rescore_at(timestamptz, timestamptz)",
+    # Added by revision 006 and left in place by its downgrade
+    f"sentinel_score_components({_ROW_ARGS})",
+    "sentinel_composite_score(double precision[])",
+    "sentinel_ioc_components(uuid, timestamptz)",
+)
+
+AWARE_TIMESTAMPTZ = r"""
+CREATE OR REPLACE FUNCTION sentinel_aware_timestamptz(p_value text)
+RETURNS timestamptz LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE AS $fn$
+BEGIN
+    IF p_value IS NULL OR p_value !~ '^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}(:?\d{2})?)$' THEN
+        RETURN NULL;
+    END IF;
+    RETURN p_value::timestamptz;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END
+$fn$
+"""
+
+
+THREAT_SCORE = """
+CREATE OR REPLACE FUNCTION sentinel_threat_score(
+    p_metadata jsonb, p_threat_score integer, p_source_count bigint,
+    p_last_seen timestamptz, p_sighting_count integer, p_tags text[],
+    p_techniques text[], p_enrichment double precision, p_now timestamptz
+) RETURNS integer LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    -- round(double precision) rounds half to even, like Python's round()
+    SELECT GREATEST(0, LEAST(100, round(((((((CAST('0.0' AS double precision) + (
+        CASE
+            WHEN jsonb_typeof(p_metadata -> 'reputation_scores') = 'object' AND p_metadata -> 'reputation_scores' <> '{}'::jsonb THEN
+                (SELECT sum(value::text::double precision) / count(*) FROM jsonb_each(p_metadata -> 'reputation_scores'))
+            WHEN COALESCE(p_threat_score, 0) > 0 THEN p_threat_score::double precision
+            ELSE CAST('30.0' AS double precision)
+        END) * CAST('0.3' AS double precision))
+            + (CASE
+            WHEN p_source_count >= 5 THEN CAST('100.0' AS double precision)
+            WHEN p_source_count >= 3 THEN CAST('80.0' AS double precision)
+            WHEN p_source_count >= 2 THEN CAST('60.0' AS double precision)
+            ELSE CAST('30.0' AS double precision) END) * CAST('0.2' AS double precision))
+            + (CASE
+            WHEN p_last_seen IS NULL THEN CAST('20.0' AS double precision)
+            ELSE CASE
+            WHEN p_now - p_last_seen < interval '3600.0 seconds' THEN CAST('100.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '86400.0 seconds' THEN CAST('85.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '604800.0 seconds' THEN CAST('65.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '2592000.0 seconds' THEN CAST('40.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '7776000.0 seconds' THEN CAST('20.0' AS double precision)
+            ELSE CAST('5.0' AS double precision) END END) * CAST('0.15' AS double precision))
+            + (CASE
+            WHEN COALESCE(p_sighting_count, 1) >= 100 THEN CAST('100.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 50 THEN CAST('85.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 20 THEN CAST('70.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 10 THEN CAST('55.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 5 THEN CAST('40.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 2 THEN CAST('25.0' AS double precision)
+            ELSE CAST('10.0' AS double precision) END) * CAST('0.15' AS double precision))
+            + (COALESCE(p_enrichment, CAST('20.0' AS double precision))) * CAST('0.1' AS double precision))
+            + (
+        LEAST(CAST('100.0' AS double precision),
+            CAST('0.0' AS double precision)
+            + CASE
+                WHEN EXISTS (SELECT 1 FROM unnest(p_tags) t WHERE lower(t) = ANY(ARRAY['apt', 'botnet', 'c&c', 'c2', 'exploit', 'ransomware', 'zero-day']::text[])) THEN CAST('50.0' AS double precision)
+                ELSE CAST('0.0' AS double precision) END
+            + CASE
+                WHEN EXISTS (SELECT 1 FROM unnest(p_tags) t WHERE lower(t) = ANY(ARRAY['backdoor', 'dropper', 'malware', 'phishing', 'trojan']::text[])) THEN CAST('30.0' AS double precision)
+                ELSE CAST('0.0' AS double precision) END
+            + LEAST(CAST('50.0' AS double precision),
+                    COALESCE(cardinality(p_techniques), 0) * CAST('10.0' AS double precision)))) * CAST('0.1' AS double precision)))))::integer
+$fn$
+"""
+
+
+ENRICHMENT_SCORE = """
+CREATE OR REPLACE FUNCTION sentinel_enrichment_score(p_ioc_id uuid, p_now timestamptz)
+RETURNS double precision LANGUAGE sql STABLE PARALLEL SAFE AS $fn$
+    SELECT CASE
+        WHEN COALESCE(sum(total), 0) = 0 THEN CAST('20.0' AS double precision)
+        ELSE LEAST(CAST('100.0' AS double precision), (sum(risk)::double precision / sum(total)) * 100)
+    END
+    FROM (
+        SELECT
+        CASE e.source
+            WHEN 'geoip' THEN
+                CASE WHEN e.data ->> 'country_code' = ANY(ARRAY['CN', 'IR', 'KP', 'RU']::text[]) THEN 2 ELSE 0 END
+            WHEN 'whois' THEN
+                CASE
+                    WHEN (CASE jsonb_typeof(e.data -> 'privacy_protected')
+                    WHEN 'boolean' THEN (e.data -> 'privacy_protected')::text::boolean
+                    WHEN 'number' THEN (e.data -> 'privacy_protected')::text::numeric <> 0
+                    WHEN 'string' THEN (e.data -> 'privacy_protected') #>> '{}' <> ''
+                    WHEN 'array' THEN jsonb_array_length(e.data -> 'privacy_protected') > 0
+                    WHEN 'object' THEN (e.data -> 'privacy_protected') <> '{}'::jsonb
+                    ELSE false END) THEN 1
+                    ELSE 0 END
+                + CASE WHEN sentinel_aware_timestamptz((e.data ->> 'creation_date'))
+                            > p_now - interval '2592000.0 seconds'
+                       THEN 2 ELSE 0 END
+            WHEN 'dns' THEN
+                CASE
+                    WHEN (CASE jsonb_typeof(e.data -> 'fast_flux')
+                    WHEN 'boolean' THEN (e.data -> 'fast_flux')::text::boolean
+                    WHEN 'number' THEN (e.data -> 'fast_flux')::text::numeric <> 0
+                    WHEN 'string' THEN (e.data -> 'fast_flux') #>> '{}' <> ''
+                    WHEN 'array' THEN jsonb_array_length(e.data -> 'fast_flux') > 0
+                    WHEN 'object' THEN (e.data -> 'fast_flux') <> '{}'::jsonb
+                    ELSE false END) THEN 2
+                    ELSE 0 END
+            WHEN 'reputation' THEN
+                CASE
+                    WHEN CASE
+                    WHEN jsonb_typeof(e.data -> 'aggregate_score') = 'number' THEN (e.data ->> 'aggregate_score')::double precision
+                    ELSE 0 END > 70 THEN 3
+                    WHEN CASE
+                    WHEN jsonb_typeof(e.data -> 'aggregate_score') = 'number' THEN (e.data ->> 'aggregate_score')::double precision
+                    ELSE 0 END > 40 THEN 1
+                    ELSE 0 END
+        END AS risk, CASE e.source WHEN 'geoip' THEN 2 WHEN 'whois' THEN 3 WHEN 'dns' THEN 2 WHEN 'reputation' THEN 3 END AS total
+        FROM enrichments e
+        WHERE e.ioc_id = p_ioc_id AND e.source IN ('geoip', 'whois', 'dns', 'reputation')
+    ) s
+$fn$
+"""
+
+
+SCORE_IOC = """
+CREATE OR REPLACE FUNCTION sentinel_score_ioc(p_ioc_id uuid, p_now timestamptz)
+RETURNS integer LANGUAGE sql STABLE PARALLEL SAFE AS $fn$
+    SELECT sentinel_threat_score(
+        i.metadata, i.threat_score,
+        (SELECT count(*) FROM ioc_sources s WHERE s.ioc_id = i.id),
+        i.last_seen, i.sighting_count, i.tags, i.mitre_techniques,
+        sentinel_enrichment_score(i.id, p_now), p_now
+    )
+    FROM iocs i WHERE i.id = p_ioc_id
+$fn$
+"""
+
+
+NEXT_RESCORE_AT = """
+CREATE OR REPLACE FUNCTION sentinel_next_rescore_at(p_last_seen timestamptz, p_now timestamptz)
+RETURNS timestamptz LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    SELECT CASE
+        WHEN p_last_seen + interval '3600.0 seconds' > p_now THEN p_last_seen + interval '3600.0 seconds'
+        WHEN p_last_seen + interval '86400.0 seconds' > p_now THEN p_last_seen + interval '86400.0 seconds'
+        WHEN p_last_seen + interval '604800.0 seconds' > p_now THEN p_last_seen + interval '604800.0 seconds'
+        WHEN p_last_seen + interval '2592000.0 seconds' > p_now THEN p_last_seen + interval '2592000.0 seconds'
+        WHEN p_last_seen + interval '7776000.0 seconds' > p_now THEN p_last_seen + interval '7776000.0 seconds'
+        ELSE NULL END
+$fn$
+"""
+
+
+def upgrade() -> None:
+    for statement in (AWARE_TIMESTAMPTZ, THREAT_SCORE, ENRICHMENT_SCORE, SCORE_IOC, NEXT_RESCORE_AT):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for signature in reversed(FUNCTION_SIGNATURES):
+        op.execute(f"DROP FUNCTION IF EXISTS {signature}")
@@ -0,0 +1,157 @@
+"""Add scoring profiles and cached per-IOC component scores.
+
+The SQL below is the default-profile output of ``scoring_sql`` at this
+revision; API startup reinstalls the functions for the active profile.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COMPONENT_COLUMNS = (
+    "score_reputation", "score_diversity", "score_recency",
+    "score_frequency", "score_enrichment", "score_context",
+)
+
+SCORE_COMPONENTS = """
+CREATE OR REPLACE FUNCTION sentinel_score_components(
+    p_metadata jsonb, p_threat_score integer, p_source_count bigint,
+    p_last_seen timestamptz, p_sighting_count integer, p_tags text[],
+    p_techniques text[], p_enrichment double precision, p_now timestamptz
+)
+RETURNS double precision[] LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    SELECT ARRAY[(
+        CASE
+            WHEN jsonb_typeof(p_metadata -> 'reputation_scores') = 'object' AND p_metadata -> 'reputation_scores' <> '{}'::jsonb THEN
+                (SELECT sum(value::text::double precision) / count(*) FROM jsonb_each(p_metadata -> 'reputation_scores'))
+            WHEN COALESCE(p_threat_score, 0) > 0 THEN p_threat_score::double precision
+            ELSE CAST('30.0' AS double precision)
+        END),
+        (CASE
+            WHEN p_source_count >= 5 THEN CAST('100.0' AS double precision)
+            WHEN p_source_count >= 3 THEN CAST('80.0' AS double precision)
+            WHEN p_source_count >= 2 THEN CAST('60.0' AS double precision)
+            ELSE CAST('30.0' AS double precision) END),
+        (CASE
+            WHEN p_last_seen IS NULL THEN CAST('20.0' AS double precision)
+            ELSE CASE
+            WHEN p_now - p_last_seen < interval '3600.0 seconds' THEN CAST('100.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '86400.0 seconds' THEN CAST('85.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '604800.0 seconds' THEN CAST('65.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '2592000.0 seconds' THEN CAST('40.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '7776000.0 seconds' THEN CAST('20.0' AS double precision)
+            ELSE CAST('5.0' AS double precision) END END),
+        (CASE
+            WHEN COALESCE(p_sighting_count, 1) >= 100 THEN CAST('100.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 50 THEN CAST('85.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 20 THEN CAST('70.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 10 THEN CAST('55.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 5 THEN CAST('40.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 2 THEN CAST('25.0' AS double precision)
+            ELSE CAST('10.0' AS double precision) END),
+        (COALESCE(p_enrichment, CAST('20.0' AS double precision))),
+        (
+        LEAST(CAST('100.0' AS double precision),
+            CAST('0.0' AS double precision)
+            + CASE
+                WHEN EXISTS (SELECT 1 FROM unnest(p_tags) t WHERE lower(t) = ANY(ARRAY['apt', 'botnet', 'c&c', 'c2', 'exploit', 'ransomware', 'zero-day']::text[])) THEN CAST('50.0' AS double precision)
+                ELSE CAST('0.0' AS double precision) END
+            + CASE
+                WHEN EXISTS (SELECT 1 FROM unnest(p_tags) t WHERE lower(t) = ANY(ARRAY['backdoor', 'dropper', 'malware', 'phishing', 'trojan']::text[])) THEN CAST('30.0' AS double precision)
+                ELSE CAST('0.0' AS double precision) END
+            + LEAST(CAST('50.0' AS double precision),
+                    COALESCE(cardinality(p_techniques), 0) * CAST('10.0' AS double precision))))]
+$fn$
+"""
+
+
+COMPOSITE_SCORE = """
+CREATE OR REPLACE FUNCTION sentinel_composite_score(p_components double precision[])
+RETURNS integer LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    -- round(double precision) rounds half to even, like Python's round()
+    SELECT GREATEST(0, LEAST(100, round(((((((CAST('0.0' AS double precision) + p_components[1] * CAST('0.3' AS double precision)) + p_components[2] * CAST('0.2' AS double precision)) + p_components[3] * CAST('0.15' AS double precision)) + p_components[4] * CAST('0.15' AS double precision)) + p_components[5] * CAST('0.1' AS double precision)) + p_components[6] * CAST('0.1' AS double precision)))))::integer
+$fn$
+"""
+
+
+THREAT_SCORE = """
+CREATE OR REPLACE FUNCTION sentinel_threat_score(
+    p_metadata jsonb, p_threat_score integer, p_source_count bigint,
+    p_last_seen timestamptz, p_sighting_count integer, p_tags text[],
+    p_techniques text[], p_enrichment double precision, p_now timestamptz
+)
+RETURNS integer LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    SELECT sentinel_composite_score(sentinel_score_components(
+        p_metadata, p_threat_score, p_source_count, p_last_seen, p_sighting_count,
+        p_tags, p_techniques, p_enrichment, p_now
+    ))
+$fn$
+"""
+
+
+IOC_COMPONENTS = """
+CREATE OR REPLACE FUNCTION sentinel_ioc_components(p_ioc_id uuid, p_now timestamptz)
+RETURNS double precision[] LANGUAGE sql STABLE PARALLEL SAFE AS $fn$
+    SELECT sentinel_score_components(
+        i.metadata, i.threat_score,
+        (SELECT count(*) FROM ioc_sources s WHERE s.ioc_id = i.id),
+        i.last_seen, i.sighting_count, i.tags, i.mitre_techniques,
+        sentinel_enrichment_score(i.id, p_now), p_now
+    )
+    FROM iocs i WHERE i.id = p_ioc_id
+$fn$
+"""
+
+
+SCORE_IOC = """
+CREATE OR REPLACE FUNCTION sentinel_score_ioc(p_ioc_id uuid, p_now timestamptz)
+RETURNS integer LANGUAGE sql STABLE PARALLEL SAFE AS $fn$
+    SELECT sentinel_composite_score(sentinel_ioc_components(p_ioc_id, p_now))
+$fn$
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scoring_profiles",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()")),
+        sa.Column("name", sa.String(100), nullable=False, unique=True),
+        sa.Column("description", sa.Text),
+        sa.Column("weights", JSONB, server_default="{}"),
+        sa.Column("high_risk_tags", ARRAY(sa.Text)),
+        sa.Column("medium_risk_tags", ARRAY(sa.Text)),
+        sa.Column("high_risk_countries", ARRAY(sa.Text)),
+        sa.Column("total_feeds", sa.Integer, server_default="10"),
+        sa.Column("is_active", sa.Boolean, nullable=False, server_default=sa.false()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()")),
+    )
+    op.create_index(
+        "uq_scoring_profiles_active", "scoring_profiles", ["is_active"],
+        unique=True, postgresql_where=sa.text("is_active"),
+    )
+
+    for column in COMPONENT_COLUMNS:
+        op.add_column("iocs", sa.Column(column, sa.Float()))
+
+    # Adds the component-level functions alongside the revision 005 ones (left
+    # in place on downgrade: they do not depend on the new columns)
+    for statement in (SCORE_COMPONENTS, COMPOSITE_SCORE, THREAT_SCORE, IOC_COMPONENTS, SCORE_IOC):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for column in reversed(COMPONENT_COLUMNS):
+        op.drop_column("iocs", column)
+    op.drop_index("uq_scoring_profiles_active", table_name="scoring_profiles")
+    op.drop_table("scoring_profiles")
@@ -0,0 +1,37 @@
+"""Record which scoring profile produced each IOC's scores; index components.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COMPONENTS = ("reputation", "diversity", "recency", "frequency", "enrichment", "context")
+
+
+def upgrade() -> None:
+    op.add_column("scoring_profiles", sa.Column("version", sa.Integer, nullable=False, server_default="1"))
+    op.add_column("iocs", sa.Column("score_profile", sa.String(100)))
+    op.add_column("iocs", sa.Column("score_profile_version", sa.Integer))
+    op.add_column("iocs", sa.Column("scored_at", sa.DateTime(timezone=True)))
+
+    for component in COMPONENTS:
+        op.create_index(f"idx_iocs_score_{component}", "iocs", [f"score_{component}"])
+
+
+def downgrade() -> None:
+    for component in reversed(COMPONENTS):
+        op.drop_index(f"idx_iocs_score_{component}", table_name="iocs")
+
+    op.drop_column("iocs", "scored_at")
+    op.drop_column("iocs", "score_profile_version")
+    op.drop_column("iocs", "score_profile")
+    op.drop_column("scoring_profiles", "version")
@@ -0,0 +1,54 @@
+"""Reverse index of DNS A/AAAA resolutions, backfilled from stored enrichment.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dns_resolutions",
+        sa.Column(
+            "ioc_id", postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("iocs.id", ondelete="CASCADE"), primary_key=True,
+        ),
+        sa.Column("ip", sa.String(45), primary_key=True),
+        sa.Column("record_type", sa.String(4), nullable=False),
+        sa.Column("first_seen", sa.DateTime(timezone=True)),
+        sa.Column("last_seen", sa.DateTime(timezone=True)),
+    )
+    op.create_index("idx_dns_resolutions_ip", "dns_resolutions", ["ip"])
+    op.create_index("idx_dns_resolutions_last_seen", "dns_resolutions", ["last_seen"])
+
+    # host(inet) renders addresses the same way Python's ipaddress does
+    op.execute("""
+        INSERT INTO dns_resolutions (ioc_id, ip, record_type, first_seen, last_seen)
+        SELECT e.ioc_id, host(CAST(r.addr AS inet)), r.rtype, e.enriched_at, e.enriched_at
+        FROM enrichments e
+        CROSS JOIN LATERAL (
+            SELECT 'A' AS rtype, jsonb_array_elements_text(e.data->'records'->'A') AS addr
+            WHERE jsonb_typeof(e.data->'records'->'A') = 'array'
+            UNION ALL
+            SELECT 'AAAA', jsonb_array_elements_text(e.data->'records'->'AAAA')
+            WHERE jsonb_typeof(e.data->'records'->'AAAA') = 'array'
+        ) r
+        WHERE e.source = 'dns' AND r.addr ~ '^[0-9A-Fa-f:.]+$'
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("idx_dns_resolutions_last_seen", table_name="dns_resolutions")
+    op.drop_index("idx_dns_resolutions_ip", table_name="dns_resolutions")
+    op.drop_table("dns_resolutions")
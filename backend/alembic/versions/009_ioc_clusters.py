@@ -0,0 +1,46 @@
+"""IOC clusters: cluster_id on IOCs and a per-cluster summary table.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("iocs", sa.Column("cluster_id", postgresql.UUID(as_uuid=True)))
+    op.create_index(
+        "idx_iocs_cluster_id", "iocs", ["cluster_id"],
+        postgresql_where=sa.text("cluster_id IS NOT NULL"),
+    )
+
+    op.create_table(
+        "ioc_clusters",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("size", sa.Integer, nullable=False),
+        sa.Column("avg_score", sa.Float),
+        sa.Column("max_score", sa.Integer),
+        sa.Column("ioc_types", postgresql.JSONB, server_default="{}"),
+        sa.Column("first_seen", sa.DateTime(timezone=True)),
+        sa.Column("last_seen", sa.DateTime(timezone=True)),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+    )
+    op.create_index("idx_ioc_clusters_size", "ioc_clusters", [sa.text("size DESC")])
+    op.create_index("idx_ioc_clusters_max_score", "ioc_clusters", [sa.text("max_score DESC")])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_ioc_clusters_max_score", table_name="ioc_clusters")
+    op.drop_index("idx_ioc_clusters_size", table_name="ioc_clusters")
+    op.drop_table("ioc_clusters")
+    op.drop_index("idx_iocs_cluster_id", table_name="iocs")
+    op.drop_column("iocs", "cluster_id")
@@ -0,0 +1,41 @@
+"""MinHash/LSH signatures for IOC similarity search.
+
+The table starts empty; run the backfill_similarity_index task to populate it.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ioc_signatures",
+        sa.Column(
+            "ioc_id", postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("iocs.id", ondelete="CASCADE"), primary_key=True,
+        ),
+        sa.Column("minhash", postgresql.ARRAY(sa.Integer), nullable=False),
+        sa.Column("bands", postgresql.ARRAY(sa.BigInteger), nullable=False),
+        sa.Column("feature_count", sa.Integer, nullable=False),
+        sa.Column("version", sa.Integer, nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index(
+        "idx_ioc_signatures_bands", "ioc_signatures", ["bands"], postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_ioc_signatures_bands", table_name="ioc_signatures")
+    op.drop_table("ioc_signatures")
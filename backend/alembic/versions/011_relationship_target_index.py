@@ -0,0 +1,25 @@
+"""Index ioc_relationships.target_ioc_id for incoming-edge lookups.
+
+The unique constraint (source_ioc_id, target_ioc_id, relationship_type)
+already serves outgoing lookups; incoming ones scanned the table.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("idx_ioc_relationships_target", "ioc_relationships", ["target_ioc_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_ioc_relationships_target", table_name="ioc_relationships")
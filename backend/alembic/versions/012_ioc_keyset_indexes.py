@@ -0,0 +1,48 @@
+"""Keyset pagination indexes on (last_seen, id) and (threat_score, id).
+
+Cursor pages filter on ``(sort column, id) < (value, id)`` and order by the
+same pair; the composite indexes serve that as a single range scan. Both
+sort columns become NOT NULL so a row comparison never skips NULL rows.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE iocs SET threat_score = 0 WHERE threat_score IS NULL")
+    op.execute(
+        "UPDATE iocs SET last_seen = COALESCE(first_seen, created_at, now()) "
+        "WHERE last_seen IS NULL"
+    )
+    op.alter_column("iocs", "threat_score", existing_type=sa.Integer(), nullable=False)
+    op.alter_column("iocs", "last_seen", existing_type=sa.DateTime(timezone=True), nullable=False)
+
+    op.drop_index("idx_iocs_threat_score", table_name="iocs")
+    op.drop_index("idx_iocs_last_seen", table_name="iocs")
+    op.create_index(
+        "idx_iocs_threat_score_id", "iocs", [sa.text("threat_score DESC"), sa.text("id DESC")]
+    )
+    op.create_index(
+        "idx_iocs_last_seen_id", "iocs", [sa.text("last_seen DESC"), sa.text("id DESC")]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_iocs_last_seen_id", table_name="iocs")
+    op.drop_index("idx_iocs_threat_score_id", table_name="iocs")
+    op.create_index("idx_iocs_last_seen", "iocs", [sa.text("last_seen DESC")])
+    op.create_index("idx_iocs_threat_score", "iocs", [sa.text("threat_score DESC")])
+
+    op.alter_column("iocs", "last_seen", existing_type=sa.DateTime(timezone=True), nullable=True)
+    op.alter_column("iocs", "threat_score", existing_type=sa.Integer(), nullable=True)
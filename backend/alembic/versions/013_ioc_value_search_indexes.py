@@ -0,0 +1,35 @@
+"""Trigram and prefix indexes on iocs.value.
+
+``ILIKE '%q%'`` and the pg_trgm similarity operators use the GIN trigram
+index; ``LIKE 'q%'`` prefix matches on IPs and hashes use the
+text_pattern_ops btree, which works under any database collation.
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "013"
+down_revision: Union[str, None] = "012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "idx_iocs_value_trgm", "iocs", ["value"],
+        postgresql_using="gin", postgresql_ops={"value": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "idx_iocs_value_prefix", "iocs", ["value"],
+        postgresql_ops={"value": "text_pattern_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_iocs_value_prefix", table_name="iocs")
+    op.drop_index("idx_iocs_value_trgm", table_name="iocs")
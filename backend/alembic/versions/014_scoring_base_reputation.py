@@ -0,0 +1,202 @@
+"""Score the reputation component from the persisted base reputation.
+
+sentinel_score_components and sentinel_threat_score take the IOC's cached
+score_reputation, so rescoring no longer feeds the composite threat_score
+back in as reputation. The SQL below is the default-profile output of
+``scoring_sql`` at this revision; API startup reinstalls it for the active
+profile.
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "014"
+down_revision: Union[str, None] = "013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ROW_ARGS = "jsonb, integer, bigint, timestamptz, integer, text[], text[], double precision, timestamptz"
+_NEW_ROW_ARGS = (
+    "jsonb, integer, double precision, bigint, timestamptz, integer, text[], text[], "
+    "double precision, timestamptz"
+)
+
+SCORE_COMPONENTS = """
+CREATE OR REPLACE FUNCTION sentinel_score_components(
+    p_metadata jsonb, p_threat_score integer, p_base_reputation double precision,
+    p_source_count bigint, p_last_seen timestamptz, p_sighting_count integer,
+    p_tags text[], p_techniques text[], p_enrichment double precision, p_now timestamptz
+)
+RETURNS double precision[] LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    SELECT ARRAY[(
+        CASE
+            WHEN jsonb_typeof(p_metadata -> 'reputation_scores') = 'object' AND p_metadata -> 'reputation_scores' <> '{}'::jsonb THEN
+                (SELECT sum(value::text::double precision) / count(*) FROM jsonb_each(p_metadata -> 'reputation_scores'))
+            WHEN p_base_reputation IS NOT NULL THEN p_base_reputation
+            WHEN COALESCE(p_threat_score, 0) > 0 THEN p_threat_score::double precision
+            ELSE CAST('30.0' AS double precision)
+        END),
+        (CASE
+            WHEN p_source_count >= 5 THEN CAST('100.0' AS double precision)
+            WHEN p_source_count >= 3 THEN CAST('80.0' AS double precision)
+            WHEN p_source_count >= 2 THEN CAST('60.0' AS double precision)
+            ELSE CAST('30.0' AS double precision) END),
+        (CASE
+            WHEN p_last_seen IS NULL THEN CAST('20.0' AS double precision)
+            ELSE CASE
+            WHEN p_now - p_last_seen < interval '3600.0 seconds' THEN CAST('100.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '86400.0 seconds' THEN CAST('85.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '604800.0 seconds' THEN CAST('65.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '2592000.0 seconds' THEN CAST('40.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '7776000.0 seconds' THEN CAST('20.0' AS double precision)
+            ELSE CAST('5.0' AS double precision) END END),
+        (CASE
+            WHEN COALESCE(p_sighting_count, 1) >= 100 THEN CAST('100.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 50 THEN CAST('85.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 20 THEN CAST('70.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 10 THEN CAST('55.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 5 THEN CAST('40.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 2 THEN CAST('25.0' AS double precision)
+            ELSE CAST('10.0' AS double precision) END),
+        (COALESCE(p_enrichment, CAST('20.0' AS double precision))),
+        (
+        LEAST(CAST('100.0' AS double precision),
+            CAST('0.0' AS double precision)
+            + CASE
+                WHEN EXISTS (SELECT 1 FROM unnest(p_tags) t WHERE lower(t) = ANY(ARRAY['apt', 'botnet', 'c&c', 'c2', 'exploit', 'ransomware', 'zero-day']::text[])) THEN CAST('50.0' AS double precision)
+                ELSE CAST('0.0' AS double precision) END
+            + CASE
+                WHEN EXISTS (SELECT 1 FROM unnest(p_tags) t WHERE lower(t) = ANY(ARRAY['backdoor', 'dropper', 'malware', 'phishing', 'trojan']::text[])) THEN CAST('30.0' AS double precision)
+                ELSE CAST('0.0' AS double precision) END
+            + LEAST(CAST('50.0' AS double precision),
+                    COALESCE(cardinality(p_techniques), 0) * CAST('10.0' AS double precision))))]
+$fn$
+"""
+
+
+THREAT_SCORE = """
+CREATE OR REPLACE FUNCTION sentinel_threat_score(
+    p_metadata jsonb, p_threat_score integer, p_base_reputation double precision,
+    p_source_count bigint, p_last_seen timestamptz, p_sighting_count integer,
+    p_tags text[], p_techniques text[], p_enrichment double precision, p_now timestamptz
+)
+RETURNS integer LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    SELECT sentinel_composite_score(sentinel_score_components(
+        p_metadata, p_threat_score, p_base_reputation, p_source_count, p_last_seen,
+        p_sighting_count, p_tags, p_techniques, p_enrichment, p_now
+    ))
+$fn$
+"""
+
+
+IOC_COMPONENTS = """
+CREATE OR REPLACE FUNCTION sentinel_ioc_components(p_ioc_id uuid, p_now timestamptz)
+RETURNS double precision[] LANGUAGE sql STABLE PARALLEL SAFE AS $fn$
+    SELECT sentinel_score_components(
+        i.metadata, i.threat_score, i.score_reputation,
+        (SELECT count(*) FROM ioc_sources s WHERE s.ioc_id = i.id),
+        i.last_seen, i.sighting_count, i.tags, i.mitre_techniques,
+        sentinel_enrichment_score(i.id, p_now), p_now
+    )
+    FROM iocs i WHERE i.id = p_ioc_id
+$fn$
+"""
+
+
+PREVIOUS_SCORE_COMPONENTS = """
+CREATE OR REPLACE FUNCTION sentinel_score_components(
+    p_metadata jsonb, p_threat_score integer, p_source_count bigint,
+    p_last_seen timestamptz, p_sighting_count integer, p_tags text[],
+    p_techniques text[], p_enrichment double precision, p_now timestamptz
+)
+RETURNS double precision[] LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    SELECT ARRAY[(
+        CASE
+            WHEN jsonb_typeof(p_metadata -> 'reputation_scores') = 'object' AND p_metadata -> 'reputation_scores' <> '{}'::jsonb THEN
+                (SELECT sum(value::text::double precision) / count(*) FROM jsonb_each(p_metadata -> 'reputation_scores'))
+            WHEN COALESCE(p_threat_score, 0) > 0 THEN p_threat_score::double precision
+            ELSE CAST('30.0' AS double precision)
+        END),
+        (CASE
+            WHEN p_source_count >= 5 THEN CAST('100.0' AS double precision)
+            WHEN p_source_count >= 3 THEN CAST('80.0' AS double precision)
+            WHEN p_source_count >= 2 THEN CAST('60.0' AS double precision)
+            ELSE CAST('30.0' AS double precision) END),
+        (CASE
+            WHEN p_last_seen IS NULL THEN CAST('20.0' AS double precision)
+            ELSE CASE
+            WHEN p_now - p_last_seen < interval '3600.0 seconds' THEN CAST('100.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '86400.0 seconds' THEN CAST('85.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '604800.0 seconds' THEN CAST('65.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '2592000.0 seconds' THEN CAST('40.0' AS double precision)
+            WHEN p_now - p_last_seen < interval '7776000.0 seconds' THEN CAST('20.0' AS double precision)
+            ELSE CAST('5.0' AS double precision) END END),
+        (CASE
+            WHEN COALESCE(p_sighting_count, 1) >= 100 THEN CAST('100.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 50 THEN CAST('85.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 20 THEN CAST('70.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 10 THEN CAST('55.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 5 THEN CAST('40.0' AS double precision)
+            WHEN COALESCE(p_sighting_count, 1) >= 2 THEN CAST('25.0' AS double precision)
+            ELSE CAST('10.0' AS double precision) END),
+        (COALESCE(p_enrichment, CAST('20.0' AS double precision))),
+        (
+        LEAST(CAST('100.0' AS double precision),
+            CAST('0.0' AS double precision)
+            + CASE
+                WHEN EXISTS (SELECT 1 FROM unnest(p_tags) t WHERE lower(t) = ANY(ARRAY['apt', 'botnet', 'c&c', 'c2', 'exploit', 'ransomware', 'zero-day']::text[])) THEN CAST('50.0' AS double precision)
+                ELSE CAST('0.0' AS double precision) END
+            + CASE
+                WHEN EXISTS (SELECT 1 FROM unnest(p_tags) t WHERE lower(t) = ANY(ARRAY['backdoor', 'dropper', 'malware', 'phishing', 'trojan']::text[])) THEN CAST('30.0' AS double precision)
+                ELSE CAST('0.0' AS double precision) END
+            + LEAST(CAST('50.0' AS double precision),
+                    COALESCE(cardinality(p_techniques), 0) * CAST('10.0' AS double precision))))]
+$fn$
+"""
+
+
+PREVIOUS_THREAT_SCORE = """
+CREATE OR REPLACE FUNCTION sentinel_threat_score(
+    p_metadata jsonb, p_threat_score integer, p_source_count bigint,
+    p_last_seen timestamptz, p_sighting_count integer, p_tags text[],
+    p_techniques text[], p_enrichment double precision, p_now timestamptz
+)
+RETURNS integer LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    SELECT sentinel_composite_score(sentinel_score_components(
+        p_metadata, p_threat_score, p_source_count, p_last_seen, p_sighting_count,
+        p_tags, p_techniques, p_enrichment, p_now
+    ))
+$fn$
+"""
+
+
+PREVIOUS_IOC_COMPONENTS = """
+CREATE OR REPLACE FUNCTION sentinel_ioc_components(p_ioc_id uuid, p_now timestamptz)
+RETURNS double precision[] LANGUAGE sql STABLE PARALLEL SAFE AS $fn$
+    SELECT sentinel_score_components(
+        i.metadata, i.threat_score,
+        (SELECT count(*) FROM ioc_sources s WHERE s.ioc_id = i.id),
+        i.last_seen, i.sighting_count, i.tags, i.mitre_techniques,
+        sentinel_enrichment_score(i.id, p_now), p_now
+    )
+    FROM iocs i WHERE i.id = p_ioc_id
+$fn$
+"""
+
+
+def upgrade() -> None:
+    for statement in (SCORE_COMPONENTS, THREAT_SCORE, IOC_COMPONENTS):
+        op.execute(statement)
+    op.execute(f"DROP FUNCTION IF EXISTS sentinel_threat_score({_ROW_ARGS})")
+    op.execute(f"DROP FUNCTION IF EXISTS sentinel_score_components({_ROW_ARGS})")
+
+
+def downgrade() -> None:
+    for statement in (PREVIOUS_SCORE_COMPONENTS, PREVIOUS_THREAT_SCORE, PREVIOUS_IOC_COMPONENTS):
+        op.execute(statement)
+    op.execute(f"DROP FUNCTION IF EXISTS sentinel_threat_score({_NEW_ROW_ARGS})")
+    op.execute(f"DROP FUNCTION IF EXISTS sentinel_score_components({_NEW_ROW_ARGS})")
@@ -0,0 +1,27 @@
+"""Record failed proactive refreshes on enrichments.
+
+The refresher used to push expires_at forward after an empty refresh, which
+made stale data read as fresh. refresh_failed_at carries the retry backoff
+instead.
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "015"
+down_revision: Union[str, None] = "014"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("enrichments", sa.Column("refresh_failed_at", sa.DateTime(timezone=True)))
+
+
+def downgrade() -> None:
+    op.drop_column("enrichments", "refresh_failed_at")
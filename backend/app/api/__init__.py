@@ -1,7 +1,7 @@
 """API router registration."""
 
 from fastapi import APIRouter
-from app.api import ioc, feeds, enrichment, dashboard, reports, attack, users, ai
+from app.api import ioc, feeds, enrichment, dashboard, reports, attack, users, ai, scoring, clusters
 
 api_router = APIRouter(prefix="/api/v1")
 
@@ -13,3 +13,5 @@ api_router.include_router(reports.router, prefix="/reports", tags=["Reports"])
 api_router.include_router(attack.router, prefix="/attack", tags=["ATT&CK"])
 api_router.include_router(users.router, prefix="/users", tags=["Users"])
 api_router.include_router(ai.router, prefix="/ai", tags=["AI"])
+api_router.include_router(scoring.router, prefix="/scoring", tags=["Scoring"])
+api_router.include_router(clusters.router, prefix="/clusters", tags=["Clusters"])
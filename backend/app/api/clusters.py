@@ -0,0 +1,87 @@
+"""IOC cluster (campaign grouping) API endpoints."""
+
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.models.ioc import IOC
+from app.models.ioc_cluster import IOCCluster
+from app.schemas.cluster import ClusterResponse, PaginatedClusterResponse
+from app.schemas.ioc import IOCResponse
+
+router = APIRouter()
+
+_SORT_COLUMNS = {
+    "size": IOCCluster.size,
+    "max_score": IOCCluster.max_score,
+    "avg_score": IOCCluster.avg_score,
+    "last_seen": IOCCluster.last_seen,
+}
+
+
+@router.get("", response_model=PaginatedClusterResponse)
+async def list_clusters(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=500),
+    min_size: int = Query(2, ge=2),
+    min_score: Optional[int] = Query(None, ge=0, le=100),
+    sort_by: str = Query("size"),
+    db: AsyncSession = Depends(get_db),
+):
+    """List clusters with size and threat score statistics."""
+    if sort_by not in _SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort: {sort_by}")
+
+    conditions = [IOCCluster.size >= min_size]
+    if min_score is not None:
+        conditions.append(IOCCluster.max_score >= min_score)
+
+    total = (await db.execute(select(func.count(IOCCluster.id)).where(*conditions))).scalar() or 0
+    result = await db.execute(
+        select(IOCCluster)
+        .where(*conditions)
+        .order_by(desc(_SORT_COLUMNS[sort_by]).nulls_last(), IOCCluster.id)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+
+    return PaginatedClusterResponse(
+        items=[ClusterResponse.model_validate(c) for c in result.scalars().all()],
+        total=total,
+        page=page,
+        page_size=page_size,
+        pages=(total + page_size - 1) // page_size,
+    )
+
+
+@router.get("/{cluster_id}")
+async def get_cluster(
+    cluster_id: UUID,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    """Cluster statistics with its member IOCs, highest threat score first."""
+    result = await db.execute(select(IOCCluster).where(IOCCluster.id == cluster_id))
+    cluster = result.scalar_one_or_none()
+    if not cluster:
+        raise HTTPException(status_code=404, detail="Cluster not found")
+
+    members = await db.execute(
+        select(IOC)
+        .where(IOC.cluster_id == cluster_id)
+        .order_by(desc(IOC.threat_score), IOC.id)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+
+    return {
+        **ClusterResponse.model_validate(cluster).model_dump(),
+        "members": [IOCResponse.model_validate(ioc) for ioc in members.scalars().all()],
+        "page": page,
+        "page_size": page_size,
+    }
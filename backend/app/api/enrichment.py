@@ -8,12 +8,34 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.ioc import IOC
 from app.models.enrichment import Enrichment
+from app.enrichers.registry import enricher_registry
 from app.services.enrichment_engine import enrich_ioc
 from app.schemas.enrichment import EnrichmentResponse, EnrichmentRequest
 
 router = APIRouter()
 
 
+@router.get("/sources")
+async def list_sources():
+    """List registered enrichment sources and their scheduling budgets."""
+    sources = []
+    for name in enricher_registry.names():
+        enricher = enricher_registry.get(name)
+        sources.append({
+            "name": name,
+            "ioc_types": list(enricher.ioc_types),
+            "available": enricher.is_available,
+            "supports_batch": enricher.supports_batch,
+            "ttl": enricher.ttl,
+            "max_concurrency": enricher.max_concurrency,
+            "rate_limit": (
+                {"max_requests": enricher.rate_limit[0], "window_seconds": enricher.rate_limit[1]}
+                if enricher.rate_limit else None
+            ),
+        })
+    return sources
+
+
 @router.get("/{ioc_id}", response_model=list[EnrichmentResponse])
 async def get_enrichments(ioc_id: UUID, db: AsyncSession = Depends(get_db)):
     """Get all enrichment data for an IOC."""
@@ -36,5 +58,7 @@ async def trigger_enrichment(
     if not ioc:
         raise HTTPException(status_code=404, detail="IOC not found")
 
-    results = await enrich_ioc(db, ioc, sources=request.sources)
+    results = await enrich_ioc(
+        db, ioc, sources=request.sources, allow_stale=request.allow_stale
+    )
     return {"status": "complete", "enrichments": results}
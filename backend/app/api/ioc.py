@@ -1,32 +1,225 @@
 """IOC CRUD and search API endpoints."""
 
-import csv
-import io
-from datetime import datetime
-from typing import Optional, List
+import json
+from datetime import datetime, timezone
+from typing import Dict, Optional, List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
-from sqlalchemy import select, func, desc, asc, or_, and_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select, func, desc, asc, literal, tuple_, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.database import get_db
+from app.config import settings
+from app.database import AsyncSessionLocal, get_db
 from app.models.ioc import IOC
 from app.models.enrichment import Enrichment
 from app.models.ioc_source import IOCSource
+from app.models.feed import FeedSource
 from app.models.ioc_relationship import IOCRelationship
 from app.schemas.ioc import (
     IOCCreate, IOCResponse, IOCDetailResponse, IOCSearchRequest,
     IOCBulkRequest, IOCExportRequest, IOCTagUpdate, PaginatedIOCResponse,
 )
-from app.services.scoring_engine import calculate_threat_score
+from app.services.bulk_lookup import lookup_iocs, lookup_key
+from app.services.enrichment_engine import enrich_ioc, is_stale, schedule_refresh
+from app.services.graph_store import graph_store
+from app.services.ioc_counts import count_iocs
+from app.services.ioc_export import EXPORT_MEDIA_TYPES, stream_export
+from app.services.value_search import relevance, value_condition
+from app.services.similarity import find_similar, update_signatures
+from app.services.feed_ingestion import apply_asn, apply_score
+from app.services.scoring_profiles import compile_profile, ensure_active_profile
+from app.services.scoring_engine import (
+    COMPONENTS, DEFAULT_PROFILE, get_score_category, score_components, next_recency_boundary,
+)
+from app.models.scoring_profile import ScoringProfile
 from app.utils.ioc_validator import detect_ioc_type, validate_ioc, normalize_ioc
-from app.utils.stix_converter import export_stix_json
+from app.utils.pagination import KEYSET_SORT_COLUMNS, decode_cursor, encode_cursor
 
 router = APIRouter()
 
 
+def _component_conditions(minimums: Dict[str, Optional[float]]) -> list:
+    """WHERE clauses for minimum cached component scores (unknown components are rejected)."""
+    conditions = []
+    for component, minimum in minimums.items():
+        if minimum is None:
+            continue
+        if component not in COMPONENTS:
+            raise HTTPException(status_code=400, detail=f"Unknown score component: {component}")
+        conditions.append(getattr(IOC, f"score_{component}") >= minimum)
+    return conditions
+
+
+def _search_conditions(search: IOCSearchRequest) -> list:
+    """WHERE clauses for an advanced search, shared by search and export."""
+    conditions = []
+    value_match = value_condition(search.query, search.fuzzy) if search.query else None
+    if value_match is not None:
+        conditions.append(value_match)
+    if search.ioc_type:
+        conditions.append(IOC.type == search.ioc_type)
+    if search.min_score is not None:
+        conditions.append(IOC.threat_score >= search.min_score)
+    if search.max_score is not None:
+        conditions.append(IOC.threat_score <= search.max_score)
+    if search.tags:
+        conditions.append(IOC.tags.overlap(search.tags))
+    if search.feed_source:
+        conditions.append(
+            select(IOCSource.id)
+            .join(FeedSource, FeedSource.id == IOCSource.feed_id)
+            .where(IOCSource.ioc_id == IOC.id, FeedSource.slug == search.feed_source)
+            .exists()
+        )
+    if search.mitre_technique:
+        conditions.append(IOC.mitre_techniques.any(search.mitre_technique))
+    conditions.extend(_component_conditions(search.min_components or {}))
+    if search.date_from:
+        conditions.append(IOC.last_seen >= search.date_from)
+    if search.date_to:
+        conditions.append(IOC.last_seen <= search.date_to)
+    return conditions
+
+
+async def _related_iocs(db: AsyncSession, ioc_id: UUID) -> List[dict]:
+    """Relationships of an IOC with the related IOC's columns, in one round trip.
+
+    Outgoing and incoming edges are joined to the IOC on the other end and
+    combined with UNION ALL, so both sides use their own index.
+    """
+    outgoing = (
+        select(
+            IOC.id, IOC.type, IOC.value, IOC.threat_score,
+            IOCRelationship.relationship_type, IOCRelationship.confidence,
+            literal("outgoing").label("direction"),
+        )
+        .join(IOCRelationship, IOCRelationship.target_ioc_id == IOC.id)
+        .where(IOCRelationship.source_ioc_id == ioc_id)
+    )
+    incoming = (
+        select(
+            IOC.id, IOC.type, IOC.value, IOC.threat_score,
+            IOCRelationship.relationship_type, IOCRelationship.confidence,
+            literal("incoming").label("direction"),
+        )
+        .join(IOCRelationship, IOCRelationship.source_ioc_id == IOC.id)
+        .where(IOCRelationship.target_ioc_id == ioc_id)
+    )
+    result = await db.execute(union_all(outgoing, incoming))
+    return [
+        {
+            "id": str(row.id),
+            "type": row.type,
+            "value": row.value,
+            "threat_score": row.threat_score,
+            "relationship_type": row.relationship_type,
+            "confidence": row.confidence,
+            "direction": row.direction,
+        }
+        for row in result
+    ]
+
+
+# Columns behind IOCResponse; listings select these instead of whole IOC rows
+_LISTING_COLUMNS = (
+    IOC.id, IOC.type, IOC.value, IOC.tags, IOC.mitre_techniques, IOC.threat_score,
+    IOC.confidence, IOC.first_seen, IOC.last_seen, IOC.sighting_count, IOC.asn,
+    IOC.network_prefix, IOC.cluster_id, IOC.created_at, IOC.updated_at,
+)
+_LISTING_ITEMS = TypeAdapter(List[IOCResponse])
+
+
+async def _paginate(
+    db: AsyncSession,
+    conditions: list,
+    *,
+    page: int,
+    page_size: int,
+    sort_by: str,
+    sort_order: str,
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+    include_metadata: bool = True,
+) -> Response:
+    """Run a filtered IOC listing as one page of PaginatedIOCResponse JSON.
+
+    Rows are ordered by (sort column, id). With a cursor the page starts
+    right after the cursor's key instead of at an offset; a next_cursor is
+    returned whenever more rows follow and the sort column supports keysets.
+    ``sort_by=relevance`` ranks by trigram similarity to the search text ``q``.
+    The total comes from count_iocs and may be a planner estimate.
+
+    Only the response columns are selected (metadata only if asked for) and
+    the page is validated and serialized in one pass by pydantic-core,
+    without building ORM objects.
+    """
+    sort_order = "asc" if sort_order == "asc" else "desc"
+    keyset = sort_by in KEYSET_SORT_COLUMNS
+    if sort_by == "relevance" and q and q.strip():
+        sort_column = relevance(q)
+    else:
+        sort_column = getattr(IOC, sort_by, IOC.last_seen)
+    direction = asc if sort_order == "asc" else desc
+
+    columns = _LISTING_COLUMNS + ((IOC.metadata_,) if include_metadata else ())
+    query = (
+        select(*columns)
+        .where(*conditions)
+        .order_by(direction(sort_column), direction(IOC.id))
+    )
+    count_query = select(func.count(IOC.id)).where(*conditions)
+
+    if cursor:
+        if not keyset:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cursor pagination supports sort_by: {', '.join(KEYSET_SORT_COLUMNS)}",
+            )
+        try:
+            value, last_id = decode_cursor(cursor, sort_by, sort_order)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        key = tuple_(sort_column, IOC.id)
+        query = query.where(key > (value, last_id) if sort_order == "asc" else key < (value, last_id))
+    else:
+        query = query.offset((page - 1) * page_size)
+
+    # One extra row tells whether another page follows
+    result = await db.execute(query.limit(page_size + 1))
+    rows = result.all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    seen = (page - 1) * page_size + len(rows)
+    if not cursor and not has_more and (rows or page == 1):
+        # The last page of an offset listing already tells the exact total
+        total, total_is_exact = seen, True
+    else:
+        total, total_is_exact = await count_iocs(db, count_query)
+        if not total_is_exact and not cursor:
+            total = max(total, seen + has_more)
+
+    next_cursor = None
+    if has_more and keyset:
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_by, sort_order, getattr(last, sort_by), last.id)
+
+    response = PaginatedIOCResponse.model_construct(
+        items=_LISTING_ITEMS.validate_python([row._mapping for row in rows]),
+        total=total,
+        page=page,
+        page_size=page_size,
+        pages=(total + page_size - 1) // page_size if page_size > 0 else 0,
+        total_is_exact=total_is_exact,
+        next_cursor=next_cursor,
+    )
+    return Response(content=response.model_dump_json(by_alias=True), media_type="application/json")
+
+
 @router.get("", response_model=PaginatedIOCResponse)
 async def list_iocs(
     page: int = Query(1, ge=1),
@@ -38,47 +231,42 @@ async def list_iocs(
     sort_order: str = Query("desc"),
     tag: Optional[str] = Query(None),
     q: Optional[str] = Query(None),
+    fuzzy: bool = Query(False, description="Also match values with a word similar to q"),
+    min_reputation: Optional[float] = Query(None, ge=0, le=100),
+    min_diversity: Optional[float] = Query(None, ge=0, le=100),
+    min_recency: Optional[float] = Query(None, ge=0, le=100),
+    min_frequency: Optional[float] = Query(None, ge=0, le=100),
+    min_enrichment: Optional[float] = Query(None, ge=0, le=100),
+    min_context: Optional[float] = Query(None, ge=0, le=100),
+    cluster_id: Optional[UUID] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; overrides page"),
+    include_metadata: bool = Query(True, description="Include each IOC's metadata object"),
     db: AsyncSession = Depends(get_db),
 ):
     """List IOCs with pagination, filtering, and sorting."""
-    query = select(IOC)
-    count_query = select(func.count(IOC.id))
-
+    conditions = []
     if ioc_type:
-        query = query.where(IOC.type == ioc_type)
-        count_query = count_query.where(IOC.type == ioc_type)
+        conditions.append(IOC.type == ioc_type)
     if min_score is not None:
-        query = query.where(IOC.threat_score >= min_score)
-        count_query = count_query.where(IOC.threat_score >= min_score)
+        conditions.append(IOC.threat_score >= min_score)
     if max_score is not None:
-        query = query.where(IOC.threat_score <= max_score)
-        count_query = count_query.where(IOC.threat_score <= max_score)
+        conditions.append(IOC.threat_score <= max_score)
     if tag:
-        query = query.where(IOC.tags.any(tag))
-        count_query = count_query.where(IOC.tags.any(tag))
-    if q:
-        query = query.where(IOC.value.ilike(f"%{q}%"))
-        count_query = count_query.where(IOC.value.ilike(f"%{q}%"))
-
-    sort_column = getattr(IOC, sort_by, IOC.last_seen)
-    if sort_order == "asc":
-        query = query.order_by(asc(sort_column))
-    else:
-        query = query.order_by(desc(sort_column))
-
-    total = (await db.execute(count_query)).scalar() or 0
-    offset = (page - 1) * page_size
-    query = query.offset(offset).limit(page_size)
-
-    result = await db.execute(query)
-    iocs = result.scalars().all()
-
-    return PaginatedIOCResponse(
-        items=[IOCResponse.model_validate(ioc) for ioc in iocs],
-        total=total,
-        page=page,
-        page_size=page_size,
-        pages=(total + page_size - 1) // page_size if page_size > 0 else 0,
+        conditions.append(IOC.tags.any(tag))
+    value_match = value_condition(q, fuzzy) if q else None
+    if value_match is not None:
+        conditions.append(value_match)
+    if cluster_id:
+        conditions.append(IOC.cluster_id == cluster_id)
+    conditions.extend(_component_conditions({
+        "reputation": min_reputation, "diversity": min_diversity, "recency": min_recency,
+        "frequency": min_frequency, "enrichment": min_enrichment, "context": min_context,
+    }))
+
+    return await _paginate(
+        db, conditions,
+        page=page, page_size=page_size, sort_by=sort_by, sort_order=sort_order, cursor=cursor, q=q,
+        include_metadata=include_metadata,
     )
 
 
@@ -98,22 +286,21 @@ async def get_ioc(ioc_id: UUID, db: AsyncSession = Depends(get_db)):
     if not ioc:
         raise HTTPException(status_code=404, detail="IOC not found")
 
-    # Get relationships
-    rels = await db.execute(
-        select(IOCRelationship).where(
-            or_(
-                IOCRelationship.source_ioc_id == ioc_id,
-                IOCRelationship.target_ioc_id == ioc_id,
-            )
-        )
-    )
-    relationships = rels.scalars().all()
-
     enrichments = [
-        {"source": e.source, "data": e.data, "enriched_at": e.enriched_at.isoformat()}
+        {
+            "source": e.source,
+            "data": e.data,
+            "enriched_at": e.enriched_at.isoformat(),
+            "stale": is_stale(e),
+        }
         for e in ioc.enrichments
     ]
 
+    # Serve stale enrichment as-is and refresh it behind the response
+    stale_sources = [e["source"] for e in enrichments if e["stale"]]
+    if stale_sources:
+        await schedule_refresh(ioc.id, stale_sources)
+
     sources = [
         {
             "feed_name": s.feed.name if s.feed else "Unknown",
@@ -123,21 +310,7 @@ async def get_ioc(ioc_id: UUID, db: AsyncSession = Depends(get_db)):
         for s in ioc.sources
     ]
 
-    rel_data = []
-    for r in relationships:
-        is_source = str(r.source_ioc_id) == str(ioc_id)
-        related_id = r.target_ioc_id if is_source else r.source_ioc_id
-        related_result = await db.execute(select(IOC).where(IOC.id == related_id))
-        related_ioc = related_result.scalar_one_or_none()
-        if related_ioc:
-            rel_data.append({
-                "id": str(related_ioc.id),
-                "type": related_ioc.type,
-                "value": related_ioc.value,
-                "threat_score": related_ioc.threat_score,
-                "relationship_type": r.relationship_type,
-                "direction": "outgoing" if is_source else "incoming",
-            })
+    rel_data = await _related_iocs(db, ioc.id)
 
     # Build the response dict from the IOC base fields, then attach
     # manually-built enrichment/source/relationship dicts
@@ -167,26 +340,28 @@ async def create_ioc(ioc_data: IOCCreate, db: AsyncSession = Depends(get_db)):
     if existing.scalar_one_or_none():
         raise HTTPException(status_code=409, detail="IOC already exists")
 
-    score = ioc_data.threat_score
-    if score is None:
-        score = calculate_threat_score({
-            "type": ioc_data.type,
-            "value": value,
-            "tags": ioc_data.tags,
-            "mitre_techniques": ioc_data.mitre_techniques,
-        })
-
     ioc = IOC(
         type=ioc_data.type,
         value=value,
-        threat_score=score,
+        threat_score=ioc_data.threat_score,
         confidence=ioc_data.confidence or 50,
         tags=ioc_data.tags,
         metadata_=ioc_data.metadata_ or {},
         mitre_techniques=ioc_data.mitre_techniques,
+        next_rescore_at=next_recency_boundary(datetime.now(timezone.utc)),
     )
+    if ioc_data.threat_score is None:
+        await ensure_active_profile(db)
+        apply_score(ioc, score_components({
+            "type": ioc_data.type,
+            "value": value,
+            "tags": ioc_data.tags,
+            "mitre_techniques": ioc_data.mitre_techniques,
+        }))
+    apply_asn(ioc)
     db.add(ioc)
     await db.flush()
+    await update_signatures(db, [ioc])
 
     return IOCResponse.model_validate(ioc)
 
@@ -194,69 +369,118 @@ async def create_ioc(ioc_data: IOCCreate, db: AsyncSession = Depends(get_db)):
 @router.post("/search", response_model=PaginatedIOCResponse)
 async def search_iocs(search: IOCSearchRequest, db: AsyncSession = Depends(get_db)):
     """Advanced IOC search with multiple filters."""
-    query = select(IOC)
-    count_query = select(func.count(IOC.id))
+    return await _paginate(
+        db, _search_conditions(search),
+        page=search.page, page_size=search.page_size,
+        sort_by=search.sort_by, sort_order=search.sort_order, cursor=search.cursor,
+        q=search.query, include_metadata=search.include_metadata,
+    )
 
-    if search.query:
-        query = query.where(IOC.value.ilike(f"%{search.query}%"))
-        count_query = count_query.where(IOC.value.ilike(f"%{search.query}%"))
-    if search.ioc_type:
-        query = query.where(IOC.type == search.ioc_type)
-        count_query = count_query.where(IOC.type == search.ioc_type)
-    if search.min_score is not None:
-        query = query.where(IOC.threat_score >= search.min_score)
-        count_query = count_query.where(IOC.threat_score >= search.min_score)
-    if search.max_score is not None:
-        query = query.where(IOC.threat_score <= search.max_score)
-        count_query = count_query.where(IOC.threat_score <= search.max_score)
-    if search.tags:
-        query = query.where(IOC.tags.overlap(search.tags))
-        count_query = count_query.where(IOC.tags.overlap(search.tags))
-    if search.mitre_technique:
-        query = query.where(IOC.mitre_techniques.any(search.mitre_technique))
-        count_query = count_query.where(IOC.mitre_techniques.any(search.mitre_technique))
-    if search.date_from:
-        query = query.where(IOC.last_seen >= search.date_from)
-        count_query = count_query.where(IOC.last_seen >= search.date_from)
-    if search.date_to:
-        query = query.where(IOC.last_seen <= search.date_to)
-        count_query = count_query.where(IOC.last_seen <= search.date_to)
 
-    sort_column = getattr(IOC, search.sort_by, IOC.last_seen)
-    if search.sort_order == "asc":
-        query = query.order_by(asc(sort_column))
-    else:
-        query = query.order_by(desc(sort_column))
+@router.post("/bulk", response_model=List[IOCResponse])
+async def bulk_lookup(request: IOCBulkRequest, db: AsyncSession = Depends(get_db)):
+    """Bulk IOC lookup — search for multiple IOC values at once.
+
+    Values are type-detected and normalized before matching; only found
+    IOCs are returned. Use /bulk/stream for per-input results.
+    """
+    if len(request.values) > settings.BULK_LOOKUP_MAX_VALUES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BULK_LOOKUP_MAX_VALUES} values per lookup",
+        )
+    keys = [key for key in map(lookup_key, request.values) if key is not None]
+
+    results, seen = [], set()
+    for start in range(0, len(keys), settings.BULK_LOOKUP_BATCH_SIZE):
+        matches = await lookup_iocs(db, keys[start:start + settings.BULK_LOOKUP_BATCH_SIZE])
+        for iocs in matches.values():
+            for ioc in iocs:
+                if ioc.id not in seen:
+                    seen.add(ioc.id)
+                    results.append(IOCResponse.model_validate(ioc))
+    return results
 
-    total = (await db.execute(count_query)).scalar() or 0
-    offset = (search.page - 1) * search.page_size
-    query = query.offset(offset).limit(search.page_size)
 
-    result = await db.execute(query)
-    iocs = result.scalars().all()
+def _ndjson_value(line: bytes) -> Optional[str]:
+    """Lookup value on one NDJSON line: a JSON string, {"value": ...} or plain text."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        item = json.loads(line)
+    except ValueError:
+        return line.decode("utf-8", errors="replace")
+    if isinstance(item, dict):
+        item = item.get("value")
+    return item if isinstance(item, str) else None
+
+
+async def _bulk_lookup_lines(keys: List[dict]):
+    """One NDJSON result line per input, looked up a batch at a time."""
+    # The request's session is gone once streaming starts
+    async with AsyncSessionLocal() as session:
+        for start in range(0, len(keys), settings.BULK_LOOKUP_BATCH_SIZE):
+            batch = keys[start:start + settings.BULK_LOOKUP_BATCH_SIZE]
+            matches = await lookup_iocs(session, batch)
+            lines = []
+            for key in batch:
+                iocs = matches.get((key["type"], key["value"]), [])
+                lines.append(json.dumps({
+                    **key,
+                    "found": bool(iocs),
+                    "matches": [
+                        IOCResponse.model_validate(ioc).model_dump(mode="json", by_alias=True)
+                        for ioc in iocs
+                    ],
+                }))
+            yield "\n".join(lines) + "\n"
+
+
+def _check_line_length(line: bytes) -> None:
+    if len(line) > settings.BULK_LOOKUP_MAX_LINE_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lines are limited to {settings.BULK_LOOKUP_MAX_LINE_BYTES} bytes",
+        )
 
-    return PaginatedIOCResponse(
-        items=[IOCResponse.model_validate(ioc) for ioc in iocs],
-        total=total,
-        page=search.page,
-        page_size=search.page_size,
-        pages=(total + search.page_size - 1) // search.page_size if search.page_size > 0 else 0,
-    )
 
+def _add_lookup_line(keys: List[dict], line: bytes) -> None:
+    """Append the lookup key for one NDJSON line, enforcing the bulk lookup limits."""
+    _check_line_length(line)
+    value = _ndjson_value(line)
+    key = lookup_key(value) if value is not None else None
+    if key is None:
+        return
+    if len(keys) >= settings.BULK_LOOKUP_MAX_VALUES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BULK_LOOKUP_MAX_VALUES} values per lookup",
+        )
+    keys.append(key)
 
-@router.post("/bulk", response_model=List[IOCResponse])
-async def bulk_lookup(request: IOCBulkRequest, db: AsyncSession = Depends(get_db)):
-    """Bulk IOC lookup — search for multiple IOC values at once."""
-    results = []
-    for value in request.values[:100]:  # Limit to 100
-        value = value.strip()
-        if not value:
-            continue
-        result = await db.execute(select(IOC).where(IOC.value == value))
-        ioc = result.scalar_one_or_none()
-        if ioc:
-            results.append(IOCResponse.model_validate(ioc))
-    return results
+
+@router.post("/bulk/stream")
+async def bulk_lookup_stream(request: Request):
+    """Bulk IOC lookup over NDJSON, for log-batch sized inputs.
+
+    The body has one value per line (a JSON string, ``{"value": ...}`` or
+    plain text). The response has one line per input, in order, with the
+    detected type, normalized value and matching IOCs. More than
+    BULK_LOOKUP_MAX_VALUES values is a 400; a line over
+    BULK_LOOKUP_MAX_LINE_BYTES is a 413.
+    """
+    keys = []
+    buffer = b""
+    async for chunk in request.stream():
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            _add_lookup_line(keys, line)
+        # An unterminated line must not grow without bound
+        _check_line_length(buffer)
+    _add_lookup_line(keys, buffer)
+
+    return StreamingResponse(_bulk_lookup_lines(keys), media_type="application/x-ndjson")
 
 
 @router.put("/{ioc_id}/tags", response_model=IOCResponse)
@@ -269,9 +493,62 @@ async def update_tags(ioc_id: UUID, tag_update: IOCTagUpdate, db: AsyncSession =
 
     ioc.tags = tag_update.tags
     await db.flush()
+    await update_signatures(db, [ioc])
     return IOCResponse.model_validate(ioc)
 
 
+@router.get("/{ioc_id}/score")
+async def get_score_breakdown(ioc_id: UUID, db: AsyncSession = Depends(get_db)):
+    """Explain an IOC's threat score from its stored component scores (nothing is recomputed)."""
+    result = await db.execute(select(IOC).where(IOC.id == ioc_id))
+    ioc = result.scalar_one_or_none()
+    if not ioc:
+        raise HTTPException(status_code=404, detail="IOC not found")
+
+    response = {
+        "ioc_id": str(ioc.id),
+        "type": ioc.type,
+        "value": ioc.value,
+        "threat_score": ioc.threat_score,
+        "category": get_score_category(ioc.threat_score or 0),
+        "scored_at": ioc.scored_at.isoformat() if ioc.scored_at else None,
+        "profile": None,
+        "components": None,
+    }
+    if ioc.score_reputation is None:
+        # Score supplied by a feed or set by hand; there is no breakdown to show
+        response["source"] = "external"
+        return response
+
+    # Weights are only known while the profile is still at the version that scored the IOC
+    weights = None
+    if ioc.score_profile == DEFAULT_PROFILE.name and not ioc.score_profile_version:
+        weights = dict(DEFAULT_PROFILE.weights)
+    else:
+        stored = await db.execute(select(ScoringProfile).where(ScoringProfile.name == ioc.score_profile))
+        profile = stored.scalar_one_or_none()
+        if profile and profile.version == ioc.score_profile_version:
+            weights = dict(compile_profile(profile).weights)
+
+    active = await ensure_active_profile(db)
+    response["source"] = "computed"
+    response["profile"] = {
+        "name": ioc.score_profile,
+        "version": ioc.score_profile_version,
+        "current": (ioc.score_profile, ioc.score_profile_version) == (active.name, active.version),
+    }
+    response["components"] = [
+        {
+            "name": name,
+            "score": getattr(ioc, f"score_{name}"),
+            "weight": weights[name] if weights else None,
+            "contribution": getattr(ioc, f"score_{name}") * weights[name] if weights else None,
+        }
+        for name in COMPONENTS
+    ]
+    return response
+
+
 @router.get("/{ioc_id}/enrichment")
 async def get_enrichment(ioc_id: UUID, db: AsyncSession = Depends(get_db)):
     """Get enrichment data for an IOC."""
@@ -286,56 +563,116 @@ async def get_enrichment(ioc_id: UUID, db: AsyncSession = Depends(get_db)):
             "data": e.data,
             "enriched_at": e.enriched_at.isoformat(),
             "expires_at": e.expires_at.isoformat() if e.expires_at else None,
+            "stale": is_stale(e),
         }
         for e in enrichments
     ]
 
 
 @router.post("/{ioc_id}/enrich")
-async def trigger_enrichment(ioc_id: UUID, db: AsyncSession = Depends(get_db)):
+async def trigger_enrichment(
+    ioc_id: UUID,
+    allow_stale: bool = Query(True),
+    db: AsyncSession = Depends(get_db),
+):
     """Trigger re-enrichment for an IOC."""
-    from app.services.enrichment_engine import enrich_ioc
-
     result = await db.execute(select(IOC).where(IOC.id == ioc_id))
     ioc = result.scalar_one_or_none()
     if not ioc:
         raise HTTPException(status_code=404, detail="IOC not found")
 
-    enrichment_results = await enrich_ioc(db, ioc)
+    enrichment_results = await enrich_ioc(db, ioc, allow_stale=allow_stale)
     return {"status": "enrichment_complete", "results": enrichment_results}
 
 
 @router.get("/{ioc_id}/relationships")
 async def get_relationships(ioc_id: UUID, db: AsyncSession = Depends(get_db)):
     """Get related IOCs."""
-    result = await db.execute(
-        select(IOCRelationship).where(
-            or_(
-                IOCRelationship.source_ioc_id == ioc_id,
-                IOCRelationship.target_ioc_id == ioc_id,
-            )
-        )
+    return await _related_iocs(db, ioc_id)
+
+
+@router.get("/{ioc_id}/graph")
+async def get_ioc_graph(
+    ioc_id: UUID,
+    depth: int = Query(2, ge=1, le=settings.GRAPH_MAX_DEPTH),
+    limit: int = Query(200, ge=1, le=settings.GRAPH_MAX_NODES),
+    to: Optional[UUID] = Query(None, description="Return the shortest path to this IOC instead"),
+    relationship_type: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Multi-hop neighborhood of an IOC, or the shortest path to another one.
+
+    Traversal runs on the in-memory relationship graph; only the node
+    details for the result are read from the database.
+    """
+    exists = await db.execute(select(IOC.id).where(IOC.id == ioc_id))
+    if exists.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="IOC not found")
+
+    graph = await graph_store.get(db)
+    if to is not None:
+        path = graph.shortest_path(ioc_id, to, depth, relationship_type)
+        edges = path or []
+        hops = {ioc_id: 0}
+        for hop, edge in enumerate(edges, start=1):
+            hops.setdefault(edge["source"], hop)
+            hops.setdefault(edge["target"], hop)
+        result = {"nodes": hops, "edges": edges, "truncated": False}
+    else:
+        path = None
+        result = graph.neighborhood(ioc_id, depth, limit, relationship_type)
+
+    rows = await db.execute(
+        select(IOC.id, IOC.type, IOC.value, IOC.threat_score)
+        .where(IOC.id.in_(list(result["nodes"])))
     )
-    relationships = result.scalars().all()
-
-    rel_data = []
-    for r in relationships:
-        is_source = str(r.source_ioc_id) == str(ioc_id)
-        related_id = r.target_ioc_id if is_source else r.source_ioc_id
-        related = await db.execute(select(IOC).where(IOC.id == related_id))
-        related_ioc = related.scalar_one_or_none()
-        if related_ioc:
-            rel_data.append({
-                "id": str(related_ioc.id),
-                "type": related_ioc.type,
-                "value": related_ioc.value,
-                "threat_score": related_ioc.threat_score,
-                "relationship_type": r.relationship_type,
-                "confidence": r.confidence,
-                "direction": "outgoing" if is_source else "incoming",
-            })
-
-    return rel_data
+    details = {row.id: row for row in rows}
+
+    nodes = [
+        {
+            "id": str(node_id),
+            "type": details[node_id].type,
+            "value": details[node_id].value,
+            "threat_score": details[node_id].threat_score,
+            "depth": hop,
+        }
+        for node_id, hop in result["nodes"].items()
+        if node_id in details
+    ]
+    edges = [
+        {**edge, "source": str(edge["source"]), "target": str(edge["target"])}
+        for edge in result["edges"]
+        if edge["source"] in details and edge["target"] in details
+    ]
+
+    response = {
+        "ioc_id": str(ioc_id),
+        "depth": depth,
+        "nodes": nodes,
+        "edges": edges,
+        "truncated": result["truncated"],
+        "graph": {"nodes": graph.node_count, "edges": graph.edge_count + graph.overlay_edges},
+    }
+    if to is not None:
+        response["to"] = str(to)
+        response["path_found"] = path is not None
+    return response
+
+
+@router.get("/{ioc_id}/similar")
+async def get_similar_iocs(
+    ioc_id: UUID,
+    k: int = Query(10, ge=1, le=100),
+    min_similarity: float = Query(0.0, ge=0.0, le=1.0),
+    db: AsyncSession = Depends(get_db),
+):
+    """IOCs whose tags, techniques and malware family most resemble this one (Jaccard)."""
+    result = await db.execute(select(IOC).where(IOC.id == ioc_id))
+    ioc = result.scalar_one_or_none()
+    if not ioc:
+        raise HTTPException(status_code=404, detail="IOC not found")
+
+    return await find_similar(db, ioc, k=k, min_similarity=min_similarity)
 
 
 @router.get("/{ioc_id}/timeline")
@@ -374,50 +711,23 @@ async def get_timeline(ioc_id: UUID, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/export")
-async def export_iocs(request: IOCExportRequest, db: AsyncSession = Depends(get_db)):
-    """Export IOCs in various formats (JSON, CSV, STIX)."""
-    if request.ioc_ids:
-        result = await db.execute(select(IOC).where(IOC.id.in_(request.ioc_ids)))
-    else:
-        query = select(IOC).order_by(desc(IOC.threat_score)).limit(1000)
-        result = await db.execute(query)
+async def export_iocs(request: IOCExportRequest):
+    """Export IOCs in various formats (JSON, NDJSON, CSV, STIX), streamed.
 
-    iocs = result.scalars().all()
-    ioc_dicts = [
-        {
-            "id": str(ioc.id),
-            "type": ioc.type,
-            "value": ioc.value,
-            "threat_score": ioc.threat_score,
-            "confidence": ioc.confidence,
-            "first_seen": ioc.first_seen.isoformat() if ioc.first_seen else None,
-            "last_seen": ioc.last_seen.isoformat() if ioc.last_seen else None,
-            "sighting_count": ioc.sighting_count,
-            "tags": ioc.tags or [],
-            "created_at": ioc.created_at.isoformat() if ioc.created_at else None,
-            "updated_at": ioc.updated_at.isoformat() if ioc.updated_at else None,
-        }
-        for ioc in iocs
-    ]
-
-    if request.format == "stix":
-        stix_json = export_stix_json(ioc_dicts)
-        return Response(
-            content=stix_json,
-            media_type="application/json",
-            headers={"Content-Disposition": "attachment; filename=sentinel_export.stix.json"},
-        )
-    elif request.format == "csv":
-        output = io.StringIO()
-        writer = csv.DictWriter(output, fieldnames=["type", "value", "threat_score", "confidence", "first_seen", "last_seen", "tags"])
-        writer.writeheader()
-        for d in ioc_dicts:
-            d["tags"] = "|".join(d.get("tags", []))
-            writer.writerow({k: d.get(k) for k in writer.fieldnames})
-        return Response(
-            content=output.getvalue(),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=sentinel_export.csv"},
-        )
+    Exports the listed ioc_ids, or every IOC matching the search filters.
+    """
+    if request.ioc_ids:
+        conditions = [IOC.id.in_(request.ioc_ids)]
     else:
-        return ioc_dicts
+        conditions = _search_conditions(request.filters) if request.filters else []
+
+    fmt = request.format if request.format in EXPORT_MEDIA_TYPES else "json"
+    headers = {}
+    if fmt != "json":
+        filename = "sentinel_export.stix.json" if fmt == "stix" else f"sentinel_export.{fmt}"
+        headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return StreamingResponse(
+        stream_export(fmt, conditions),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers=headers,
+    )
@@ -0,0 +1,129 @@
+"""Scoring profile API endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.models.scoring_profile import ScoringProfile
+from app.schemas.scoring import ScoringProfileCreate, ScoringProfileUpdate, ScoringProfileResponse
+from app.services.scoring_engine import COMPONENTS
+from app.services.scoring_profiles import compile_profile, ensure_active_profile
+from app.tasks.scoring_tasks import apply_scoring_profile
+
+router = APIRouter()
+
+
+async def _get_profile(db: AsyncSession, name: str) -> ScoringProfile:
+    result = await db.execute(select(ScoringProfile).where(ScoringProfile.name == name))
+    profile = result.scalar_one_or_none()
+    if not profile:
+        raise HTTPException(status_code=404, detail="Scoring profile not found")
+    return profile
+
+
+def _compile_or_422(profile: ScoringProfile):
+    try:
+        return compile_profile(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _queue_apply(full_rescore: bool) -> dict:
+    task = apply_scoring_profile.delay(full_rescore=full_rescore)
+    return {"task_id": task.id, "full_rescore": full_rescore}
+
+
+@router.get("/profiles", response_model=list[ScoringProfileResponse])
+async def list_profiles(db: AsyncSession = Depends(get_db)):
+    """List stored scoring profiles."""
+    result = await db.execute(select(ScoringProfile).order_by(ScoringProfile.name))
+    return [ScoringProfileResponse.model_validate(p) for p in result.scalars().all()]
+
+
+@router.get("/profiles/active")
+async def get_active(db: AsyncSession = Depends(get_db)):
+    """Show the compiled profile currently used for scoring."""
+    profile = await ensure_active_profile(db)
+    return {
+        "name": profile.name,
+        "version": profile.version,
+        "weights": dict(profile.weights),
+        "high_risk_tags": sorted(profile.high_risk_tags),
+        "medium_risk_tags": sorted(profile.medium_risk_tags),
+        "high_risk_countries": sorted(profile.high_risk_countries),
+        "total_feeds": profile.total_feeds,
+        "components": list(COMPONENTS),
+    }
+
+
+@router.post("/profiles", response_model=ScoringProfileResponse)
+async def create_profile(data: ScoringProfileCreate, db: AsyncSession = Depends(get_db)):
+    """Store a new (inactive) scoring profile."""
+    existing = await db.execute(select(ScoringProfile).where(ScoringProfile.name == data.name))
+    if existing.scalar_one_or_none():
+        raise HTTPException(status_code=409, detail="Scoring profile with this name already exists")
+
+    profile = ScoringProfile(**data.model_dump(), is_active=False)
+    _compile_or_422(profile)
+    db.add(profile)
+    await db.flush()
+    return ScoringProfileResponse.model_validate(profile)
+
+
+@router.put("/profiles/{name}")
+async def update_profile(name: str, data: ScoringProfileUpdate, db: AsyncSession = Depends(get_db)):
+    """Update a profile; changes to the active profile are applied to every IOC."""
+    profile = await _get_profile(db, name)
+    before = _compile_or_422(profile)
+
+    changes = data.model_dump(exclude_unset=True)
+    for field, value in changes.items():
+        setattr(profile, field, value)
+    if changes:
+        profile.version = (profile.version or 1) + 1
+    after = _compile_or_422(profile)
+    await db.flush()
+
+    response = {"profile": ScoringProfileResponse.model_validate(profile)}
+    if profile.is_active:
+        await db.commit()
+        await ensure_active_profile(db, force=True)
+        response["rescore"] = _queue_apply(full_rescore=not before.same_components(after))
+    return response
+
+
+@router.post("/profiles/{name}/activate")
+async def activate_profile(name: str, db: AsyncSession = Depends(get_db)):
+    """Make a profile the active one and re-score the corpus under it."""
+    profile = await _get_profile(db, name)
+    compiled = _compile_or_422(profile)
+    previous = await ensure_active_profile(db, force=True)
+
+    if not profile.is_active:
+        await db.execute(
+            update(ScoringProfile).where(ScoringProfile.is_active.is_(True)).values(is_active=False)
+        )
+        profile.is_active = True
+    await db.flush()
+    # The task runs in another process: it must see the switch committed
+    await db.commit()
+    await ensure_active_profile(db, force=True)
+
+    return {
+        "status": "activated",
+        "profile": name,
+        "rescore": _queue_apply(full_rescore=not previous.same_components(compiled)),
+    }
+
+
+@router.delete("/profiles/{name}")
+async def delete_profile(name: str, db: AsyncSession = Depends(get_db)):
+    """Remove an inactive scoring profile."""
+    profile = await _get_profile(db, name)
+    if profile.is_active:
+        raise HTTPException(status_code=409, detail="Cannot delete the active scoring profile")
+
+    await db.delete(profile)
+    await db.flush()
+    return {"status": "deleted", "profile": name}
@@ -34,17 +34,64 @@ class Settings(BaseSettings):
 
     # GeoIP
     GEOIP_DB_PATH: str = "/app/data/GeoLite2-City.mmdb"
+    # GeoLite2-ASN .mmdb, or comma-separated GeoLite2-ASN-Blocks CSV files
+    ASN_DB_PATH: str = "/app/data/GeoLite2-ASN.mmdb"
 
     # Pagination
     DEFAULT_PAGE_SIZE: int = 50
     MAX_PAGE_SIZE: int = 500
+    COUNT_EXACT_THRESHOLD: int = 10000   # Planner estimates above this are returned as the total
+    COUNT_CACHE_TTL: int = 30            # Seconds a listing total is reused across pages
+    BULK_LOOKUP_MAX_VALUES: int = 100000   # Inputs accepted by one bulk lookup
+    BULK_LOOKUP_BATCH_SIZE: int = 5000     # Inputs resolved per unnest join
+    BULK_LOOKUP_MAX_LINE_BYTES: int = 8192  # Longest NDJSON line accepted by the streaming lookup
 
     # Cache TTLs (seconds)
     CACHE_TTL_WHOIS: int = 86400      # 24 hours
     CACHE_TTL_DNS: int = 3600          # 1 hour
     CACHE_TTL_GEOIP: int = 86400       # 24 hours
     CACHE_TTL_REPUTATION: int = 21600   # 6 hours
+    CACHE_TTL_SHODAN: int = 86400       # 24 hours
+    CACHE_TTL_ASN: int = 604800         # 7 days
     CACHE_TTL_DASHBOARD: int = 60       # 1 minute
+    CACHE_TTL_ATTACK: int = 300         # 5 minutes
+    CACHE_TTL_IOC_DETAIL: int = 30      # 30 seconds
+
+    # Stale-while-revalidate enrichment serving
+    ENRICHMENT_MAX_AGE: int = 0                # Never serve data older than this (s); 0 = no limit
+    ENRICHMENT_REFRESH_DEDUP_TTL: int = 300    # Window for deduplicating queued refreshes
+
+    # Proactive refresh of expired enrichment (Celery beat)
+    ENRICHMENT_REFRESH_INTERVAL: int = 600           # Seconds between refresher runs
+    ENRICHMENT_REFRESH_BUDGET_PER_HOUR: int = 3000   # Max records re-enriched per hour
+    ENRICHMENT_REFRESH_BATCH_SIZE: int = 100
+    ENRICHMENT_REFRESH_RUN_SECONDS: int = 240        # Per-source task time; keep under the soft limit
+
+    # Rescoring of IOCs whose recency bucket has changed (Celery beat)
+    RESCORE_DECAY_INTERVAL: int = 900
+
+    # Debounced rescoring after enrichment lands
+    RESCORE_DEBOUNCE_SECONDS: int = 15   # Wait for an IOC's enrichers to settle
+    RESCORE_QUEUE_INTERVAL: int = 30     # Seconds between queue drains
+
+    # Batch correlation over inverted tag/technique/network indexes (Celery beat)
+    CORRELATION_INTERVAL: int = 3600         # Seconds between delta correlation runs
+    CORRELATION_LOOKBACK_HOURS: int = 2      # Delta window; overlaps runs so nothing is missed
+    CORRELATION_MAX_POSTING: int = 500       # Skip keys shared by more IOCs than this
+
+    # In-memory relationship graph (per API process)
+    GRAPH_REFRESH_INTERVAL: int = 30       # Seconds between delta loads of new edges
+    GRAPH_REBUILD_INTERVAL: int = 3600     # Seconds between full reloads (picks up deletions)
+    GRAPH_OVERLAY_LIMIT: int = 100000      # Delta edges held before recompacting the CSR arrays
+    GRAPH_MAX_DEPTH: int = 4
+    GRAPH_MAX_NODES: int = 2000
+
+    # Infrastructure clustering (Celery beat)
+    CLUSTER_REBUILD_INTERVAL: int = 86400      # Seconds between full recomputes
+    CLUSTER_UPDATE_INTERVAL: int = 300         # Seconds between incremental merges of new edges
+    CLUSTER_MIN_CONFIDENCE: int = 50           # Relationships at/above this can merge clusters
+    CLUSTER_MAX_ATTRIBUTE_GROUP: int = 1000    # Ignore attribute values shared by more IOCs
+    CLUSTER_SPLIT_SIZE: int = 50               # Larger components are split into communities
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,28 @@
+"""ASN and network-prefix enrichment from the local IP-to-ASN table."""
+
+from typing import Dict, Any, Optional
+
+from app.enrichers.base import BaseEnricher
+from app.config import settings
+from app.utils.asn_table import get_asn_table, lookup_asn
+
+
+class ASNEnricher(BaseEnricher):
+    name = "asn"
+    ioc_types = ("ip",)
+    supports_batch = True
+    ttl = settings.CACHE_TTL_ASN
+    max_concurrency = 32
+
+    @property
+    def is_available(self) -> bool:
+        return get_asn_table() is not None
+
+    async def enrich(self, value: str, ioc_type: str) -> Optional[Dict[str, Any]]:
+        if ioc_type != "ip":
+            return None
+        return lookup_asn(value) or {"asn": None, "as_org": None, "prefix": None}
+
+    async def enrich_batch(self, values, ioc_type):
+        # Local lookups: no point fanning out into tasks
+        return {v: await self.enrich(v, ioc_type) for v in values}
@@ -1,15 +1,46 @@
 """Abstract base class for enrichment modules."""
 
 import abc
-from typing import Dict, Any, Optional
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
 
 
 class BaseEnricher(abc.ABC):
-    """Abstract base enricher."""
+    """Abstract base enricher.
+
+    Subclasses are discovered by the enricher registry, which uses the class
+    attributes below to decide where an enricher applies and how hard it may
+    be driven.
+    """
 
     name: str = "unknown"
+    ioc_types: Tuple[str, ...] = ()      # IOC types this enricher applies to
+    supports_batch: bool = False          # enrich_batch is cheaper than N enrich calls
+    ttl: int = 3600                       # Seconds before a stored result expires
+    max_concurrency: int = 4              # Simultaneous lookups per event loop
+    rate_limit: Optional[Tuple[int, int]] = None  # (max_requests, window_seconds)
+
+    @property
+    def is_available(self) -> bool:
+        """Whether the enricher is configured (API key, local database) and usable."""
+        return True
+
+    def applies_to(self, ioc_type: str) -> bool:
+        return ioc_type in self.ioc_types
 
     @abc.abstractmethod
     async def enrich(self, value: str, ioc_type: str) -> Optional[Dict[str, Any]]:
         """Perform enrichment on an IOC value."""
         ...
+
+    async def enrich_batch(
+        self, values: List[str], ioc_type: str
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Enrich several values of one IOC type. Override when the source has a bulk API."""
+        results = await asyncio.gather(
+            *(self.enrich(v, ioc_type) for v in values), return_exceptions=True
+        )
+        return {
+            v: (None if isinstance(r, Exception) else r)
+            for v, r in zip(values, results)
+        }
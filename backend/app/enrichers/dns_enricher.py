@@ -1,15 +1,20 @@
 """DNS enrichment for domains."""
 
+import asyncio
 from typing import Dict, Any, Optional
 
 from app.enrichers.base import BaseEnricher
+from app.config import settings
 
 
 class DNSEnricher(BaseEnricher):
     name = "dns"
+    ioc_types = ("ip", "domain", "url")
+    ttl = settings.CACHE_TTL_DNS
+    max_concurrency = 16
 
     async def enrich(self, value: str, ioc_type: str) -> Optional[Dict[str, Any]]:
-        if ioc_type not in ("domain", "url"):
+        if ioc_type not in self.ioc_types:
             return None
 
         # Extract domain from URL if needed
@@ -20,20 +25,25 @@ class DNSEnricher(BaseEnricher):
             domain = parsed.hostname or value
 
         try:
-            import dns.resolver
-            records = {}
-            for rtype in ["A", "AAAA", "MX", "NS", "TXT"]:
-                try:
-                    answers = dns.resolver.resolve(domain, rtype)
-                    records[rtype] = [str(r) for r in answers]
-                except Exception:
-                    records[rtype] = []
-
-            return {
-                "records": records,
-                "has_ipv6": bool(records.get("AAAA")),
-                "nameservers": records.get("NS", []),
-                "fast_flux": len(records.get("A", [])) > 5,
-            }
+            return await asyncio.to_thread(self._resolve, domain)
         except Exception as e:
-            return {"error": str(e)}
+            return {"error": f"DNS lookup failed: {str(e)}"}
+
+    @staticmethod
+    def _resolve(domain: str) -> Dict[str, Any]:
+        import dns.resolver
+        records = {}
+        for rtype in ["A", "AAAA", "MX", "NS", "TXT"]:
+            try:
+                answers = dns.resolver.resolve(domain, rtype)
+                records[rtype] = [str(r) for r in answers]
+            except Exception:
+                records[rtype] = []
+
+        return {
+            "records": records,
+            "has_ipv6": bool(records.get("AAAA")),
+            "nameservers": records.get("NS", []),
+            "mail_servers": records.get("MX", []),
+            "fast_flux": len(records.get("A", [])) > 5,
+        }
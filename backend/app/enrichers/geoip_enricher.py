@@ -4,25 +4,55 @@ from typing import Dict, Any, Optional
 
 from app.enrichers.base import BaseEnricher
 from app.config import settings
+from app.utils.asn_table import lookup_asn
+
+_reader = None
+
+
+def _get_reader():
+    """Open the GeoLite2 database once and reuse the memory-mapped reader."""
+    global _reader
+    if _reader is None:
+        import geoip2.database
+        _reader = geoip2.database.Reader(settings.GEOIP_DB_PATH)
+    return _reader
 
 
 class GeoIPEnricher(BaseEnricher):
     name = "geoip"
+    ioc_types = ("ip",)
+    supports_batch = True
+    ttl = settings.CACHE_TTL_GEOIP
+    max_concurrency = 32
 
     async def enrich(self, value: str, ioc_type: str) -> Optional[Dict[str, Any]]:
         if ioc_type != "ip":
             return None
 
+        asn = lookup_asn(value) or {}
         try:
-            import geoip2.database
-            reader = geoip2.database.Reader(settings.GEOIP_DB_PATH)
-            response = reader.city(value)
+            response = _get_reader().city(value)
             return {
                 "country": response.country.name,
                 "country_code": response.country.iso_code,
                 "city": response.city.name,
                 "latitude": response.location.latitude,
                 "longitude": response.location.longitude,
+                "asn": asn.get("asn"),
+                "isp": asn.get("as_org"),
             }
         except Exception:
-            return {"country": "Unknown", "country_code": "XX", "error": "GeoIP DB not available"}
+            return {
+                "country": "Unknown",
+                "country_code": "XX",
+                "city": None,
+                "latitude": None,
+                "longitude": None,
+                "asn": asn.get("asn"),
+                "isp": asn.get("as_org"),
+                "error": "GeoIP database not available",
+            }
+
+    async def enrich_batch(self, values, ioc_type):
+        # Local lookups: no point fanning out into tasks
+        return {v: await self.enrich(v, ioc_type) for v in values}
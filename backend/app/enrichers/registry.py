@@ -0,0 +1,132 @@
+"""Enricher discovery and scheduling.
+
+Every ``BaseEnricher`` subclass in the ``app.enrichers`` package is picked up
+automatically. The registry runs lookups through a per-source semaphore and,
+for enrichers that declare a ``rate_limit``, the shared Redis rate limiter, so
+adding a source never oversubscribes its API quota or the event loop.
+"""
+
+import asyncio
+import importlib
+import inspect
+import pkgutil
+import weakref
+from typing import Dict, Any, List, Optional
+
+import structlog
+
+from app.enrichers.base import BaseEnricher
+from app.utils.rate_limiter import rate_limiter
+
+logger = structlog.get_logger()
+
+
+class EnricherRegistry:
+    """Registry of enrichment sources keyed by enricher name."""
+
+    def __init__(self):
+        self._enrichers: Dict[str, BaseEnricher] = {}
+        self._discovered = False
+        # Semaphores bind to the loop they are first used on
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def discover(self) -> None:
+        """Import every module in app.enrichers and register concrete enrichers."""
+        if self._discovered:
+            return
+        import app.enrichers as package
+
+        for module_info in pkgutil.iter_modules(package.__path__):
+            importlib.import_module(f"{package.__name__}.{module_info.name}")
+
+        for cls in _all_subclasses(BaseEnricher):
+            if inspect.isabstract(cls) or cls.name in self._enrichers:
+                continue
+            self.register(cls())
+        self._discovered = True
+
+    def register(self, enricher: BaseEnricher) -> None:
+        self._enrichers[enricher.name] = enricher
+        logger.debug("enricher_registered", source=enricher.name, ioc_types=enricher.ioc_types)
+
+    def get(self, name: str) -> Optional[BaseEnricher]:
+        self.discover()
+        return self._enrichers.get(name)
+
+    def names(self) -> List[str]:
+        self.discover()
+        return list(self._enrichers)
+
+    def applicable_sources(self, ioc_type: str) -> List[str]:
+        """Sources that apply to an IOC type and are configured for use."""
+        self.discover()
+        return [
+            name for name, enricher in self._enrichers.items()
+            if enricher.applies_to(ioc_type) and enricher.is_available
+        ]
+
+    def ttl(self, name: str) -> int:
+        enricher = self.get(name)
+        return enricher.ttl if enricher else 3600
+
+    async def run(self, name: str, value: str, ioc_type: str) -> Optional[Dict[str, Any]]:
+        """Run one enrichment lookup within the source's concurrency and rate budget."""
+        enricher = self.get(name)
+        if enricher is None or not enricher.applies_to(ioc_type):
+            return None
+
+        async with self._semaphore(enricher):
+            await self._acquire_rate_slot(enricher)
+            return await enricher.enrich(value, ioc_type)
+
+    async def run_batch(
+        self, name: str, values: List[str], ioc_type: str
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Enrich many values of one type, using the source's bulk path when it has one."""
+        enricher = self.get(name)
+        if enricher is None or not enricher.applies_to(ioc_type):
+            return {}
+
+        if enricher.supports_batch:
+            # A bulk call still costs the source one lookup per value, so a
+            # rate-limited source is charged per value, a window's worth at a time
+            size = enricher.rate_limit[0] if enricher.rate_limit else max(1, len(values))
+            results: Dict[str, Optional[Dict[str, Any]]] = {}
+            for start in range(0, len(values), size):
+                chunk = values[start:start + size]
+                async with self._semaphore(enricher):
+                    await self._acquire_rate_slot(enricher, len(chunk))
+                    results.update(await enricher.enrich_batch(chunk, ioc_type))
+            return results
+
+        results = await asyncio.gather(
+            *(self.run(name, v, ioc_type) for v in values), return_exceptions=True
+        )
+        return {
+            v: (None if isinstance(r, Exception) else r)
+            for v, r in zip(values, results)
+        }
+
+    def _semaphore(self, enricher: BaseEnricher) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        per_loop = self._semaphores.setdefault(loop, {})
+        if enricher.name not in per_loop:
+            per_loop[enricher.name] = asyncio.Semaphore(max(1, enricher.max_concurrency))
+        return per_loop[enricher.name]
+
+    async def _acquire_rate_slot(self, enricher: BaseEnricher, count: int = 1) -> None:
+        if enricher.rate_limit:
+            max_requests, window_seconds = enricher.rate_limit
+            for _ in range(count):
+                await rate_limiter.wait_for_slot(
+                    f"enricher:{enricher.name}", max_requests, window_seconds
+                )
+
+
+def _all_subclasses(cls):
+    for sub in cls.__subclasses__():
+        yield sub
+        yield from _all_subclasses(sub)
+
+
+enricher_registry = EnricherRegistry()
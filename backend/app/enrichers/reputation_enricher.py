@@ -3,10 +3,15 @@
 from typing import Dict, Any, Optional
 
 from app.enrichers.base import BaseEnricher
+from app.config import settings
 
 
 class ReputationEnricher(BaseEnricher):
     name = "reputation"
+    ioc_types = ("ip", "domain", "url", "hash", "email", "cve")
+    supports_batch = True
+    ttl = settings.CACHE_TTL_REPUTATION
+    max_concurrency = 8
 
     async def enrich(self, value: str, ioc_type: str) -> Optional[Dict[str, Any]]:
         return {
@@ -14,5 +19,5 @@ class ReputationEnricher(BaseEnricher):
             "sources_checked": 0,
             "sources_flagged": 0,
             "details": {},
-            "note": "Configure API keys for live reputation data",
+            "note": "Enable feed API keys for live reputation checks",
         }
@@ -1,5 +1,6 @@
 """Shodan enrichment for IPs."""
 
+import asyncio
 from typing import Dict, Any, Optional
 
 from app.enrichers.base import BaseEnricher
@@ -8,6 +9,14 @@ from app.config import settings
 
 class ShodanEnricher(BaseEnricher):
     name = "shodan"
+    ioc_types = ("ip",)
+    ttl = settings.CACHE_TTL_SHODAN
+    max_concurrency = 1
+    rate_limit = (1, 1)  # Shodan API allows one request per second
+
+    @property
+    def is_available(self) -> bool:
+        return bool(settings.SHODAN_API_KEY)
 
     async def enrich(self, value: str, ioc_type: str) -> Optional[Dict[str, Any]]:
         if ioc_type != "ip":
@@ -18,7 +27,7 @@ class ShodanEnricher(BaseEnricher):
         try:
             import shodan
             api = shodan.Shodan(settings.SHODAN_API_KEY)
-            host = api.host(value)
+            host = await asyncio.to_thread(api.host, value)
             return {
                 "ip": host.get("ip_str"),
                 "org": host.get("org"),
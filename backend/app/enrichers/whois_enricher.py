@@ -1,28 +1,41 @@
 """WHOIS enrichment for domains and IPs."""
 
+import asyncio
 from typing import Dict, Any, Optional
 
 from app.enrichers.base import BaseEnricher
+from app.config import settings
 
 
 class WhoisEnricher(BaseEnricher):
     name = "whois"
+    ioc_types = ("ip", "domain", "url", "email")
+    ttl = settings.CACHE_TTL_WHOIS
+    max_concurrency = 4
+    rate_limit = (30, 60)  # Registries throttle aggressive clients
 
     async def enrich(self, value: str, ioc_type: str) -> Optional[Dict[str, Any]]:
-        if ioc_type not in ("domain", "ip"):
+        if ioc_type not in self.ioc_types:
             return None
 
+        target = value
+        if ioc_type == "url":
+            from urllib.parse import urlparse
+            target = urlparse(value).hostname or value
+        elif ioc_type == "email":
+            target = value.rsplit("@", 1)[-1]
+
         try:
             import whois
-            w = whois.whois(value)
+            w = await asyncio.to_thread(whois.whois, target)
             return {
                 "registrar": w.registrar,
                 "creation_date": str(w.creation_date) if w.creation_date else None,
                 "expiration_date": str(w.expiration_date) if w.expiration_date else None,
                 "name_servers": list(w.name_servers) if w.name_servers else [],
-                "registrant_org": w.org,
+                "registrant": w.org,
                 "country": w.country,
-                "privacy_protected": "privacy" in str(w.org or "").lower(),
+                "privacy_protected": "privacy" in str(w.org or "").lower() or "redacted" in str(w.org or "").lower(),
             }
         except Exception as e:
-            return {"error": str(e)}
+            return {"error": f"WHOIS lookup failed: {str(e)}"}
@@ -9,6 +9,10 @@ import structlog
 
 from app.config import settings
 from app.api import api_router
+from app.database import async_engine, AsyncSessionLocal
+from app.services.scoring_profiles import ensure_active_profile
+from app.services.scoring_sql import install_scoring_functions
+from app.utils.response_cache import ResponseCacheMiddleware
 
 logger = structlog.get_logger()
 
@@ -20,6 +24,14 @@ async def lifespan(app: FastAPI):
         "sentinel_starting",
         environment=settings.ENVIRONMENT,
     )
+    # Keep the SQL scoring functions in step with the deployed scoring constants
+    try:
+        async with AsyncSessionLocal() as db:
+            profile = await ensure_active_profile(db, force=True)
+        async with async_engine.begin() as conn:
+            await conn.run_sync(install_scoring_functions, profile)
+    except Exception as e:
+        logger.warning("scoring_functions_install_failed", error=str(e))
     yield
     logger.info("sentinel_shutting_down")
 
@@ -36,6 +48,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Response cache (added first so CORS wraps cached responses too)
+app.add_middleware(ResponseCacheMiddleware)
+
 # CORS middleware
 cors_origins = (
     ["*"] if settings.CORS_ORIGINS == "*"
@@ -8,6 +8,10 @@ from app.models.ioc_relationship import IOCRelationship
 from app.models.attack_technique import AttackTechnique
 from app.models.report import Report
 from app.models.user import User
+from app.models.scoring_profile import ScoringProfile
+from app.models.dns_resolution import DNSResolution
+from app.models.ioc_cluster import IOCCluster
+from app.models.ioc_signature import IOCSignature
 
 __all__ = [
     "IOC",
@@ -18,4 +22,8 @@ __all__ = [
     "AttackTechnique",
     "Report",
     "User",
+    "ScoringProfile",
+    "DNSResolution",
+    "IOCCluster",
+    "IOCSignature",
 ]
@@ -0,0 +1,34 @@
+"""Reverse index of DNS resolutions (resolved IP -> domain/URL IOC)."""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class DNSResolution(Base):
+    """One A/AAAA answer from an IOC's ``dns`` enrichment.
+
+    Rows are replaced whenever the IOC's DNS enrichment is stored, so the
+    table always mirrors the latest resolution while indexing it by IP.
+    """
+
+    __tablename__ = "dns_resolutions"
+
+    ioc_id = Column(
+        UUID(as_uuid=True), ForeignKey("iocs.id", ondelete="CASCADE"), primary_key=True
+    )
+    ip = Column(String(45), primary_key=True)   # Normalized textual address
+    record_type = Column(String(4), nullable=False)  # A, AAAA
+    first_seen = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    last_seen = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index("idx_dns_resolutions_ip", ip),
+        Index("idx_dns_resolutions_last_seen", last_seen),
+    )
+
+    def __repr__(self):
+        return f"<DNSResolution({self.ioc_id} -> {self.ip})>"
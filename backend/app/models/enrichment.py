@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 
@@ -19,12 +19,14 @@ class Enrichment(Base):
     data = Column(JSONB, nullable=False)
     enriched_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     expires_at = Column(DateTime(timezone=True))
+    refresh_failed_at = Column(DateTime(timezone=True))  # Last refresh that returned nothing
 
     # Relationships
     ioc = relationship("IOC", back_populates="enrichments")
 
     __table_args__ = (
         UniqueConstraint("ioc_id", "source", name="uq_enrichment_ioc_source"),
+        Index("idx_enrichments_expires_at", expires_at),
     )
 
     def __repr__(self):
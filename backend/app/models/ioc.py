@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime, timezone
 
 from sqlalchemy import (
-    Column, String, Integer, Text, DateTime, Index,
+    Column, String, Integer, Float, Text, DateTime, Index,
     UniqueConstraint
 )
 from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSONB
@@ -19,14 +19,28 @@ class IOC(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     type = Column(String(20), nullable=False, index=True)  # ip, domain, hash, url, email, cve
     value = Column(Text, nullable=False)
-    threat_score = Column(Integer, default=0)  # 0-100
+    threat_score = Column(Integer, default=0, nullable=False)  # 0-100
     confidence = Column(Integer, default=0)     # 0-100
     first_seen = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
-    last_seen = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    last_seen = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     sighting_count = Column(Integer, default=1)
     tags = Column(ARRAY(Text), default=list)
     metadata_ = Column("metadata", JSONB, default=dict)
     mitre_techniques = Column(ARRAY(Text), default=list)
+    asn = Column(Integer)                    # IP IOCs only, from the local ASN table
+    network_prefix = Column(String(43))      # Announced prefix containing the IP
+    next_rescore_at = Column(DateTime(timezone=True))  # When the recency bucket next changes
+    # Cached component scores (0-100) behind threat_score; NULL when the score came from a feed
+    score_reputation = Column(Float)
+    score_diversity = Column(Float)
+    score_recency = Column(Float)
+    score_frequency = Column(Float)
+    score_enrichment = Column(Float)
+    score_context = Column(Float)
+    score_profile = Column(String(100))      # Scoring profile (name, version) behind the components
+    score_profile_version = Column(Integer)
+    scored_at = Column(DateTime(timezone=True))  # When scores were last written
+    cluster_id = Column(UUID(as_uuid=True))  # IOCCluster this IOC was grouped into, if any
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(
         DateTime(timezone=True),
@@ -52,10 +66,31 @@ class IOC(Base):
 
     __table_args__ = (
         UniqueConstraint("type", "value", name="uq_ioc_type_value"),
-        Index("idx_iocs_threat_score", threat_score.desc()),
-        Index("idx_iocs_last_seen", last_seen.desc()),
+        # (sort column, id) pairs back keyset pagination of listings
+        Index("idx_iocs_threat_score_id", threat_score.desc(), id.desc()),
+        Index("idx_iocs_last_seen_id", last_seen.desc(), id.desc()),
         Index("idx_iocs_tags", tags, postgresql_using="gin"),
+        # Substring/fuzzy search (pg_trgm) and prefix search on IOC values
+        Index(
+            "idx_iocs_value_trgm", value,
+            postgresql_using="gin", postgresql_ops={"value": "gin_trgm_ops"},
+        ),
+        Index("idx_iocs_value_prefix", value, postgresql_ops={"value": "text_pattern_ops"}),
         Index("idx_iocs_metadata", "metadata", postgresql_using="gin"),
+        Index("idx_iocs_asn", asn),
+        Index("idx_iocs_network_prefix", network_prefix),
+        Index("idx_iocs_cluster_id", cluster_id, postgresql_where=cluster_id.isnot(None)),
+        Index(
+            "idx_iocs_next_rescore_at", next_rescore_at,
+            postgresql_where=next_rescore_at.isnot(None),
+        ),
+        # Component filters ("recency >= 85 and diversity >= 80") combine these with bitmap ANDs
+        Index("idx_iocs_score_reputation", score_reputation),
+        Index("idx_iocs_score_diversity", score_diversity),
+        Index("idx_iocs_score_recency", score_recency),
+        Index("idx_iocs_score_frequency", score_frequency),
+        Index("idx_iocs_score_enrichment", score_enrichment),
+        Index("idx_iocs_score_context", score_context),
     )
 
     def __repr__(self):
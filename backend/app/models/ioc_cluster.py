@@ -0,0 +1,39 @@
+"""IOC cluster (infrastructure/campaign grouping) database model."""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, Float, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+from app.database import Base
+
+
+class IOCCluster(Base):
+    """Summary of one cluster; members carry its id in ``iocs.cluster_id``.
+
+    The id is the smallest member IOC id, so a cluster keeps its id as long
+    as that member stays in it.
+    """
+
+    __tablename__ = "ioc_clusters"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    size = Column(Integer, nullable=False)
+    avg_score = Column(Float)
+    max_score = Column(Integer)
+    ioc_types = Column(JSONB, default=dict)   # type -> member count
+    first_seen = Column(DateTime(timezone=True))
+    last_seen = Column(DateTime(timezone=True))
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    __table_args__ = (
+        Index("idx_ioc_clusters_size", size.desc()),
+        Index("idx_ioc_clusters_max_score", max_score.desc()),
+    )
+
+    def __repr__(self):
+        return f"<IOCCluster({self.id}, size={self.size})>"
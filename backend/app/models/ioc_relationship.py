@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -20,7 +20,7 @@ class IOCRelationship(Base):
     target_ioc_id = Column(
         UUID(as_uuid=True), ForeignKey("iocs.id", ondelete="CASCADE"), nullable=False
     )
-    relationship_type = Column(String(50))  # resolves_to, contains, communicates_with, drops, hosts
+    relationship_type = Column(String(50))  # resolves_to, hosts, hosted_on, contains, communicates_with, drops, ...
     confidence = Column(Integer, default=50)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
@@ -33,6 +33,8 @@ class IOCRelationship(Base):
             "source_ioc_id", "target_ioc_id", "relationship_type",
             name="uq_ioc_relationship",
         ),
+        # Outgoing lookups use the unique constraint; this serves incoming ones
+        Index("idx_ioc_relationships_target", target_ioc_id),
     )
 
     def __repr__(self):
@@ -0,0 +1,28 @@
+"""MinHash signature of an IOC's tag/technique/family set, for similarity search."""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+
+from app.database import Base
+
+
+class IOCSignature(Base):
+    __tablename__ = "ioc_signatures"
+
+    ioc_id = Column(
+        UUID(as_uuid=True), ForeignKey("iocs.id", ondelete="CASCADE"), primary_key=True
+    )
+    minhash = Column(ARRAY(Integer), nullable=False)   # 32-bit MinHash values
+    bands = Column(ARRAY(BigInteger), nullable=False)  # One LSH key per band
+    feature_count = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False)           # similarity.SIGNATURE_VERSION
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index("idx_ioc_signatures_bands", bands, postgresql_using="gin"),
+    )
+
+    def __repr__(self):
+        return f"<IOCSignature({self.ioc_id}, features={self.feature_count})>"
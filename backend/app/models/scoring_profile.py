@@ -0,0 +1,41 @@
+"""Scoring profile database model."""
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, Text, Boolean, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, JSONB
+
+from app.database import Base
+
+
+class ScoringProfile(Base):
+    __tablename__ = "scoring_profiles"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String(100), unique=True, nullable=False)
+    description = Column(Text)
+    weights = Column(JSONB, default=dict)        # component -> weight; missing components keep defaults
+    high_risk_tags = Column(ARRAY(Text))         # NULL = built-in set
+    medium_risk_tags = Column(ARRAY(Text))
+    high_risk_countries = Column(ARRAY(Text))
+    total_feeds = Column(Integer, default=10)
+    is_active = Column(Boolean, default=False, nullable=False)
+    version = Column(Integer, default=1, nullable=False)  # Bumped on every edit
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    __table_args__ = (
+        # At most one active profile
+        Index(
+            "uq_scoring_profiles_active", is_active,
+            unique=True, postgresql_where=is_active.is_(True),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<ScoringProfile(name={self.name}, active={self.is_active})>"
@@ -0,0 +1,28 @@
+"""Pydantic schemas for IOC clusters."""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+
+class ClusterResponse(BaseModel):
+    id: UUID
+    size: int
+    avg_score: Optional[float] = None
+    max_score: Optional[int] = None
+    ioc_types: Dict[str, int] = Field(default_factory=dict)
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class PaginatedClusterResponse(BaseModel):
+    items: List[ClusterResponse]
+    total: int
+    page: int
+    page_size: int
+    pages: int
@@ -1,9 +1,9 @@
 """Pydantic schemas for Enrichment operations."""
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 
 
 class EnrichmentResponse(BaseModel):
@@ -14,9 +14,15 @@ class EnrichmentResponse(BaseModel):
     enriched_at: datetime
     expires_at: Optional[datetime]
 
+    @computed_field
+    @property
+    def stale(self) -> bool:
+        return bool(self.expires_at and self.expires_at <= datetime.now(timezone.utc))
+
     class Config:
         from_attributes = True
 
 
 class EnrichmentRequest(BaseModel):
     sources: list[str] = ["whois", "dns", "geoip", "reputation"]
+    allow_stale: bool = True
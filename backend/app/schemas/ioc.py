@@ -1,7 +1,7 @@
 """Pydantic schemas for IOC operations."""
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import UUID
 from pydantic import AliasChoices, BaseModel, Field
 
@@ -37,6 +37,9 @@ class IOCResponse(IOCBase):
     first_seen: Optional[datetime]
     last_seen: Optional[datetime]
     sighting_count: int
+    asn: Optional[int] = None
+    network_prefix: Optional[str] = None
+    cluster_id: Optional[UUID] = None
     created_at: datetime
     updated_at: datetime
 
@@ -53,18 +56,24 @@ class IOCDetailResponse(IOCResponse):
 
 class IOCSearchRequest(BaseModel):
     query: Optional[str] = None
+    fuzzy: bool = Field(default=False, description="Also match values with a word similar to query")
     ioc_type: Optional[str] = None
     min_score: Optional[int] = Field(default=None, ge=0, le=100)
     max_score: Optional[int] = Field(default=None, ge=0, le=100)
     tags: Optional[List[str]] = None
     feed_source: Optional[str] = None
     mitre_technique: Optional[str] = None
+    min_components: Optional[Dict[str, float]] = Field(
+        default=None, description='Minimum component scores, e.g. {"recency": 85, "diversity": 80}'
+    )
     date_from: Optional[datetime] = None
     date_to: Optional[datetime] = None
     page: int = Field(default=1, ge=1)
     page_size: int = Field(default=50, ge=1, le=500)
-    sort_by: str = Field(default="last_seen")
+    sort_by: str = Field(default="last_seen", description="IOC column, or relevance to rank by similarity to query")
     sort_order: str = Field(default="desc")
+    cursor: Optional[str] = Field(default=None, description="next_cursor of the previous page; overrides page")
+    include_metadata: bool = Field(default=True, description="Include each IOC's metadata object")
 
 
 class IOCBulkRequest(BaseModel):
@@ -72,7 +81,7 @@ class IOCBulkRequest(BaseModel):
 
 
 class IOCExportRequest(BaseModel):
-    format: str = Field(default="json", description="Export format: json, csv, stix")
+    format: str = Field(default="json", description="Export format: json, ndjson, csv, stix")
     ioc_ids: Optional[List[UUID]] = None
     filters: Optional[IOCSearchRequest] = None
 
@@ -87,3 +96,5 @@ class PaginatedIOCResponse(BaseModel):
     page: int
     page_size: int
     pages: int
+    total_is_exact: bool = True
+    next_cursor: Optional[str] = None
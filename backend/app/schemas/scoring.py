@@ -0,0 +1,44 @@
+"""Pydantic schemas for scoring profiles."""
+
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel, Field
+
+
+class ScoringProfileBase(BaseModel):
+    description: Optional[str] = None
+    weights: dict[str, float] = Field(
+        default_factory=dict,
+        description="Component weights (reputation, diversity, recency, frequency, enrichment, context)",
+    )
+    high_risk_tags: Optional[list[str]] = None
+    medium_risk_tags: Optional[list[str]] = None
+    high_risk_countries: Optional[list[str]] = None
+    total_feeds: int = Field(default=10, ge=0)
+
+
+class ScoringProfileCreate(ScoringProfileBase):
+    name: str = Field(..., min_length=1, max_length=100)
+
+
+class ScoringProfileUpdate(BaseModel):
+    description: Optional[str] = None
+    weights: Optional[dict[str, float]] = None
+    high_risk_tags: Optional[list[str]] = None
+    medium_risk_tags: Optional[list[str]] = None
+    high_risk_countries: Optional[list[str]] = None
+    total_feeds: Optional[int] = Field(default=None, ge=0)
+
+
+class ScoringProfileResponse(ScoringProfileBase):
+    id: UUID
+    name: str
+    weights: dict[str, float]
+    is_active: bool
+    version: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,215 @@
+"""Offline correlation over the whole corpus with in-memory inverted indexes.
+
+Instead of one GIN ``overlap`` query per IOC, the job streams the IOC table
+once and builds posting lists (tag -> IOCs, technique -> IOCs, IPv4 /24 ->
+IOCs). Every pair sharing a posting list becomes a candidate edge, with
+confidence growing with the number of shared keys. Posting lists longer
+than CORRELATION_MAX_POSTING are skipped: a key shared by thousands of
+IOCs says little about any pair of them, and the pairs grow quadratically.
+
+In delta mode only pairs with at least one IOC updated since the cutoff are
+emitted, while posting lists still cover the full corpus.
+
+Domain -> IP ``resolves_to`` edges come from the dns_resolutions reverse
+index in a single INSERT ... SELECT, and URLs get a ``hosted_on`` edge to
+the domain or IP IOC named in their hostname.
+"""
+
+import ipaddress
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.ioc import IOC
+from app.services.dns_index import normalize_ip, url_host
+from app.services.relationship_writer import write_relationships_sync
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Tags too generic to link two indicators (same list as per-IOC correlation)
+GENERIC_TAGS = frozenset({"malware", "suspicious", "unknown"})
+
+# Observed DNS answers and URL hostnames, not shared-label guesses
+RESOLUTION_CONFIDENCE = 90
+URL_HOST_CONFIDENCE = 95
+
+# relationship type -> (confidence for one shared key, per extra key, cap)
+EDGE_CONFIDENCE = {
+    "associated_with": (40, 10, 80),
+    "shares_technique": (50, 10, 85),
+    "same_network": (30, 0, 30),
+    "hosted_on": (URL_HOST_CONFIDENCE, 0, URL_HOST_CONFIDENCE),
+}
+
+INSERT_BATCH_SIZE = 5000
+_STREAM_BATCH_SIZE = 10000
+
+
+def correlate_corpus_sync(
+    session: Session,
+    since: Optional[datetime] = None,
+    max_posting: Optional[int] = None,
+) -> Dict[str, int]:
+    """Build inverted indexes over all IOCs and upsert the resulting edges.
+
+    With ``since`` only pairs touching an IOC updated after it are generated.
+    IOCs are streamed in id order, so each undirected pair is stored once
+    with the smaller id as source; hosted_on edges always run URL -> host.
+    """
+    max_posting = max_posting or settings.CORRELATION_MAX_POSTING
+
+    ids: List = []
+    delta: set = set()
+    hosts: Dict[Tuple[str, str], int] = {}   # (type, value) of domain/IP IOCs -> index
+    url_hosts: List[Tuple[int, str]] = []
+    postings: Dict[str, Dict[str, List[int]]] = {
+        "associated_with": defaultdict(list),
+        "shares_technique": defaultdict(list),
+        "same_network": defaultdict(list),
+    }
+
+    rows = session.execute(
+        select(IOC.id, IOC.type, IOC.value, IOC.tags, IOC.mitre_techniques, IOC.updated_at)
+        .order_by(IOC.id)
+        .execution_options(yield_per=_STREAM_BATCH_SIZE)
+    )
+    for ioc_id, ioc_type, value, tags, techniques, updated_at in rows:
+        index = len(ids)
+        ids.append(ioc_id)
+        if since is not None and updated_at is not None and updated_at >= since:
+            delta.add(index)
+
+        for tag in {t.lower() for t in tags or []} - GENERIC_TAGS:
+            postings["associated_with"][tag].append(index)
+        for technique in set(techniques or []):
+            postings["shares_technique"][technique].append(index)
+        if ioc_type == "ip":
+            hosts[("ip", value)] = index
+            network = ipv4_slash24(value)
+            if network:
+                postings["same_network"][network].append(index)
+        elif ioc_type == "domain":
+            hosts[("domain", value)] = index
+        elif ioc_type == "url":
+            host = url_host(value)
+            if host:
+                url_hosts.append((index, host))
+
+    resolutions = insert_resolution_edges_sync(session, since=since)
+    session.commit()
+
+    if since is not None and not delta:
+        logger.info("batch_correlation_no_delta", since=since.isoformat(), resolutions=resolutions)
+        return {
+            "iocs": len(ids), "delta": 0, "edges": 0, "inserted": 0, "updated": 0,
+            "skipped_postings": 0, "resolutions": resolutions,
+        }
+
+    # (relationship type, source index, target index) -> number of shared keys
+    edges: Dict[Tuple[str, int, int], int] = {}
+    skipped = 0
+    for relationship_type, index in postings.items():
+        for members in index.values():
+            if len(members) < 2:
+                continue
+            if len(members) > max_posting:
+                skipped += 1
+                continue
+            for a, b in _pairs(members, delta if since is not None else None):
+                key = (relationship_type, a, b)
+                edges[key] = edges.get(key, 0) + 1
+
+    for url_index, host in url_hosts:
+        ip = normalize_ip(host)
+        host_index = hosts.get(("ip", ip) if ip else ("domain", host))
+        if host_index is None or host_index == url_index:
+            continue
+        if since is not None and url_index not in delta and host_index not in delta:
+            continue
+        edges[("hosted_on", url_index, host_index)] = 1
+
+    written = _insert_edges(session, ids, edges)
+    stats = {
+        "iocs": len(ids),
+        "delta": len(delta),
+        "edges": len(edges),
+        "inserted": written["inserted"],
+        "updated": written["updated"],
+        "skipped_postings": skipped,
+        "resolutions": resolutions,
+    }
+    logger.info("batch_correlation_complete", **stats)
+    return stats
+
+
+_SQL_RESOLUTION_EDGES = """
+    INSERT INTO ioc_relationships (id, source_ioc_id, target_ioc_id, relationship_type, confidence, created_at)
+    SELECT gen_random_uuid(), r.ioc_id, i.id, 'resolves_to', :confidence, now()
+    FROM dns_resolutions r
+    JOIN iocs i ON i.type = 'ip' AND i.value = r.ip
+    {where}
+    ON CONFLICT ON CONSTRAINT uq_ioc_relationship DO UPDATE
+        SET confidence = GREATEST(ioc_relationships.confidence, EXCLUDED.confidence)
+        WHERE COALESCE(ioc_relationships.confidence, -1) < EXCLUDED.confidence
+"""
+
+
+def insert_resolution_edges_sync(session: Session, since: Optional[datetime] = None) -> int:
+    """Add resolves_to edges for every indexed resolution to a known IP IOC."""
+    params = {"confidence": RESOLUTION_CONFIDENCE}
+    where = ""
+    if since is not None:
+        where = "WHERE r.last_seen >= :since OR i.updated_at >= :since"
+        params["since"] = since
+    result = session.execute(text(_SQL_RESOLUTION_EDGES.format(where=where)), params)
+    return result.rowcount or 0
+
+
+def _pairs(members: List[int], delta: Optional[set]) -> Iterable[Tuple[int, int]]:
+    """Unordered member pairs (a < b), restricted to pairs touching the delta if given."""
+    members = sorted(set(members))
+    if delta is None:
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                yield a, b
+        return
+
+    changed = [m for m in members if m in delta]
+    for a in changed:
+        for b in members:
+            # Pairs of two changed IOCs are emitted once, from the smaller index
+            if a == b or (b in delta and b < a):
+                continue
+            yield (a, b) if a < b else (b, a)
+
+
+def _insert_edges(session: Session, ids: List, edges: Dict[Tuple[str, int, int], int]) -> Dict[str, int]:
+    """Upsert edges in committed batches, keeping the higher confidence on conflict."""
+    def rows():
+        for (relationship_type, a, b), shared in edges.items():
+            base, step, cap = EDGE_CONFIDENCE[relationship_type]
+            yield {
+                "source_ioc_id": ids[a],
+                "target_ioc_id": ids[b],
+                "relationship_type": relationship_type,
+                "confidence": min(cap, base + step * (shared - 1)),
+            }
+
+    return write_relationships_sync(session, rows(), batch_size=INSERT_BATCH_SIZE, commit=True)
+
+
+def ipv4_slash24(value: str) -> Optional[str]:
+    """The /24 network containing an IPv4 address, or None for anything else."""
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return None
+    if address.version != 4:
+        return None
+    return str(ipaddress.ip_network(f"{address}/24", strict=False))
@@ -0,0 +1,55 @@
+"""Set-based lookup of many raw IOC values at once.
+
+Each input is type-detected and normalized the way IOCs are stored, so
+``EVIL.com`` finds the domain ``evil.com``. A batch of inputs is resolved
+with one join against ``unnest(types, values)``; inputs whose type cannot be
+detected are matched on the raw value across all types.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import String, Text, and_, cast, func, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ioc import IOC
+from app.utils.ioc_validator import detect_ioc_type, normalize_ioc
+
+
+def lookup_key(raw: str) -> Optional[Dict]:
+    """{"input", "type", "value"} with the detected type and normalized value; None if blank."""
+    value = raw.strip()
+    if not value:
+        return None
+    ioc_type = detect_ioc_type(value)
+    if ioc_type is not None:
+        value = normalize_ioc(value, ioc_type)
+    return {"input": raw, "type": ioc_type, "value": value}
+
+
+async def lookup_iocs(
+    session: AsyncSession, keys: Iterable[Dict],
+) -> Dict[Tuple[Optional[str], str], List[IOC]]:
+    """IOCs matching each distinct (type, value) key, in one query."""
+    distinct = list({(k["type"], k["value"]) for k in keys})
+    if not distinct:
+        return {}
+
+    wanted = func.unnest(
+        cast([t for t, _ in distinct], ARRAY(String)),
+        cast([v for _, v in distinct], ARRAY(Text)),
+    ).table_valued("type", "value").render_derived(name="wanted")
+    result = await session.execute(
+        select(IOC, wanted.c.type).join(
+            wanted,
+            and_(
+                IOC.value == wanted.c.value,
+                or_(wanted.c.type.is_(None), IOC.type == wanted.c.type),
+            ),
+        )
+    )
+
+    matches: Dict[Tuple[Optional[str], str], List[IOC]] = {}
+    for ioc, wanted_type in result:
+        matches.setdefault((wanted_type, ioc.value), []).append(ioc)
+    return matches
@@ -0,0 +1,414 @@
+"""Infrastructure clustering: group IOCs that form one campaign.
+
+The full job builds a graph over IOCs from ``ioc_relationships`` and from
+shared enrichment attributes (ASN, /24 network, nameservers, registrar).
+Each attribute value becomes a virtual node linked to the IOCs that carry
+it, so a value shared by N IOCs costs N edges rather than N^2.
+
+1. Connected components are found with union-find on strong evidence:
+   relationships at or above CLUSTER_MIN_CONFIDENCE, shared /24s and shared
+   nameservers. ASNs, registrars and weak relationships are too common to
+   merge infrastructure on their own.
+2. Components larger than CLUSTER_SPLIT_SIZE are split by weighted label
+   propagation over all edges. Weak evidence only counts inside a component,
+   so this pass refines components but never joins them.
+
+Every community with at least two IOCs is a cluster. Its id is the smallest
+member IOC id, and members carry it in ``iocs.cluster_id``. Between full runs,
+new relationship edges merge clusters incrementally (union only).
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.enrichment import Enrichment
+from app.models.ioc import IOC
+from app.models.ioc_relationship import IOCRelationship
+from app.services.batch_correlation import ipv4_slash24
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Edge weight between an IOC and a shared attribute value
+ATTRIBUTE_WEIGHTS = {"net": 0.5, "ns": 0.6, "asn": 0.3, "registrar": 0.2}
+STRONG_ATTRIBUTES = frozenset({"net", "ns"})
+
+LPA_ROUNDS = 15
+_LPA_SEED = 0
+_STREAM_BATCH_SIZE = 10000
+_WRITE_BATCH_SIZE = 5000
+
+_WRITE_CLUSTER_IDS = """
+    UPDATE iocs SET cluster_id = v.cluster_id
+    FROM unnest(CAST(:ids AS uuid[]), CAST(:cluster_ids AS uuid[])) AS v(id, cluster_id)
+    WHERE iocs.id = v.id
+"""
+
+_REFRESH_STATS = """
+    INSERT INTO ioc_clusters (id, size, avg_score, max_score, ioc_types, first_seen, last_seen, updated_at)
+    SELECT m.cluster_id, count(*), avg(m.threat_score), max(m.threat_score),
+           (SELECT jsonb_object_agg(t.type, t.n) FROM (
+                SELECT type, count(*) AS n FROM iocs
+                WHERE cluster_id = m.cluster_id GROUP BY type
+            ) t),
+           min(m.first_seen), max(m.last_seen), now()
+    FROM iocs m
+    WHERE m.cluster_id IS NOT NULL {filter}
+    GROUP BY m.cluster_id
+    ON CONFLICT (id) DO UPDATE SET
+        size = EXCLUDED.size, avg_score = EXCLUDED.avg_score, max_score = EXCLUDED.max_score,
+        ioc_types = EXCLUDED.ioc_types, first_seen = EXCLUDED.first_seen,
+        last_seen = EXCLUDED.last_seen, updated_at = EXCLUDED.updated_at
+"""
+
+_DELETE_EMPTY = """
+    DELETE FROM ioc_clusters c
+    WHERE NOT EXISTS (SELECT 1 FROM iocs i WHERE i.cluster_id = c.id) {filter}
+"""
+
+
+def connected_components(n: int, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Union-find over edge arrays: returns each node's root (smallest node in its set).
+
+    Unions are applied a whole edge list at a time (hook the larger root
+    under the smaller one), followed by pointer jumping for path compression.
+    """
+    parent = np.arange(n, dtype=np.int64)
+    if not len(u):
+        return parent
+    while True:
+        pu, pv = parent[u], parent[v]
+        differs = pu != pv
+        if not differs.any():
+            return parent
+        lo = np.minimum(pu[differs], pv[differs])
+        hi = np.maximum(pu[differs], pv[differs])
+        np.minimum.at(parent, hi, lo)
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+
+def propagate_labels(
+    labels: np.ndarray,
+    u: np.ndarray,
+    v: np.ndarray,
+    w: np.ndarray,
+    rounds: int = LPA_ROUNDS,
+) -> np.ndarray:
+    """Weighted label propagation: each node takes the label with most edge weight.
+
+    ``u``/``v`` must list every edge in both directions. Only a random half
+    of the nodes update per round, which stops two-colourable structures
+    from swapping labels forever; ties go to the smaller label.
+    """
+    labels = labels.copy()
+    if not len(u):
+        return labels
+    rng = np.random.default_rng(_LPA_SEED)
+    tolerance = max(1, len(labels) // 1000)
+
+    for _ in range(rounds):
+        neighbor_labels = labels[v]
+        order = np.lexsort((neighbor_labels, u))
+        nodes, votes, weights = u[order], neighbor_labels[order], w[order]
+        starts = np.flatnonzero(
+            np.r_[True, (nodes[1:] != nodes[:-1]) | (votes[1:] != votes[:-1])]
+        )
+        nodes, votes, totals = nodes[starts], votes[starts], np.add.reduceat(weights, starts)
+
+        order = np.lexsort((votes, -totals, nodes))
+        nodes, votes = nodes[order], votes[order]
+        first = np.r_[True, nodes[1:] != nodes[:-1]]
+        nodes, best = nodes[first], votes[first]
+
+        changes = labels[nodes] != best
+        if int(changes.sum()) < tolerance:
+            labels[nodes] = best
+            break
+        update = changes & (rng.random(len(nodes)) < 0.5)
+        labels[nodes[update]] = best[update]
+    return labels
+
+
+def cluster_corpus_sync(session: Session, max_group: Optional[int] = None) -> Dict[str, int]:
+    """Recompute every IOC's cluster and the cluster summaries."""
+    max_group = max_group or settings.CLUSTER_MAX_ATTRIBUTE_GROUP
+
+    ids: List = []
+    current: List = []
+    node_index: Dict = {}
+    attributes: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+
+    rows = session.execute(
+        select(IOC.id, IOC.type, IOC.value, IOC.asn, IOC.cluster_id)
+        .order_by(IOC.id)
+        .execution_options(yield_per=_STREAM_BATCH_SIZE)
+    )
+    for ioc_id, ioc_type, value, asn, cluster_id in rows:
+        index = node_index[ioc_id] = len(ids)
+        ids.append(ioc_id)
+        current.append(cluster_id)
+        if ioc_type == "ip":
+            if asn:
+                attributes[("asn", str(asn))].append(index)
+            network = ipv4_slash24(value)
+            if network:
+                attributes[("net", network)].append(index)
+
+    for ioc_id, source, data in session.execute(
+        select(Enrichment.ioc_id, Enrichment.source, Enrichment.data)
+        .where(Enrichment.source.in_(("dns", "whois")))
+        .execution_options(yield_per=_STREAM_BATCH_SIZE)
+    ):
+        index = node_index.get(ioc_id)
+        if index is not None and isinstance(data, dict):
+            for key in _enrichment_attributes(source, data):
+                attributes[key].append(index)
+
+    rel_u, rel_v, rel_w = [], [], []
+    for source_id, target_id, confidence in session.execute(
+        select(
+            IOCRelationship.source_ioc_id, IOCRelationship.target_ioc_id, IOCRelationship.confidence,
+        ).execution_options(yield_per=_STREAM_BATCH_SIZE)
+    ):
+        a, b = node_index.get(source_id), node_index.get(target_id)
+        if a is not None and b is not None and a != b:
+            rel_u.append(a)
+            rel_v.append(b)
+            rel_w.append((confidence if confidence is not None else 50) / 100.0)
+
+    n = len(ids)
+    if n == 0:
+        return {"iocs": 0, "components": 0, "clusters": 0, "updated": 0}
+
+    rel_u = np.array(rel_u, dtype=np.int64)
+    rel_v = np.array(rel_v, dtype=np.int64)
+    rel_w = np.array(rel_w, dtype=np.float64)
+    strong_rel = rel_w * 100 >= settings.CLUSTER_MIN_CONFIDENCE
+
+    # Strong attribute values become virtual nodes n, n+1, ...
+    groups = [
+        (kind, sorted(set(members)))
+        for (kind, _), members in attributes.items()
+        if 2 <= len(set(members)) <= max_group
+    ]
+    skipped = sum(1 for members in attributes.values() if len(set(members)) > max_group)
+    strong_groups = [(kind, m) for kind, m in groups if kind in STRONG_ATTRIBUTES]
+    weak_groups = [(kind, m) for kind, m in groups if kind not in STRONG_ATTRIBUTES]
+
+    su, sv, sw = _attribute_edges(strong_groups, n)
+    total = n + len(strong_groups)
+    strong_u = np.concatenate([rel_u[strong_rel], su])
+    strong_v = np.concatenate([rel_v[strong_rel], sv])
+    component = connected_components(total, strong_u, strong_v)
+
+    # Weak evidence only inside a component: split attribute groups by component
+    split_groups = []
+    for kind, members in weak_groups:
+        by_component = defaultdict(list)
+        for m in members:
+            by_component[int(component[m])].append(m)
+        split_groups.extend((kind, part) for part in by_component.values() if len(part) >= 2)
+    wu, wv, ww = _attribute_edges(split_groups, total)
+    weak_rel = ~strong_rel & (component[rel_u] == component[rel_v])
+
+    all_u = np.concatenate([strong_u, rel_u[weak_rel], wu])
+    all_v = np.concatenate([strong_v, rel_v[weak_rel], wv])
+    all_w = np.concatenate([rel_w[strong_rel], sw, rel_w[weak_rel], ww])
+    size = total + len(split_groups)
+    component = np.concatenate([
+        component,
+        np.array([component[m[0]] for _, m in split_groups], dtype=np.int64),
+    ])
+
+    # Only large components are split; the rest keep their component as label
+    real_sizes = np.bincount(component[:n], minlength=size)
+    split = real_sizes[component] > settings.CLUSTER_SPLIT_SIZE
+    labels = np.where(split, np.arange(size), component)
+    if split.any():
+        active = split[all_u]
+        u = np.concatenate([all_u[active], all_v[active]])
+        v = np.concatenate([all_v[active], all_u[active]])
+        w = np.concatenate([all_w[active], all_w[active]])
+        labels = propagate_labels(labels, u, v, w)
+
+    assigned = assign_cluster_ids(ids, labels[:n])
+    updated = _write_cluster_ids(session, ids, current, assigned)
+    session.commit()
+
+    refresh_cluster_stats(session)
+    session.commit()
+
+    stats = {
+        "iocs": n,
+        "components": int(np.count_nonzero(real_sizes >= 2)),
+        "clusters": len({c for c in assigned if c is not None}),
+        "updated": updated,
+        "skipped_attributes": skipped,
+    }
+    logger.info("clustering_complete", **stats)
+    return stats
+
+
+def assign_cluster_ids(ids: Sequence, labels: np.ndarray) -> List:
+    """Map community labels to cluster ids (smallest member id); singletons get None."""
+    n = len(ids)
+    _, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    representative = np.full(len(counts), n, dtype=np.int64)
+    np.minimum.at(representative, inverse, np.arange(n))
+    return [
+        ids[representative[group]] if counts[group] >= 2 else None
+        for group in inverse.tolist()
+    ]
+
+
+def cluster_new_edges_sync(session: Session, since: datetime) -> Dict[str, int]:
+    """Merge clusters joined by strong relationships created since ``since``.
+
+    Union-only: splits and attribute changes wait for the next full run.
+    """
+    edges = session.execute(
+        select(IOCRelationship.source_ioc_id, IOCRelationship.target_ioc_id).where(
+            IOCRelationship.created_at >= since,
+            IOCRelationship.confidence >= settings.CLUSTER_MIN_CONFIDENCE,
+        )
+    ).all()
+    if not edges:
+        return {"edges": 0, "merged": 0, "updated": 0}
+
+    endpoints = {i for edge in edges for i in edge}
+    clusters = dict(
+        session.execute(select(IOC.id, IOC.cluster_id).where(IOC.id.in_(endpoints))).all()
+    )
+
+    # Union-find over IOC ids and the clusters they already belong to
+    parent: Dict = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(a, b):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb, key=str)] = min(ra, rb, key=str)
+
+    for source_id, target_id in edges:
+        if source_id not in clusters or target_id not in clusters:
+            continue
+        union(("ioc", source_id), ("ioc", target_id))
+    for ioc_id, cluster_id in clusters.items():
+        if cluster_id is not None:
+            union(("ioc", ioc_id), ("cluster", cluster_id))
+
+    sets: Dict = defaultdict(lambda: {"iocs": set(), "clusters": set()})
+    for kind, key in list(parent):
+        group = sets[find((kind, key))]
+        group["iocs" if kind == "ioc" else "clusters"].add(key)
+
+    merged = 0
+    updated = 0
+    touched = set()
+    for group in sets.values():
+        unclustered = {i for i in group["iocs"] if clusters.get(i) is None}
+        if len(group["clusters"]) < 2 and not unclustered:
+            continue
+        # Keep the "smallest member id" invariant across the merge
+        target = min(list(group["clusters"]) + list(unclustered), key=str)
+        old = [c for c in group["clusters"] if c != target]
+        if old:
+            result = session.execute(
+                text("UPDATE iocs SET cluster_id = :target WHERE cluster_id = ANY(CAST(:old AS uuid[]))"),
+                {"target": str(target), "old": [str(c) for c in old]},
+            )
+            updated += result.rowcount or 0
+        if unclustered:
+            result = session.execute(
+                text("UPDATE iocs SET cluster_id = :target WHERE id = ANY(CAST(:ids AS uuid[]))"),
+                {"target": str(target), "ids": [str(i) for i in unclustered]},
+            )
+            updated += result.rowcount or 0
+        merged += len(old)
+        touched.add(target)
+        touched.update(old)
+
+    if touched:
+        refresh_cluster_stats(session, list(touched))
+    session.commit()
+
+    stats = {"edges": len(edges), "merged": merged, "updated": updated}
+    logger.info("clustering_incremental", **stats)
+    return stats
+
+
+def refresh_cluster_stats(session: Session, cluster_ids: Optional[List] = None) -> None:
+    """Recompute summary rows for the given clusters (all when None) and drop empty ones."""
+    if cluster_ids is None:
+        session.execute(text(_REFRESH_STATS.format(filter="")))
+        session.execute(text(_DELETE_EMPTY.format(filter="")))
+        return
+    params = {"cluster_ids": [str(c) for c in cluster_ids]}
+    session.execute(
+        text(_REFRESH_STATS.format(filter="AND m.cluster_id = ANY(CAST(:cluster_ids AS uuid[]))")),
+        params,
+    )
+    session.execute(
+        text(_DELETE_EMPTY.format(filter="AND c.id = ANY(CAST(:cluster_ids AS uuid[]))")),
+        params,
+    )
+
+
+def _write_cluster_ids(session: Session, ids: Sequence, current: Sequence, assigned: Sequence) -> int:
+    """Write cluster ids that changed, in batches."""
+    changed = [(i, new) for i, old, new in zip(ids, current, assigned) if old != new]
+    for start in range(0, len(changed), _WRITE_BATCH_SIZE):
+        batch = changed[start:start + _WRITE_BATCH_SIZE]
+        session.execute(text(_WRITE_CLUSTER_IDS), {
+            "ids": [str(i) for i, _ in batch],
+            "cluster_ids": [str(c) if c is not None else None for _, c in batch],
+        })
+    return len(changed)
+
+
+def _attribute_edges(
+    groups: List[Tuple[str, List[int]]], first_node: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Member -> virtual-node edges, one virtual node per group starting at ``first_node``."""
+    if not groups:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=np.float64)
+    lengths = [len(members) for _, members in groups]
+    u = np.fromiter((m for _, members in groups for m in members), dtype=np.int64, count=sum(lengths))
+    v = np.repeat(np.arange(first_node, first_node + len(groups), dtype=np.int64), lengths)
+    w = np.repeat([ATTRIBUTE_WEIGHTS[kind] for kind, _ in groups], lengths).astype(np.float64)
+    return u, v, w
+
+
+def _enrichment_attributes(source: str, data: Dict) -> Iterable[Tuple[str, str]]:
+    """Clustering attributes carried by a stored enrichment result."""
+    if "error" in data:
+        return
+    if source == "dns":
+        nameservers = data.get("nameservers") or []
+    else:
+        nameservers = data.get("name_servers") or []
+        registrar = data.get("registrar")
+        if isinstance(registrar, str) and registrar.strip():
+            yield "registrar", registrar.strip().lower()
+    for ns in nameservers:
+        if isinstance(ns, str) and ns.strip():
+            yield "ns", ns.strip().rstrip(".").lower()
+
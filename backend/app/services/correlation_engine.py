@@ -7,7 +7,12 @@ from sqlalchemy import select, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.ioc import IOC
-from app.models.ioc_relationship import IOCRelationship
+from app.models.dns_resolution import DNSResolution
+from app.services.batch_correlation import RESOLUTION_CONFIDENCE, URL_HOST_CONFIDENCE
+from app.services.relationship_writer import correlation_edges, write_relationships
+from app.services.dns_index import normalize_ip, url_host
+
+MAX_RESOLUTION_EDGES = 50
 
 
 async def find_correlations(
@@ -17,7 +22,7 @@ async def find_correlations(
     """Find correlations between an IOC and other indicators in the database."""
     correlations = []
 
-    if ioc.type == "domain":
+    if ioc.type in ("domain", "url"):
         ip_correlations = await _correlate_domain_to_ips(session, ioc)
         correlations.extend(ip_correlations)
 
@@ -25,6 +30,10 @@ async def find_correlations(
         domain_correlations = await _correlate_ip_to_domains(session, ioc)
         correlations.extend(domain_correlations)
 
+    if ioc.type == "url":
+        host_correlations = await _correlate_url_to_host(session, ioc)
+        correlations.extend(host_correlations)
+
     tag_correlations = await _correlate_by_tags(session, ioc)
     correlations.extend(tag_correlations)
 
@@ -35,55 +44,76 @@ async def find_correlations(
 
 
 async def _correlate_domain_to_ips(session: AsyncSession, ioc: IOC) -> List[Dict]:
-    """Find IPs that have been associated with a domain."""
-    results = []
-    query = select(IOC).where(
-        and_(
-            IOC.type == "ip",
-            IOC.tags.overlap(ioc.tags) if ioc.tags else True,
-        )
-    ).limit(20)
-    
+    """Find known IP IOCs the domain (or URL host) resolved to in its DNS enrichment."""
+    query = (
+        select(IOC)
+        .join(DNSResolution, and_(IOC.type == "ip", IOC.value == DNSResolution.ip))
+        .where(DNSResolution.ioc_id == ioc.id)
+        .order_by(IOC.threat_score.desc())
+        .limit(MAX_RESOLUTION_EDGES)
+    )
     result = await session.execute(query)
-    related_iocs = result.scalars().all()
-    
-    for related in related_iocs:
-        if related.id != ioc.id:
-            results.append({
-                "target_ioc_id": str(related.id),
-                "target_value": related.value,
-                "target_type": related.type,
-                "relationship_type": "resolves_to",
-                "confidence": 60,
-            })
-    
-    return results[:10]
+
+    return [
+        {
+            "target_ioc_id": str(related.id),
+            "target_value": related.value,
+            "target_type": related.type,
+            "relationship_type": "resolves_to",
+            "confidence": RESOLUTION_CONFIDENCE,
+        }
+        for related in result.scalars().all()
+    ]
 
 
 async def _correlate_ip_to_domains(session: AsyncSession, ioc: IOC) -> List[Dict]:
-    """Find domains associated with an IP."""
-    results = []
-    query = select(IOC).where(
-        and_(
-            IOC.type == "domain",
-            IOC.tags.overlap(ioc.tags) if ioc.tags else True,
-        )
-    ).limit(20)
-    
+    """Find domain and URL IOCs whose DNS enrichment resolved to this IP."""
+    ip = normalize_ip(ioc.value)
+    if ip is None:
+        return []
+
+    query = (
+        select(IOC)
+        .join(DNSResolution, DNSResolution.ioc_id == IOC.id)
+        .where(DNSResolution.ip == ip)
+        .order_by(IOC.threat_score.desc())
+        .limit(MAX_RESOLUTION_EDGES)
+    )
     result = await session.execute(query)
-    related_iocs = result.scalars().all()
-    
-    for related in related_iocs:
-        if related.id != ioc.id:
-            results.append({
-                "target_ioc_id": str(related.id),
-                "target_value": related.value,
-                "target_type": related.type,
-                "relationship_type": "hosts",
-                "confidence": 60,
-            })
-    
-    return results[:10]
+
+    return [
+        {
+            "target_ioc_id": str(related.id),
+            "target_value": related.value,
+            "target_type": related.type,
+            "relationship_type": "hosts",
+            "confidence": RESOLUTION_CONFIDENCE,
+        }
+        for related in result.scalars().all()
+    ]
+
+
+async def _correlate_url_to_host(session: AsyncSession, ioc: IOC) -> List[Dict]:
+    """Link a URL to the domain or IP IOC named in its hostname."""
+    host = url_host(ioc.value)
+    if host is None:
+        return []
+    ip = normalize_ip(host)
+    host_type, host_value = ("ip", ip) if ip else ("domain", host)
+
+    result = await session.execute(
+        select(IOC).where(and_(IOC.type == host_type, IOC.value == host_value))
+    )
+    related = result.scalar_one_or_none()
+    if related is None:
+        return []
+    return [{
+        "target_ioc_id": str(related.id),
+        "target_value": related.value,
+        "target_type": related.type,
+        "relationship_type": "hosted_on",
+        "confidence": URL_HOST_CONFIDENCE,
+    }]
 
 
 async def _correlate_by_tags(session: AsyncSession, ioc: IOC) -> List[Dict]:
@@ -148,25 +178,16 @@ async def store_relationships(
     session: AsyncSession,
     source_ioc_id: str,
     correlations: List[Dict],
-):
+) -> Dict[str, int]:
     """Store discovered correlations as IOC relationships."""
-    for corr in correlations:
-        existing = await session.execute(
-            select(IOCRelationship).where(
-                and_(
-                    IOCRelationship.source_ioc_id == source_ioc_id,
-                    IOCRelationship.target_ioc_id == corr["target_ioc_id"],
-                    IOCRelationship.relationship_type == corr["relationship_type"],
-                )
-            )
-        )
-        if existing.scalar_one_or_none() is None:
-            rel = IOCRelationship(
-                source_ioc_id=source_ioc_id,
-                target_ioc_id=corr["target_ioc_id"],
-                relationship_type=corr["relationship_type"],
-                confidence=corr.get("confidence", 50),
-            )
-            session.add(rel)
+    return await store_correlations(session, {source_ioc_id: correlations})
+
 
+async def store_correlations(
+    session: AsyncSession,
+    correlations_by_source: Dict[Any, List[Dict]],
+) -> Dict[str, int]:
+    """Store correlations for many source IOCs with one upsert per batch of edges."""
+    stats = await write_relationships(session, correlation_edges(correlations_by_source))
     await session.flush()
+    return stats
@@ -0,0 +1,97 @@
+"""Maintenance of the resolved-IP -> domain reverse index (dns_resolutions).
+
+The index mirrors the A/AAAA records of each IOC's latest ``dns``
+enrichment. It is updated whenever that enrichment is stored, so looking up
+the domains behind an IP is an index probe instead of a JSONB scan.
+"""
+
+import ipaddress
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.dns_resolution import DNSResolution
+
+RECORD_TYPES = ("A", "AAAA")
+
+
+def normalize_ip(value: str) -> Optional[str]:
+    """Canonical textual form of an IP address, or None if it is not one."""
+    try:
+        return str(ipaddress.ip_address(value.strip()))
+    except ValueError:
+        return None
+
+
+def url_host(url: str) -> Optional[str]:
+    """Lowercased hostname of a URL, without a trailing dot; None if unparsable."""
+    try:
+        host = urlparse(url if "://" in url else f"http://{url}").hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    return host.rstrip(".") or None
+
+
+def resolution_rows(ioc_id, data: Dict, now: datetime) -> Optional[List[Dict]]:
+    """Index rows for a DNS enrichment result; None if the lookup itself failed."""
+    if not isinstance(data, dict) or "error" in data:
+        return None
+    records = data.get("records") or {}
+
+    rows = {}
+    for record_type in RECORD_TYPES:
+        for answer in records.get(record_type) or []:
+            ip = normalize_ip(str(answer))
+            if ip is None:
+                continue
+            rows.setdefault(ip, {
+                "ioc_id": ioc_id,
+                "ip": ip,
+                "record_type": record_type,
+                "first_seen": now,
+                "last_seen": now,
+            })
+    return list(rows.values())
+
+
+def _statements(ioc_id, rows: List[Dict]):
+    # Drop answers the domain no longer resolves to, then upsert the current ones
+    stale = delete(DNSResolution).where(DNSResolution.ioc_id == ioc_id)
+    if rows:
+        stale = stale.where(DNSResolution.ip.notin_([r["ip"] for r in rows]))
+    yield stale
+
+    if rows:
+        stmt = insert(DNSResolution).values(rows)
+        yield stmt.on_conflict_do_update(
+            index_elements=[DNSResolution.ioc_id, DNSResolution.ip],
+            set_={
+                "record_type": stmt.excluded.record_type,
+                "last_seen": stmt.excluded.last_seen,
+            },
+        )
+
+
+async def update_resolutions(session: AsyncSession, ioc_id, data: Dict) -> None:
+    """Replace an IOC's indexed resolutions with those in a fresh DNS result."""
+    rows = resolution_rows(ioc_id, data, datetime.now(timezone.utc))
+    if rows is None:
+        return
+    for stmt in _statements(ioc_id, rows):
+        await session.execute(stmt)
+
+
+def update_resolutions_sync(session: Session, ioc_id, data: Dict) -> None:
+    """Synchronous variant of update_resolutions for Celery tasks."""
+    rows = resolution_rows(ioc_id, data, datetime.now(timezone.utc))
+    if rows is None:
+        return
+    for stmt in _statements(ioc_id, rows):
+        session.execute(stmt)
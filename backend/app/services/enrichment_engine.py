@@ -5,217 +5,263 @@ from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 
 from app.models.ioc import IOC
 from app.models.enrichment import Enrichment
 from app.config import settings
+from app.enrichers.registry import enricher_registry
+from app.services.dns_index import update_resolutions, update_resolutions_sync
+from app.services.rescore_queue import queue_rescore
+from app.utils.redis_client import get_async_redis
+from app.utils.singleflight import SingleFlight
 
 import structlog
 
 logger = structlog.get_logger()
 
+# Coalesces concurrent lookups of the same (source, value) across requests
+_enrichment_flight = SingleFlight("enrich")
+
+# Refresh keys claimed by this process, and strong refs to running refresh tasks
+_refresh_claims: set = set()
+_background_tasks: set = set()
+
 
 async def enrich_ioc(
     session: AsyncSession,
     ioc: IOC,
     sources: Optional[List[str]] = None,
+    allow_stale: bool = True,
 ) -> List[Dict[str, Any]]:
     """Run enrichment pipeline for an IOC.
     
-    Runs applicable enrichers in parallel and stores results.
+    Runs applicable enrichers in parallel and stores results. Concurrent
+    requests for the same (source, value) share a single upstream lookup.
+
+    With ``allow_stale`` an expired record is returned immediately, flagged
+    ``stale``, and a deduplicated background refresh is queued instead of
+    making the caller wait. Records older than ENRICHMENT_MAX_AGE are always
+    refreshed synchronously.
     """
     if sources is None:
         sources = _get_applicable_sources(ioc.type)
 
     results = []
-    tasks = []
+    pending = []
+    stale_sources = []
+    updated = False
+    now = datetime.now(timezone.utc)
+    stored = await _load_enrichments(session, ioc.id, sources)
 
     for source in sources:
-        cached = await _get_cached_enrichment(session, ioc.id, source)
-        if cached:
-            results.append(cached)
-            continue
-        tasks.append(_run_enricher(source, ioc))
-
-    if tasks:
-        enrichment_results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        for source, result in zip(
-            [s for s in sources if not await _get_cached_enrichment(session, ioc.id, s)],
-            enrichment_results,
-        ):
+        record = stored.get(source)
+        state = _freshness(record, now)
+        if state == "fresh":
+            results.append({"source": source, "data": record.data})
+        elif state == "stale" and allow_stale:
+            results.append({
+                "source": source,
+                "data": record.data,
+                "stale": True,
+                "enriched_at": record.enriched_at.isoformat() if record.enriched_at else None,
+            })
+            stale_sources.append(source)
+        else:
+            pending.append(source)
+
+    if pending:
+        enrichment_results = await asyncio.gather(
+            *(_run_enricher_coalesced(source, ioc) for source in pending),
+            return_exceptions=True,
+        )
+
+        for source, result in zip(pending, enrichment_results):
             if isinstance(result, Exception):
                 logger.error("enrichment_failed", source=source, ioc=ioc.value, error=str(result))
                 continue
             
             if result:
-                ttl = _get_ttl(source)
-                enrichment = Enrichment(
-                    ioc_id=ioc.id,
-                    source=source,
-                    data=result,
-                    enriched_at=datetime.now(timezone.utc),
-                    expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl),
-                )
-                
-                existing = await session.execute(
-                    select(Enrichment).where(
-                        Enrichment.ioc_id == ioc.id,
-                        Enrichment.source == source,
-                    )
-                )
-                existing_record = existing.scalar_one_or_none()
-                if existing_record:
-                    existing_record.data = result
-                    existing_record.enriched_at = datetime.now(timezone.utc)
-                    existing_record.expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
-                else:
-                    session.add(enrichment)
-                
+                await _store_enrichment(session, ioc.id, source, result)
                 results.append({"source": source, "data": result})
+                updated = True
 
     await session.flush()
+    if updated:
+        await queue_rescore(session, [ioc.id])
+
+    if stale_sources:
+        await schedule_refresh(ioc.id, stale_sources)
     return results
 
 
+async def _store_enrichment(session: AsyncSession, ioc_id, source: str, data: Dict) -> None:
+    """Upsert an enrichment result with a fresh expiry."""
+    now = datetime.now(timezone.utc)
+    stmt = insert(Enrichment).values(
+        ioc_id=ioc_id,
+        source=source,
+        data=data,
+        enriched_at=now,
+        expires_at=now + timedelta(seconds=_get_ttl(source)),
+    )
+    # Upsert so coalesced callers racing on the same row don't collide
+    await session.execute(
+        stmt.on_conflict_do_update(
+            constraint="uq_enrichment_ioc_source",
+            set_={
+                "data": stmt.excluded.data,
+                "enriched_at": stmt.excluded.enriched_at,
+                "expires_at": stmt.excluded.expires_at,
+                "refresh_failed_at": None,
+            },
+        )
+    )
+    if source == "dns":
+        await update_resolutions(session, ioc_id, data)
+
+
+def store_enrichment_sync(
+    session: Session,
+    ioc_id,
+    source: str,
+    data: Dict,
+) -> None:
+    """Synchronous upsert of an enrichment result for Celery tasks."""
+    now = datetime.now(timezone.utc)
+    stmt = insert(Enrichment).values(
+        ioc_id=ioc_id,
+        source=source,
+        data=data,
+        enriched_at=now,
+        expires_at=now + timedelta(seconds=_get_ttl(source)),
+    )
+    session.execute(
+        stmt.on_conflict_do_update(
+            constraint="uq_enrichment_ioc_source",
+            set_={
+                "data": stmt.excluded.data,
+                "enriched_at": stmt.excluded.enriched_at,
+                "expires_at": stmt.excluded.expires_at,
+                "refresh_failed_at": None,
+            },
+        )
+    )
+    if source == "dns":
+        update_resolutions_sync(session, ioc_id, data)
+
+
+async def schedule_refresh(ioc_id, sources: List[str]) -> bool:
+    """Queue a background refresh of expired sources for an IOC.
+
+    Deduplicated per (IOC, source) within this process and, when Redis is
+    reachable, across workers. Returns False if every source is already queued.
+    """
+    claimed = []
+    client = await get_async_redis()
+    for source in sources:
+        key = f"enrich:refresh:{ioc_id}:{source}"
+        if key in _refresh_claims:
+            continue
+        if client is not None:
+            try:
+                if not await client.set(key, "1", nx=True, ex=settings.ENRICHMENT_REFRESH_DEDUP_TTL):
+                    continue
+            except Exception as e:
+                logger.warning("refresh_dedup_failed", ioc_id=str(ioc_id), error=str(e))
+        _refresh_claims.add(key)
+        claimed.append(source)
+
+    if not claimed:
+        return False
+
+    task = asyncio.create_task(_refresh_in_background(ioc_id, claimed))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return True
+
+
+async def _refresh_in_background(ioc_id, sources: List[str]) -> None:
+    """Re-run expired enrichers in a session of our own, then release the claims."""
+    from app.database import AsyncSessionLocal
+
+    try:
+        async with AsyncSessionLocal() as session:
+            ioc = await session.get(IOC, ioc_id)
+            if ioc is None:
+                return
+            await enrich_ioc(session, ioc, sources=sources, allow_stale=False)
+            await session.commit()
+        logger.info("enrichment_refreshed", ioc_id=str(ioc_id), sources=sources)
+    except Exception as e:
+        logger.error("enrichment_refresh_failed", ioc_id=str(ioc_id), error=str(e))
+    finally:
+        keys = [f"enrich:refresh:{ioc_id}:{source}" for source in sources]
+        _refresh_claims.difference_update(keys)
+        client = await get_async_redis()
+        if client is not None:
+            try:
+                await client.delete(*keys)
+            except Exception:
+                pass
+
+
+async def _run_enricher_coalesced(source: str, ioc: IOC) -> Optional[Dict]:
+    """Run an enricher, sharing one in-flight lookup per (source, value)."""
+    return await _enrichment_flight.do(
+        f"{source}:{ioc.value}",
+        lambda: _run_enricher(source, ioc),
+    )
+
+
 def _get_applicable_sources(ioc_type: str) -> List[str]:
     """Determine which enrichment sources apply to an IOC type."""
-    source_map = {
-        "ip": ["geoip", "whois", "dns", "reputation"],
-        "domain": ["whois", "dns", "reputation"],
-        "url": ["whois", "dns", "reputation"],
-        "hash": ["reputation"],
-        "email": ["whois", "reputation"],
-        "cve": ["reputation"],
-    }
-    return source_map.get(ioc_type, ["reputation"])
-
-
-async def _get_cached_enrichment(
-    session: AsyncSession, ioc_id, source: str
-) -> Optional[Dict]:
-    """Check if valid cached enrichment exists."""
+    return enricher_registry.applicable_sources(ioc_type)
+
+
+async def _load_enrichments(
+    session: AsyncSession, ioc_id, sources: List[str]
+) -> Dict[str, Enrichment]:
+    """Fetch stored enrichment records for the requested sources in one query."""
+    if not sources:
+        return {}
     result = await session.execute(
         select(Enrichment).where(
             Enrichment.ioc_id == ioc_id,
-            Enrichment.source == source,
+            Enrichment.source.in_(sources),
         )
     )
-    enrichment = result.scalar_one_or_none()
-    
-    if enrichment and enrichment.expires_at:
-        if enrichment.expires_at > datetime.now(timezone.utc):
-            return {"source": source, "data": enrichment.data}
-    
-    return None
+    return {e.source: e for e in result.scalars().all()}
 
 
-async def _run_enricher(source: str, ioc: IOC) -> Optional[Dict]:
-    """Run a specific enricher for an IOC."""
-    try:
-        if source == "geoip":
-            return await _enrich_geoip(ioc.value)
-        elif source == "whois":
-            return await _enrich_whois(ioc.value, ioc.type)
-        elif source == "dns":
-            return await _enrich_dns(ioc.value)
-        elif source == "reputation":
-            return await _enrich_reputation(ioc.value, ioc.type)
-        else:
-            return None
-    except Exception as e:
-        logger.error("enricher_error", source=source, error=str(e))
-        return None
+def _freshness(enrichment: Optional[Enrichment], now: datetime) -> str:
+    """Classify a stored record as fresh, stale (servable) or missing/too old."""
+    if enrichment is None or enrichment.expires_at is None:
+        return "missing"
+    if enrichment.expires_at > now:
+        return "fresh"
+    max_age = settings.ENRICHMENT_MAX_AGE
+    if max_age and enrichment.enriched_at and now - enrichment.enriched_at > timedelta(seconds=max_age):
+        return "missing"
+    return "stale"
 
 
-async def _enrich_geoip(value: str) -> Optional[Dict]:
-    """GeoIP enrichment - returns location data for an IP."""
-    try:
-        import geoip2.database
-        reader = geoip2.database.Reader(settings.GEOIP_DB_PATH)
-        response = reader.city(value)
-        return {
-            "country": response.country.name,
-            "country_code": response.country.iso_code,
-            "city": response.city.name,
-            "latitude": response.location.latitude,
-            "longitude": response.location.longitude,
-            "asn": None,
-            "isp": None,
-        }
-    except Exception:
-        return {
-            "country": "Unknown",
-            "country_code": "XX",
-            "city": None,
-            "latitude": None,
-            "longitude": None,
-            "asn": None,
-            "isp": None,
-            "error": "GeoIP database not available",
-        }
-
-
-async def _enrich_whois(value: str, ioc_type: str) -> Optional[Dict]:
-    """WHOIS enrichment for domains and IPs."""
-    try:
-        import whois
-        w = whois.whois(value)
-        return {
-            "registrar": w.registrar,
-            "creation_date": str(w.creation_date) if w.creation_date else None,
-            "expiration_date": str(w.expiration_date) if w.expiration_date else None,
-            "name_servers": w.name_servers if w.name_servers else [],
-            "registrant": w.org,
-            "country": w.country,
-            "privacy_protected": "privacy" in str(w.org or "").lower() or "redacted" in str(w.org or "").lower(),
-        }
-    except Exception as e:
-        return {"error": f"WHOIS lookup failed: {str(e)}"}
+def is_stale(enrichment: Enrichment) -> bool:
+    """Whether a stored enrichment record is past its expiry."""
+    return bool(enrichment.expires_at and enrichment.expires_at <= datetime.now(timezone.utc))
 
 
-async def _enrich_dns(value: str) -> Optional[Dict]:
-    """DNS enrichment for domains."""
+async def _run_enricher(source: str, ioc: IOC) -> Optional[Dict]:
+    """Run a specific enricher for an IOC through the registry's budgets."""
     try:
-        import dns.resolver
-        records = {}
-        
-        for rtype in ["A", "AAAA", "MX", "NS", "TXT"]:
-            try:
-                answers = dns.resolver.resolve(value, rtype)
-                records[rtype] = [str(r) for r in answers]
-            except Exception:
-                records[rtype] = []
-        
-        return {
-            "records": records,
-            "has_ipv6": bool(records.get("AAAA")),
-            "nameservers": records.get("NS", []),
-            "mail_servers": records.get("MX", []),
-            "fast_flux": len(records.get("A", [])) > 5,
-        }
+        return await enricher_registry.run(source, ioc.value, ioc.type)
     except Exception as e:
-        return {"error": f"DNS lookup failed: {str(e)}"}
-
-
-async def _enrich_reputation(value: str, ioc_type: str) -> Optional[Dict]:
-    """Aggregate reputation check across available sources."""
-    return {
-        "aggregate_score": 0,
-        "sources_checked": 0,
-        "sources_flagged": 0,
-        "details": {},
-        "note": "Enable feed API keys for live reputation checks",
-    }
+        logger.error("enricher_error", source=source, error=str(e))
+        return None
 
 
 def _get_ttl(source: str) -> int:
     """Get cache TTL for an enrichment source."""
-    ttl_map = {
-        "whois": settings.CACHE_TTL_WHOIS,
-        "dns": settings.CACHE_TTL_DNS,
-        "geoip": settings.CACHE_TTL_GEOIP,
-        "reputation": settings.CACHE_TTL_REPUTATION,
-    }
-    return ttl_map.get(source, 3600)
+    return enricher_registry.ttl(source)
@@ -10,7 +10,12 @@ from sqlalchemy.orm import Session
 from app.models.ioc import IOC
 from app.models.feed import FeedSource
 from app.models.ioc_source import IOCSource
-from app.services.scoring_engine import calculate_threat_score
+from app.services.scoring_engine import (
+    composite_score, score_components, next_recency_boundary, get_active_profile,
+)
+from app.services.scoring_profiles import ensure_active_profile, ensure_active_profile_sync
+from app.services.similarity import update_signatures, update_signatures_sync
+from app.utils.asn_table import lookup_asn
 from app.utils.ioc_validator import validate_ioc, normalize_ioc
 
 import structlog
@@ -28,7 +33,9 @@ async def ingest_iocs(
     Handles deduplication, normalization, scoring, and storage.
     Returns the number of new/updated IOCs.
     """
+    await ensure_active_profile(session)
     count = 0
+    touched = []
 
     for raw in raw_iocs:
         try:
@@ -63,26 +70,20 @@ async def ingest_iocs(
                     existing_tech.update(raw["mitre_techniques"])
                     existing.mitre_techniques = list(existing_tech)
 
+                apply_asn(existing)
+                existing.next_rescore_at = next_recency_boundary(existing.last_seen)
+
                 source_count = len(existing.sources) if existing.sources else 1
-                existing.threat_score = calculate_threat_score(
-                    {
-                        "type": existing.type,
-                        "value": existing.value,
-                        "threat_score": existing.threat_score,
-                        "tags": existing.tags,
-                        "mitre_techniques": existing.mitre_techniques,
-                        "last_seen": existing.last_seen,
-                        "sighting_count": existing.sighting_count,
-                        "metadata": existing.metadata_,
-                    },
-                    source_count=source_count + 1,
-                )
+                apply_score(existing, sighting_components(existing, source_count + 1))
                 
                 ioc_id = existing.id
+                ioc = existing
             else:
                 score = raw.get("threat_score")
+                components = None
                 if score is None:
-                    score = calculate_threat_score(raw, source_count=1)
+                    components = score_components(raw, source_count=1)
+                    score = composite_score(components)
 
                 new_ioc = IOC(
                     type=ioc_type,
@@ -96,9 +97,14 @@ async def ingest_iocs(
                     metadata_=raw.get("metadata", {}),
                     mitre_techniques=raw.get("mitre_techniques", []),
                 )
+                apply_asn(new_ioc)
+                if components is not None:
+                    apply_score(new_ioc, components)
+                new_ioc.next_rescore_at = next_recency_boundary(new_ioc.last_seen)
                 session.add(new_ioc)
                 await session.flush()
                 ioc_id = new_ioc.id
+                ioc = new_ioc
 
             existing_source = await session.execute(
                 select(IOCSource).where(
@@ -114,6 +120,7 @@ async def ingest_iocs(
                 )
                 session.add(ioc_source)
 
+            touched.append(ioc)
             count += 1
 
         except Exception as e:
@@ -123,8 +130,9 @@ async def ingest_iocs(
     feed.last_sync_at = datetime.now(timezone.utc)
     feed.last_sync_status = "success"
     feed.ioc_count = count
-    
+
     await session.flush()
+    await update_signatures(session, touched)
     
     logger.info("feed_ingestion_complete", feed=feed.name, iocs_ingested=count)
     return count
@@ -136,7 +144,9 @@ def ingest_iocs_sync(
     raw_iocs: List[Dict[str, Any]],
 ) -> int:
     """Synchronous version for Celery tasks."""
+    ensure_active_profile_sync(session)
     count = 0
+    touched = []
 
     for raw in raw_iocs:
         try:
@@ -161,25 +171,18 @@ def ingest_iocs_sync(
                     existing_tags = set(existing.tags or [])
                     existing_tags.update(raw["tags"])
                     existing.tags = list(existing_tags)
+                apply_asn(existing)
+                existing.next_rescore_at = next_recency_boundary(existing.last_seen)
                 
-                existing.threat_score = calculate_threat_score(
-                    {
-                        "type": existing.type,
-                        "value": existing.value,
-                        "threat_score": existing.threat_score,
-                        "tags": existing.tags,
-                        "mitre_techniques": existing.mitre_techniques or [],
-                        "last_seen": existing.last_seen,
-                        "sighting_count": existing.sighting_count,
-                        "metadata": existing.metadata_,
-                    },
-                    source_count=2,
-                )
+                apply_score(existing, sighting_components(existing, 2))
                 ioc_id = existing.id
+                ioc = existing
             else:
                 score = raw.get("threat_score")
+                components = None
                 if score is None:
-                    score = calculate_threat_score(raw, source_count=1)
+                    components = score_components(raw, source_count=1)
+                    score = composite_score(components)
 
                 new_ioc = IOC(
                     type=ioc_type,
@@ -193,9 +196,14 @@ def ingest_iocs_sync(
                     metadata_=raw.get("metadata", {}),
                     mitre_techniques=raw.get("mitre_techniques", []),
                 )
+                apply_asn(new_ioc)
+                if components is not None:
+                    apply_score(new_ioc, components)
+                new_ioc.next_rescore_at = next_recency_boundary(new_ioc.last_seen)
                 session.add(new_ioc)
                 session.flush()
                 ioc_id = new_ioc.id
+                ioc = new_ioc
 
             existing_source = session.query(IOCSource).filter(
                 IOCSource.ioc_id == ioc_id,
@@ -209,6 +217,7 @@ def ingest_iocs_sync(
                 )
                 session.add(ioc_source)
 
+            touched.append(ioc)
             count += 1
         except Exception as e:
             logger.error("sync_ingestion_error", error=str(e))
@@ -218,5 +227,53 @@ def ingest_iocs_sync(
     feed.last_sync_status = "success"
     feed.ioc_count = count
     session.flush()
+    update_signatures_sync(session, touched)
 
     return count
+
+
+def sighting_components(ioc: IOC, source_count: int) -> Dict[str, float]:
+    """Components for a re-sighted IOC, keeping its cached enrichment component.
+
+    Ingestion does not load the IOC's enrichments, so score_components would
+    fall back to the neutral enrichment score; the cached value is kept until
+    the enrichment rescore path updates it.
+    """
+    components = score_components(
+        {
+            "type": ioc.type,
+            "value": ioc.value,
+            "threat_score": ioc.threat_score,
+            "tags": ioc.tags,
+            "mitre_techniques": ioc.mitre_techniques or [],
+            "last_seen": ioc.last_seen,
+            "sighting_count": ioc.sighting_count,
+            "metadata": ioc.metadata_,
+            "score_reputation": ioc.score_reputation,
+        },
+        source_count=source_count,
+    )
+    if ioc.score_enrichment is not None:
+        components["enrichment"] = ioc.score_enrichment
+    return components
+
+
+def apply_score(ioc: IOC, components: Dict[str, float]) -> None:
+    """Set threat_score and its cached component scores from score_components output."""
+    profile = get_active_profile()
+    ioc.threat_score = composite_score(components, profile)
+    for name, value in components.items():
+        setattr(ioc, f"score_{name}", value)
+    ioc.score_profile = profile.name
+    ioc.score_profile_version = profile.version
+    ioc.scored_at = datetime.now(timezone.utc)
+
+
+def apply_asn(ioc: IOC) -> None:
+    """Attach ASN and network prefix from the local table to an IP IOC lacking them."""
+    if ioc.type != "ip" or ioc.asn is not None:
+        return
+    info = lookup_asn(ioc.value)
+    if info:
+        ioc.asn = info["asn"]
+        ioc.network_prefix = info["prefix"]
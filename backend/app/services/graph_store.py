@@ -0,0 +1,452 @@
+"""In-memory relationship graph for multi-hop traversal.
+
+``ioc_relationships`` is loaded once per process into a compressed sparse
+row (CSR) structure: IOC UUIDs map to dense integer node ids and each node's
+neighbors sit in one contiguous slice of flat NumPy arrays. Every edge is
+stored in both directions with a flag recording its original orientation, so
+BFS expands a whole frontier with a few vectorized gathers instead of one
+query per hop.
+
+Edges created since the last load are pulled in as deltas (by ``created_at``)
+into a small overlay, which is folded into fresh CSR arrays once it grows.
+Deletions, which only happen through IOC cascades, are picked up by the
+periodic full rebuild; traversal results are joined back to ``iocs`` so a
+deleted node never reaches a response.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.ioc_relationship import IOCRelationship
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Relationship rows committed slightly out of created_at order are still caught
+_DELTA_OVERLAP = timedelta(seconds=60)
+_STREAM_BATCH_SIZE = 50000
+
+# (neighbor, type code, confidence, outgoing) of an overlay edge
+OverlayEdge = Tuple[int, int, int, bool]
+
+
+class RelationshipGraph:
+    """CSR adjacency over IOC relationships plus an overlay of recent edges."""
+
+    def __init__(
+        self,
+        node_ids: List,
+        type_names: List[str],
+        sources: np.ndarray,
+        targets: np.ndarray,
+        types: np.ndarray,
+        confidence: np.ndarray,
+        watermark: Optional[datetime] = None,
+    ):
+        self.node_ids = node_ids
+        self.node_index: Dict = {node: i for i, node in enumerate(node_ids)}
+        self.type_names = type_names
+        self.type_codes: Dict[str, int] = {name: i for i, name in enumerate(type_names)}
+        self.watermark = watermark
+        self.overlay: Dict[int, List[OverlayEdge]] = {}
+        self.overlay_edges = 0
+        self._build_csr(sources, targets, types, confidence)
+
+    def _build_csr(self, sources, targets, types, confidence) -> None:
+        n = len(self.node_ids)
+        self.base_nodes = n
+        self.edge_count = len(sources)
+
+        origin = np.concatenate([sources, targets]).astype(np.int32)
+        order = np.argsort(origin, kind="stable")
+        self.neighbors = np.concatenate([targets, sources]).astype(np.int32)[order]
+        self.types = np.concatenate([types, types]).astype(np.int16)[order]
+        self.confidence = np.concatenate([confidence, confidence]).astype(np.int16)[order]
+        self.outgoing = np.concatenate([
+            np.ones(len(sources), dtype=bool), np.zeros(len(sources), dtype=bool),
+        ])[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(origin, minlength=n), out=self.indptr[1:])
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    def _node(self, ioc_id) -> int:
+        index = self.node_index.get(ioc_id)
+        if index is None:
+            index = len(self.node_ids)
+            self.node_ids.append(ioc_id)
+            self.node_index[ioc_id] = index
+        return index
+
+    def _type_code(self, name: Optional[str]) -> int:
+        name = name or "related"
+        code = self.type_codes.get(name)
+        if code is None:
+            code = len(self.type_names)
+            self.type_names.append(name)
+            self.type_codes[name] = code
+        return code
+
+    def has_edge(self, source: int, target: int, type_code: int) -> bool:
+        if source < self.base_nodes:
+            start, end = self.indptr[source], self.indptr[source + 1]
+            hits = (
+                (self.neighbors[start:end] == target)
+                & (self.types[start:end] == type_code)
+                & self.outgoing[start:end]
+            )
+            if hits.any():
+                return True
+        return any(
+            nbr == target and code == type_code and out
+            for nbr, code, _, out in self.overlay.get(source, ())
+        )
+
+    def add_edge(self, source_id, target_id, relationship_type: Optional[str], confidence: int) -> bool:
+        """Add an edge to the overlay; returns False if it is already known."""
+        source, target = self._node(source_id), self._node(target_id)
+        code = self._type_code(relationship_type)
+        if self.has_edge(source, target, code):
+            return False
+        confidence = confidence if confidence is not None else 50
+        self.overlay.setdefault(source, []).append((target, code, confidence, True))
+        self.overlay.setdefault(target, []).append((source, code, confidence, False))
+        self.overlay_edges += 1
+        return True
+
+    def compacted(self) -> "RelationshipGraph":
+        """A new graph with the overlay folded into the CSR arrays."""
+        sources, targets, types, confidence = self.edge_arrays()
+        return RelationshipGraph(
+            list(self.node_ids), list(self.type_names),
+            sources, targets, types, confidence, self.watermark,
+        )
+
+    def edge_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Every edge once, in its stored orientation."""
+        origin = np.repeat(np.arange(self.base_nodes, dtype=np.int32), np.diff(self.indptr))
+        out = self.outgoing
+        sources, targets = [origin[out]], [self.neighbors[out]]
+        types, confidence = [self.types[out]], [self.confidence[out]]
+        extra = [
+            (node, nbr, code, conf)
+            for node, edges in self.overlay.items()
+            for nbr, code, conf, outgoing in edges
+            if outgoing
+        ]
+        if extra:
+            columns = np.array(extra, dtype=np.int64).T
+            sources.append(columns[0])
+            targets.append(columns[1])
+            types.append(columns[2])
+            confidence.append(columns[3])
+        return (
+            np.concatenate(sources), np.concatenate(targets),
+            np.concatenate(types), np.concatenate(confidence),
+        )
+
+    def _expand(self, frontier: np.ndarray, type_mask: Optional[np.ndarray]):
+        """All edges leaving the frontier as (origin, neighbor, type, confidence, outgoing)."""
+        base = frontier[frontier < self.base_nodes]
+        starts = self.indptr[base]
+        lengths = self.indptr[base + 1] - starts
+        total = int(lengths.sum())
+        # Positions of every neighbor slice, laid end to end
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        origin = np.repeat(base, lengths)
+        columns = [
+            origin, self.neighbors[offsets], self.types[offsets],
+            self.confidence[offsets], self.outgoing[offsets],
+        ]
+
+        if self.overlay:
+            extra = [
+                (node, nbr, code, conf, out)
+                for node in set(frontier.tolist()) & self.overlay.keys()
+                for nbr, code, conf, out in self.overlay[node]
+            ]
+            if extra:
+                rows = np.array(extra, dtype=np.int64).T
+                columns = [
+                    np.concatenate([columns[0], rows[0]]),
+                    np.concatenate([columns[1], rows[1]]),
+                    np.concatenate([columns[2], rows[2]]),
+                    np.concatenate([columns[3], rows[3]]),
+                    np.concatenate([columns[4], rows[4].astype(bool)]),
+                ]
+
+        if type_mask is not None:
+            keep = type_mask[columns[2]]
+            columns = [c[keep] for c in columns]
+        return columns
+
+    def type_mask(self, relationship_types: Optional[Sequence[str]]) -> Optional[np.ndarray]:
+        if not relationship_types:
+            return None
+        mask = np.zeros(len(self.type_names), dtype=bool)
+        for name in relationship_types:
+            code = self.type_codes.get(name)
+            if code is not None:
+                mask[code] = True
+        return mask
+
+    def neighborhood(
+        self,
+        ioc_id,
+        depth: int,
+        limit: int,
+        relationship_types: Optional[Sequence[str]] = None,
+    ) -> Dict:
+        """Breadth-first expansion to ``depth`` hops, capped at ``limit`` nodes.
+
+        Returns the reached nodes with their hop distance and every edge
+        between them, oriented as stored.
+        """
+        start = self.node_index.get(ioc_id)
+        if start is None:
+            return {"nodes": {ioc_id: 0}, "edges": [], "truncated": False}
+
+        mask = self.type_mask(relationship_types)
+        hops = np.full(self.node_count, -1, dtype=np.int16)
+        hops[start] = 0
+        reached = 1
+        truncated = False
+        frontier = np.array([start], dtype=np.int64)
+        collected = []
+
+        for hop in range(1, depth + 1):
+            if not len(frontier):
+                break
+            origin, nbr, etype, conf, out = self._expand(frontier, mask)
+            collected.append((origin, nbr, etype, conf, out))
+
+            new = nbr[hops[nbr] < 0]
+            # Keep discovery order so the cap drops the farthest-listed nodes first
+            new, first = np.unique(new, return_index=True)
+            new = new[np.argsort(first, kind="stable")]
+            if reached + len(new) > limit:
+                new = new[: limit - reached]
+                truncated = True
+            hops[new] = hop
+            reached += len(new)
+            frontier = new.astype(np.int64)
+            if truncated:
+                break
+
+        if collected:
+            origin, nbr, etype, conf, out = (np.concatenate(c) for c in zip(*collected))
+            keep = hops[nbr] >= 0
+            origin, nbr, etype, conf, out = origin[keep], nbr[keep], etype[keep], conf[keep], out[keep]
+            # Edges between two expanded nodes show up from both ends; keep one, as stored
+            source = np.where(out, origin, nbr)
+            target = np.where(out, nbr, origin)
+            _, first = np.unique(np.stack([source, target, etype]), axis=1, return_index=True)
+            first.sort()
+            edges = zip(
+                source[first].tolist(), target[first].tolist(),
+                etype[first].tolist(), conf[first].tolist(),
+            )
+        else:
+            edges = ()
+
+        nodes = {self.node_ids[i]: int(hops[i]) for i in np.flatnonzero(hops >= 0).tolist()}
+        return {
+            "nodes": nodes,
+            "edges": [
+                {
+                    "source": self.node_ids[s],
+                    "target": self.node_ids[t],
+                    "relationship_type": self.type_names[code],
+                    "confidence": c,
+                }
+                for s, t, code, c in edges
+            ],
+            "truncated": truncated,
+        }
+
+    def shortest_path(
+        self,
+        source_id,
+        target_id,
+        max_depth: int,
+        relationship_types: Optional[Sequence[str]] = None,
+    ) -> Optional[List[Dict]]:
+        """Fewest-hop path between two IOCs (ignoring direction), or None."""
+        start = self.node_index.get(source_id)
+        goal = self.node_index.get(target_id)
+        if start is None or goal is None:
+            return None
+        if start == goal:
+            return []
+
+        mask = self.type_mask(relationship_types)
+        parent = np.full(self.node_count, -1, dtype=np.int64)
+        parent[start] = start
+        via: Dict[int, Tuple[int, int, bool]] = {}
+        frontier = np.array([start], dtype=np.int64)
+
+        for _ in range(max_depth):
+            if not len(frontier):
+                return None
+            origin, nbr, etype, conf, out = self._expand(frontier, mask)
+            fresh = parent[nbr] < 0
+            origin, nbr, etype, conf, out = origin[fresh], nbr[fresh], etype[fresh], conf[fresh], out[fresh]
+            nbr, first = np.unique(nbr, return_index=True)
+            parent[nbr] = origin[first]
+            for node, i in zip(nbr.tolist(), first.tolist()):
+                via[node] = (int(etype[i]), int(conf[i]), bool(out[i]))
+            if parent[goal] >= 0:
+                break
+            frontier = nbr.astype(np.int64)
+        else:
+            return None
+        if parent[goal] < 0:
+            return None
+
+        path = []
+        node = goal
+        while node != start:
+            prev = int(parent[node])
+            code, conf, out = via[node]
+            source, target = (prev, node) if out else (node, prev)
+            path.append({
+                "source": self.node_ids[source],
+                "target": self.node_ids[target],
+                "relationship_type": self.type_names[code],
+                "confidence": conf,
+            })
+            node = prev
+        path.reverse()
+        return path
+
+
+class GraphStore:
+    """Process-wide holder that loads, refreshes and rebuilds the graph."""
+
+    def __init__(self):
+        self._graph: Optional[RelationshipGraph] = None
+        self._lock = asyncio.Lock()
+        self._built_at = 0.0
+        self._refreshed_at = 0.0
+
+    async def get(self, db: AsyncSession) -> RelationshipGraph:
+        """Current graph, rebuilding or applying deltas when due.
+
+        While another request holds the refresh lock, the previous snapshot
+        is served rather than waiting.
+        """
+        now = time.monotonic()
+        graph = self._graph
+        if graph is not None:
+            rebuild = now - self._built_at > settings.GRAPH_REBUILD_INTERVAL
+            refresh = now - self._refreshed_at > settings.GRAPH_REFRESH_INTERVAL
+            if not (rebuild or refresh) or self._lock.locked():
+                return graph
+
+        async with self._lock:
+            now = time.monotonic()
+            if self._graph is None or now - self._built_at > settings.GRAPH_REBUILD_INTERVAL:
+                self._graph = await self._load(db)
+                self._built_at = self._refreshed_at = time.monotonic()
+            elif now - self._refreshed_at > settings.GRAPH_REFRESH_INTERVAL:
+                await self._apply_deltas(db, self._graph)
+                self._refreshed_at = time.monotonic()
+            return self._graph
+
+    def invalidate(self) -> None:
+        """Force a full rebuild on the next access."""
+        self._built_at = 0.0
+
+    async def _load(self, db: AsyncSession) -> RelationshipGraph:
+        started = time.monotonic()
+        node_index: Dict = {}
+        node_ids: List = []
+        type_codes: Dict[str, int] = {}
+        type_names: List[str] = []
+        sources, targets, types, confidence = [], [], [], []
+        watermark = None
+
+        def node(ioc_id) -> int:
+            index = node_index.get(ioc_id)
+            if index is None:
+                index = node_index[ioc_id] = len(node_ids)
+                node_ids.append(ioc_id)
+            return index
+
+        rows = await db.stream(
+            select(
+                IOCRelationship.source_ioc_id,
+                IOCRelationship.target_ioc_id,
+                IOCRelationship.relationship_type,
+                IOCRelationship.confidence,
+                IOCRelationship.created_at,
+            ).execution_options(yield_per=_STREAM_BATCH_SIZE)
+        )
+        async for source, target, relationship_type, conf, created_at in rows:
+            name = relationship_type or "related"
+            code = type_codes.get(name)
+            if code is None:
+                code = type_codes[name] = len(type_names)
+                type_names.append(name)
+            sources.append(node(source))
+            targets.append(node(target))
+            types.append(code)
+            confidence.append(conf if conf is not None else 50)
+            if created_at is not None and (watermark is None or created_at > watermark):
+                watermark = created_at
+
+        graph = await asyncio.to_thread(
+            RelationshipGraph,
+            node_ids,
+            type_names,
+            np.array(sources, dtype=np.int32),
+            np.array(targets, dtype=np.int32),
+            np.array(types, dtype=np.int16),
+            np.array(confidence, dtype=np.int16),
+            watermark,
+        )
+        logger.info(
+            "relationship_graph_loaded",
+            nodes=graph.node_count,
+            edges=graph.edge_count,
+            seconds=round(time.monotonic() - started, 3),
+        )
+        return graph
+
+    async def _apply_deltas(self, db: AsyncSession, graph: RelationshipGraph) -> None:
+        query = select(
+            IOCRelationship.source_ioc_id,
+            IOCRelationship.target_ioc_id,
+            IOCRelationship.relationship_type,
+            IOCRelationship.confidence,
+            IOCRelationship.created_at,
+        )
+        if graph.watermark is not None:
+            query = query.where(IOCRelationship.created_at > graph.watermark - _DELTA_OVERLAP)
+
+        added = 0
+        result = await db.execute(query)
+        for source, target, relationship_type, conf, created_at in result.all():
+            if graph.add_edge(source, target, relationship_type, conf):
+                added += 1
+            if created_at is not None and (graph.watermark is None or created_at > graph.watermark):
+                graph.watermark = created_at
+
+        if graph.overlay_edges > settings.GRAPH_OVERLAY_LIMIT:
+            # Build the compacted copy off the event loop, then swap it in
+            self._graph = await asyncio.to_thread(graph.compacted)
+        if added:
+            logger.info("relationship_graph_delta", added=added, overlay=graph.overlay_edges)
+
+
+graph_store = GraphStore()
@@ -0,0 +1,117 @@
+"""Total counts for IOC listings without always paying for COUNT(*).
+
+An exact count visits every matching row, so on broad filters it costs more
+than the page itself. The strategy here:
+
+* no filters: ``pg_class.reltuples`` for the iocs table;
+* filters the planner expects to match at most COUNT_EXACT_THRESHOLD rows:
+  an exact count;
+* broader filters: the planner's row estimate from ``EXPLAIN``.
+
+Totals are cached in Redis for COUNT_CACHE_TTL seconds under a hash of the
+filter SQL and its parameters, so paging through one search counts once.
+Callers report whether the total is exact.
+"""
+
+import hashlib
+import json
+from typing import Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.config import settings
+from app.models.ioc import IOC
+from app.utils.redis_client import get_async_redis
+
+import structlog
+
+logger = structlog.get_logger()
+
+_CACHE_PREFIX = "ioc_count"
+
+
+class _Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a select, with its bind parameters intact."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _cache_key(count_query) -> str:
+    compiled = count_query.compile(dialect=postgresql.dialect())
+    params = json.dumps(compiled.params, sort_keys=True, default=str)
+    digest = hashlib.sha1(f"{compiled}|{params}".encode()).hexdigest()
+    return f"{_CACHE_PREFIX}:{digest}"
+
+
+async def _cached(key: str) -> Optional[Tuple[int, bool]]:
+    client = await get_async_redis()
+    if client is None:
+        return None
+    try:
+        cached = await client.get(key)
+    except Exception as e:
+        logger.warning("ioc_count_cache_error", error=str(e))
+        return None
+    if cached is None:
+        return None
+    total, exact = json.loads(cached)
+    return total, exact
+
+
+async def _store(key: str, total: int, exact: bool) -> None:
+    client = await get_async_redis()
+    if client is None:
+        return
+    try:
+        await client.set(key, json.dumps([total, exact]), ex=settings.COUNT_CACHE_TTL)
+    except Exception as e:
+        logger.warning("ioc_count_cache_error", error=str(e))
+
+
+async def _table_estimate(db: AsyncSession) -> int:
+    result = await db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'iocs'::regclass")
+    )
+    # -1 (or 0 on older servers) until the table is first analyzed
+    return result.scalar() or -1
+
+
+async def _planner_estimate(db: AsyncSession, count_query) -> int:
+    rows_query = count_query.with_only_columns(IOC.id)
+    plan = (await db.execute(_Explain(rows_query))).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_iocs(db: AsyncSession, count_query) -> Tuple[int, bool]:
+    """(total, exact) for a ``select(func.count(IOC.id)).where(...)`` query."""
+    key = _cache_key(count_query)
+    cached = await _cached(key)
+    if cached is not None:
+        return cached
+
+    if count_query.whereclause is None:
+        estimate = await _table_estimate(db)
+    else:
+        estimate = await _planner_estimate(db, count_query)
+
+    if estimate <= settings.COUNT_EXACT_THRESHOLD:
+        total, exact = (await db.execute(count_query)).scalar() or 0, True
+    else:
+        total, exact = estimate, False
+
+    await _store(key, total, exact)
+    return total, exact
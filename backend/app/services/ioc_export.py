@@ -0,0 +1,104 @@
+"""Streaming IOC export in JSON, NDJSON, CSV and STIX 2.1.
+
+Rows are read through a server-side cursor EXPORT_BATCH_SIZE at a time and
+serialized one batch per chunk, so an export of the whole corpus runs in
+constant memory. Only the exported columns are selected; no ORM objects
+are built or kept in the session.
+"""
+
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, List
+
+from sqlalchemy import desc, select
+
+from app.database import AsyncSessionLocal
+from app.models.ioc import IOC
+from app.utils.stix_converter import STIX_BUNDLE_SUFFIX, ioc_to_stix_indicator, stix_bundle_prefix
+
+EXPORT_BATCH_SIZE = 1000
+
+CSV_FIELDS = ["type", "value", "threat_score", "confidence", "first_seen", "last_seen", "tags"]
+
+EXPORT_MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "stix": "application/json",
+}
+
+_EXPORT_COLUMNS = (
+    IOC.id, IOC.type, IOC.value, IOC.threat_score, IOC.confidence, IOC.first_seen,
+    IOC.last_seen, IOC.sighting_count, IOC.tags, IOC.created_at, IOC.updated_at,
+)
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def export_row(row) -> Dict:
+    """Export dict of one selected IOC row."""
+    return {
+        "id": str(row.id),
+        "type": row.type,
+        "value": row.value,
+        "threat_score": row.threat_score,
+        "confidence": row.confidence,
+        "first_seen": _isoformat(row.first_seen),
+        "last_seen": _isoformat(row.last_seen),
+        "sighting_count": row.sighting_count,
+        "tags": row.tags or [],
+        "created_at": _isoformat(row.created_at),
+        "updated_at": _isoformat(row.updated_at),
+    }
+
+
+def _csv_chunk(rows: List[Dict], header: bool) -> str:
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    for row in rows:
+        writer.writerow({**row, "tags": "|".join(row["tags"])})
+    return output.getvalue()
+
+
+async def _export_batches(conditions: list) -> AsyncIterator[List[Dict]]:
+    query = (
+        select(*_EXPORT_COLUMNS)
+        .where(*conditions)
+        .order_by(desc(IOC.threat_score), desc(IOC.id))
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    # The request's session is closed once the response starts streaming
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query)
+        async for partition in result.partitions():
+            yield [export_row(row) for row in partition]
+
+
+async def stream_export(fmt: str, conditions: list) -> AsyncIterator[str]:
+    """Chunks of an export of every IOC matching ``conditions``, highest score first."""
+    if fmt == "csv":
+        yield _csv_chunk([], header=True)
+        async for rows in _export_batches(conditions):
+            yield _csv_chunk(rows, header=False)
+    elif fmt == "ndjson":
+        async for rows in _export_batches(conditions):
+            yield "".join(json.dumps(row) + "\n" for row in rows)
+    elif fmt == "stix":
+        yield stix_bundle_prefix()
+        separator = ""
+        async for rows in _export_batches(conditions):
+            yield separator + ",".join(json.dumps(ioc_to_stix_indicator(row), default=str) for row in rows)
+            separator = ","
+        yield STIX_BUNDLE_SUFFIX
+    else:
+        yield "["
+        separator = ""
+        async for rows in _export_batches(conditions):
+            yield separator + ",".join(json.dumps(row) for row in rows)
+            separator = ","
+        yield "]"
@@ -0,0 +1,129 @@
+"""Set-based persistence of IOC relationships.
+
+Edges for any number of source IOCs are written as multi-row
+``INSERT ... ON CONFLICT ON CONSTRAINT uq_ioc_relationship DO UPDATE`` statements
+that keep the higher confidence, so a re-discovered edge never loses
+confidence and an unchanged one is not rewritten.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.ioc_relationship import IOCRelationship
+
+# Relationship types without a direction; stored once with the smaller id as source
+SYMMETRIC_TYPES = frozenset({"associated_with", "shares_technique", "same_network"})
+
+DEFAULT_CONFIDENCE = 50
+WRITE_BATCH_SIZE = 5000
+
+
+def relationship_rows(edges: Iterable[Dict]) -> List[Dict]:
+    """Normalize edges to insert rows, one per (source, target, type) with the max confidence.
+
+    A single INSERT ... ON CONFLICT DO UPDATE cannot touch the same row twice,
+    so duplicates within a batch are merged here.
+    """
+    rows: Dict[Tuple[str, str, str], Dict] = {}
+    for edge in edges:
+        source, target = edge["source_ioc_id"], edge["target_ioc_id"]
+        relationship_type = edge["relationship_type"]
+        if str(source) == str(target):
+            continue
+        if relationship_type in SYMMETRIC_TYPES and str(target) < str(source):
+            source, target = target, source
+        confidence = edge.get("confidence")
+        confidence = DEFAULT_CONFIDENCE if confidence is None else confidence
+
+        key = (str(source), str(target), relationship_type)
+        row = rows.get(key)
+        if row is None:
+            rows[key] = {
+                "source_ioc_id": source,
+                "target_ioc_id": target,
+                "relationship_type": relationship_type,
+                "confidence": confidence,
+            }
+        elif confidence > row["confidence"]:
+            row["confidence"] = confidence
+    return list(rows.values())
+
+
+def upsert_statement(rows: List[Dict]):
+    """Multi-row upsert keeping the higher confidence.
+
+    Returns a row for every edge inserted or raised; untouched edges return nothing.
+    """
+    stmt = insert(IOCRelationship).values(rows)
+    return stmt.on_conflict_do_update(
+        constraint="uq_ioc_relationship",
+        set_={
+            "confidence": func.greatest(IOCRelationship.confidence, stmt.excluded.confidence),
+        },
+        where=func.coalesce(IOCRelationship.confidence, -1) < stmt.excluded.confidence,
+    ).returning(
+        # xmax is 0 only for freshly inserted tuples
+        literal_column("(xmax = 0)").label("inserted"),
+    )
+
+
+def _batches(edges: Iterable[Dict], batch_size: int):
+    rows = relationship_rows(edges)
+    for start in range(0, len(rows), batch_size):
+        yield rows[start:start + batch_size]
+
+
+def _count(result) -> Dict[str, int]:
+    inserted = updated = 0
+    for (is_insert,) in result:
+        if is_insert:
+            inserted += 1
+        else:
+            updated += 1
+    return {"inserted": inserted, "updated": updated}
+
+
+def _merge(total: Dict[str, int], part: Dict[str, int]) -> None:
+    for key, value in part.items():
+        total[key] += value
+
+
+async def write_relationships(
+    session: AsyncSession, edges: Iterable[Dict], batch_size: int = WRITE_BATCH_SIZE,
+) -> Dict[str, int]:
+    """Upsert edges (any mix of source IOCs); returns inserted/updated counts."""
+    total = {"inserted": 0, "updated": 0}
+    for rows in _batches(edges, batch_size):
+        _merge(total, _count(await session.execute(upsert_statement(rows))))
+    return total
+
+
+def write_relationships_sync(
+    session: Session,
+    edges: Iterable[Dict],
+    batch_size: int = WRITE_BATCH_SIZE,
+    commit: bool = False,
+) -> Dict[str, int]:
+    """Synchronous write_relationships; ``commit`` commits after every batch."""
+    total = {"inserted": 0, "updated": 0}
+    for rows in _batches(edges, batch_size):
+        _merge(total, _count(session.execute(upsert_statement(rows))))
+        if commit:
+            session.commit()
+    return total
+
+
+def correlation_edges(correlations_by_source: Dict) -> Iterable[Dict]:
+    """Edges from find_correlations results keyed by their source IOC id."""
+    for source_id, correlations in correlations_by_source.items():
+        for corr in correlations:
+            yield {
+                "source_ioc_id": source_id,
+                "target_ioc_id": corr["target_ioc_id"],
+                "relationship_type": corr["relationship_type"],
+                "confidence": corr.get("confidence"),
+            }
@@ -0,0 +1,83 @@
+"""Debounced rescoring of IOCs whose enrichment changed.
+
+Enrichment writers queue IOC ids in a Redis sorted set scored by the time
+of the latest change. A periodic task rescores only ids that have been
+quiet for RESCORE_DEBOUNCE_SECONDS, so a burst of enrichers landing for one
+IOC costs one rescore. Without Redis the caller's session rescores inline.
+Either way only the enrichment component is recomputed; the threat score is
+recomposed from the other cached components.
+"""
+
+import time
+from typing import Dict, Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.services.rescoring import rescore_enrichment_sync
+from app.services.scoring_profiles import ensure_active_profile
+from app.utils.redis_client import get_async_redis, get_sync_redis
+
+import structlog
+
+logger = structlog.get_logger()
+
+PENDING_KEY = "rescore:pending"
+
+# Atomically take up to ARGV[2] ids last touched at or before ARGV[1]
+_POP_SETTLED = """
+local ids = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, ARGV[2])
+if #ids > 0 then
+    redis.call("ZREM", KEYS[1], unpack(ids))
+end
+return ids
+"""
+
+
+async def queue_rescore(session: AsyncSession, ioc_ids: Iterable) -> None:
+    """Mark IOCs for rescoring after their enrichment changed."""
+    ids = [str(i) for i in ioc_ids]
+    if not ids:
+        return
+
+    client = await get_async_redis()
+    if client is not None:
+        try:
+            now = time.time()
+            await client.zadd(PENDING_KEY, {ioc_id: now for ioc_id in ids})
+            return
+        except Exception as e:
+            logger.warning("rescore_queue_unavailable", error=str(e))
+
+    # No queue: rescore now, in the same transaction as the enrichment writes
+    await ensure_active_profile(session)
+    await session.run_sync(lambda sync_session: rescore_enrichment_sync(sync_session, ids))
+
+
+def drain_rescore_queue(session: Session, batch_size: int = 1000) -> Dict[str, int]:
+    """Rescore queued IOCs whose enrichment has settled, one batch per commit."""
+    client = get_sync_redis()
+    if client is None:
+        return {"rescored": 0, "changed": 0}
+
+    pop = client.register_script(_POP_SETTLED)
+    rescored = changed = 0
+    while True:
+        cutoff = time.time() - settings.RESCORE_DEBOUNCE_SECONDS
+        ids = [i.decode() if isinstance(i, bytes) else i for i in pop(keys=[PENDING_KEY], args=[cutoff, batch_size])]
+        if not ids:
+            break
+        try:
+            changed += rescore_enrichment_sync(session, ids)
+            session.commit()
+        except Exception:
+            session.rollback()
+            # Put the batch back so the next run retries it
+            client.zadd(PENDING_KEY, {ioc_id: cutoff for ioc_id in ids})
+            raise
+        rescored += len(ids)
+
+    if rescored:
+        logger.info("rescore_queue_drained", rescored=rescored, changed=changed)
+    return {"rescored": rescored, "changed": changed}
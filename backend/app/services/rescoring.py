@@ -0,0 +1,677 @@
+"""Bulk threat score recomputation for IOCs already in the database.
+
+Scoring inputs are loaded a batch at a time in columnar form (tag and
+technique flags are derived in SQL), all six components are computed with
+NumPy array operations, and only changed scores are written back with one
+set-based UPDATE per batch. Component scores are cached on each IOC so a
+weights-only profile change is a single SQL pass (``recompose_scores``).
+``compute_scores`` mirrors
+``scoring_engine.calculate_threat_score`` exactly; ``check_parity`` verifies
+that on a sample of live rows, along with the SQL functions from
+``scoring_sql`` that back ``rescore_all_in_database``.
+"""
+
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.ioc import IOC
+from app.services.scoring_engine import (
+    COMPONENTS,
+    CompiledProfile,
+    DEFAULT_REPUTATION_SCORE,
+    DIVERSITY_BUCKETS, DIVERSITY_DEFAULT,
+    RECENCY_BUCKETS, RECENCY_DEFAULT, RECENCY_UNKNOWN,
+    FREQUENCY_BUCKETS, FREQUENCY_DEFAULT,
+    ENRICHMENT_DEFAULT,
+    HIGH_RISK_TAG_SCORE, MEDIUM_RISK_TAG_SCORE,
+    TECHNIQUE_SCORE, TECHNIQUE_SCORE_CAP,
+    calculate_threat_score,
+    enrichment_signals,
+    get_active_profile,
+)
+
+import structlog
+
+logger = structlog.get_logger()
+
+DEFAULT_BATCH_SIZE = 5000
+RECOMPOSE_BATCH_SIZE = 50000
+
+COMPONENT_COLUMNS = tuple(f"score_{name}" for name in COMPONENTS)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+_ENRICHMENT_FIELDS = ("country_code", "privacy_protected", "creation_date", "fast_flux", "aggregate_score")
+
+_LOAD_COLUMNS = """
+    SELECT i.id,
+           COALESCE(i.threat_score, 0) AS threat_score,
+           i.metadata -> 'reputation_scores' AS reputation_scores,
+           (EXTRACT(EPOCH FROM i.last_seen) * 1000000)::bigint AS last_seen_us,
+           COALESCE(i.sighting_count, 1) AS sighting_count,
+           (SELECT count(*) FROM ioc_sources s WHERE s.ioc_id = i.id) AS source_count,
+           EXISTS (SELECT 1 FROM unnest(i.tags) t WHERE lower(t) = ANY(:high_risk_tags)) AS high_risk_tag,
+           EXISTS (SELECT 1 FROM unnest(i.tags) t WHERE lower(t) = ANY(:medium_risk_tags)) AS medium_risk_tag,
+           COALESCE(cardinality(i.mitre_techniques), 0) AS technique_count,
+           (EXTRACT(EPOCH FROM i.next_rescore_at) * 1000000)::bigint AS next_rescore_us,
+           i.score_reputation, i.score_diversity, i.score_recency,
+           i.score_frequency, i.score_enrichment, i.score_context,
+           i.score_profile, i.score_profile_version
+    FROM iocs i
+"""
+
+_LOAD_ENRICHMENT = """
+    SELECT e.ioc_id, e.source,
+           e.data -> 'country_code', e.data -> 'privacy_protected', e.data -> 'creation_date',
+           e.data -> 'fast_flux', e.data -> 'aggregate_score'
+    FROM enrichments e
+    WHERE e.ioc_id = ANY(CAST(:ids AS uuid[]))
+      AND e.source IN ('geoip', 'whois', 'dns', 'reputation')
+"""
+
+_WRITE_SCORES = """
+    UPDATE iocs SET threat_score = v.score, next_rescore_at = v.next_rescore_at,
+           score_reputation = v.reputation, score_diversity = v.diversity,
+           score_recency = v.recency, score_frequency = v.frequency,
+           score_enrichment = v.enrichment, score_context = v.context,
+           score_profile = :profile, score_profile_version = :profile_version, scored_at = :now
+    FROM unnest(
+        CAST(:ids AS uuid[]), CAST(:scores AS integer[]), CAST(:next_rescore_at AS timestamptz[]),
+        CAST(:reputation AS float8[]), CAST(:diversity AS float8[]), CAST(:recency AS float8[]),
+        CAST(:frequency AS float8[]), CAST(:enrichment AS float8[]), CAST(:context AS float8[])
+    ) AS v(id, score, next_rescore_at, reputation, diversity, recency, frequency, enrichment, context)
+    WHERE iocs.id = v.id
+"""
+
+_WRITE_ENRICHMENT = """
+    UPDATE iocs SET score_enrichment = v.enrichment, scored_at = :now
+    FROM unnest(CAST(:ids AS uuid[]), CAST(:enrichment AS float8[])) AS v(id, enrichment)
+    WHERE iocs.id = v.id
+"""
+
+# {score} is a composite over the cached components (see _recompose_sql)
+_RECOMPOSE_IOCS = """
+    UPDATE iocs SET threat_score = b.score
+    FROM (SELECT i.id, {score} AS score FROM iocs i WHERE i.id = ANY(CAST(:ids AS uuid[]))) b
+    WHERE iocs.id = b.id AND iocs.threat_score IS DISTINCT FROM b.score
+    RETURNING iocs.id
+"""
+
+# Scores one keyset batch entirely in PostgreSQL (see scoring_sql)
+_SQL_RESCORE_BATCH = """
+    WITH batch AS (
+        SELECT i.id,
+               sentinel_ioc_components(i.id, :now) AS c,
+               sentinel_next_rescore_at(i.last_seen, :now) AS next_rescore_at
+        FROM iocs i {where}
+        ORDER BY i.id LIMIT :limit
+    ), scored AS (
+        SELECT b.*, sentinel_composite_score(b.c) AS score FROM batch b
+    ), updated AS (
+        UPDATE iocs SET threat_score = s.score, next_rescore_at = s.next_rescore_at,
+               score_reputation = s.c[1], score_diversity = s.c[2], score_recency = s.c[3],
+               score_frequency = s.c[4], score_enrichment = s.c[5], score_context = s.c[6],
+               score_profile = :profile, score_profile_version = :profile_version, scored_at = :now
+        FROM scored s
+        WHERE iocs.id = s.id
+          AND (iocs.threat_score IS DISTINCT FROM s.score
+               OR iocs.next_rescore_at IS DISTINCT FROM s.next_rescore_at
+               OR iocs.score_profile IS DISTINCT FROM :profile
+               OR iocs.score_profile_version IS DISTINCT FROM :profile_version
+               OR ARRAY[iocs.score_reputation, iocs.score_diversity, iocs.score_recency,
+                        iocs.score_frequency, iocs.score_enrichment, iocs.score_context]
+                  IS DISTINCT FROM s.c)
+        RETURNING iocs.id
+    )
+    SELECT (SELECT id FROM batch ORDER BY id DESC LIMIT 1) AS last_id,
+           (SELECT count(*) FROM batch) AS scanned,
+           (SELECT count(*) FROM updated) AS updated
+"""
+
+# Sentinel for "no further recency boundary" in microsecond arrays
+_NO_BOUNDARY = -1
+
+
+def rescore_all_sync(
+    session: Session,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    now: Optional[datetime] = None,
+    profile: Optional[CompiledProfile] = None,
+) -> Dict[str, int]:
+    """Rescore every IOC, walking the table in primary-key order and committing per batch."""
+    now = now or datetime.now(timezone.utc)
+    profile = profile or get_active_profile()
+    scanned = changed = 0
+    last_id = None
+
+    while True:
+        where = "WHERE i.id > CAST(:after AS uuid)" if last_id else ""
+        columns = _load_columns(
+            session,
+            f"{_LOAD_COLUMNS} {where} ORDER BY i.id LIMIT :limit",
+            {"after": str(last_id) if last_id else None, "limit": batch_size},
+            profile,
+        )
+        if not columns["id"]:
+            break
+
+        changed += _score_and_write(session, columns, now, profile)
+        session.commit()
+        scanned += len(columns["id"])
+        last_id = columns["id"][-1]
+
+    logger.info("bulk_rescore_complete", scanned=scanned, changed=changed, profile=profile.name)
+    return {"scanned": scanned, "changed": changed}
+
+
+def rescore_all_in_database(
+    session: Session,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    now: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """Rescore every IOC with the SQL scoring functions, without loading rows into Python.
+
+    The functions must have been installed for the active profile.
+    """
+    now = now or datetime.now(timezone.utc)
+    profile = get_active_profile()
+    scanned = updated = 0
+    last_id = None
+
+    while True:
+        where = "WHERE i.id > CAST(:after AS uuid)" if last_id else ""
+        row = session.execute(
+            text(_SQL_RESCORE_BATCH.format(where=where)),
+            {
+                "now": now, "after": str(last_id) if last_id else None, "limit": batch_size,
+                "profile": profile.name, "profile_version": profile.version,
+            },
+        ).one()
+        session.commit()
+        if not row.scanned:
+            break
+        scanned += row.scanned
+        updated += row.updated
+        last_id = row.last_id
+
+    logger.info("sql_rescore_complete", scanned=scanned, updated=updated)
+    return {"scanned": scanned, "updated": updated}
+
+
+def recompose_scores(
+    session: Session,
+    profile: Optional[CompiledProfile] = None,
+    batch_size: int = RECOMPOSE_BATCH_SIZE,
+) -> Dict[str, int]:
+    """Recompute threat_score from cached component scores under new weights.
+
+    Only valid when the profile derives the same components as the one that
+    produced them (see CompiledProfile.same_components). IOCs without cached
+    components (scores supplied by a feed) are left alone.
+    """
+    profile = profile or get_active_profile()
+    score, weights = _recompose_sql(profile)
+    params: Dict[str, Any] = {
+        **weights,
+        "limit": batch_size, "profile": profile.name, "profile_version": profile.version,
+        "now": datetime.now(timezone.utc),
+    }
+
+    scanned = updated = 0
+    last_id = None
+    while True:
+        where = "WHERE i.id > CAST(:after AS uuid)" if last_id else ""
+        row = session.execute(
+            text(f"""
+                WITH batch AS (
+                    SELECT i.id, i.score_reputation IS NOT NULL AS cached,
+                           {score} AS score
+                    FROM iocs i {where}
+                    ORDER BY i.id LIMIT :limit
+                ), updated AS (
+                    UPDATE iocs SET threat_score = b.score, score_profile = :profile,
+                           score_profile_version = :profile_version, scored_at = :now
+                    FROM batch b
+                    WHERE iocs.id = b.id AND b.cached
+                      AND (iocs.threat_score IS DISTINCT FROM b.score
+                           OR iocs.score_profile IS DISTINCT FROM :profile
+                           OR iocs.score_profile_version IS DISTINCT FROM :profile_version)
+                    RETURNING iocs.id
+                )
+                SELECT (SELECT id FROM batch ORDER BY id DESC LIMIT 1) AS last_id,
+                       (SELECT count(*) FROM batch) AS scanned,
+                       (SELECT count(*) FROM updated) AS updated
+            """),
+            {**params, "after": str(last_id) if last_id else None},
+        ).one()
+        session.commit()
+        if not row.scanned:
+            break
+        scanned += row.scanned
+        updated += row.updated
+        last_id = row.last_id
+
+    logger.info("scores_recomposed", scanned=scanned, updated=updated, profile=profile.name)
+    return {"scanned": scanned, "updated": updated}
+
+
+def _recompose_sql(profile: CompiledProfile) -> Tuple[str, Dict[str, float]]:
+    """composite_score over the cached components of ``iocs i`` in SQL, and its weight params."""
+    # Accumulate in weight order with float8 arithmetic, matching composite_score
+    composite = "CAST(0.0 AS double precision)"
+    weights = {}
+    for name, weight in profile.weights:
+        composite = f"({composite} + i.score_{name} * CAST(:w_{name} AS double precision))"
+        weights[f"w_{name}"] = weight
+    return f"GREATEST(0, LEAST(100, round({composite})))::integer", weights
+
+
+def rescore_enrichment_sync(
+    session: Session,
+    ioc_ids: List,
+    now: Optional[datetime] = None,
+    profile: Optional[CompiledProfile] = None,
+) -> int:
+    """Refresh the enrichment component of specific IOCs and recompose their scores.
+
+    Enrichment records feed only score_enrichment, so the other cached
+    components are kept. IOCs without components cached under the active
+    profile are rescored in full. Returns how many scores changed.
+    """
+    now = now or datetime.now(timezone.utc)
+    profile = profile or get_active_profile()
+    rows = session.execute(
+        text("""
+            SELECT id, (score_reputation IS NOT NULL AND score_profile = :profile
+                        AND score_profile_version = :profile_version) AS cached
+            FROM iocs WHERE id = ANY(CAST(:ids AS uuid[]))
+        """),
+        {"ids": [str(i) for i in ioc_ids], "profile": profile.name, "profile_version": profile.version},
+    ).all()
+    cached = [str(row.id) for row in rows if row.cached]
+    uncached = [str(row.id) for row in rows if not row.cached]
+
+    changed = rescore_iocs_sync(session, uncached, now, profile=profile) if uncached else 0
+    if not cached:
+        return changed
+
+    signals = _load_enrichment_signals(session, cached, now, profile)
+    session.execute(
+        text(_WRITE_ENRICHMENT),
+        {"ids": cached, "enrichment": compute_enrichment(signals["risk"], signals["total"]).tolist(), "now": now},
+    )
+    score, weights = _recompose_sql(profile)
+    recomposed = session.execute(
+        text(_RECOMPOSE_IOCS.format(score=score)), {**weights, "ids": cached},
+    ).all()
+    changed += len(recomposed)
+    session.flush()
+
+    logger.info("enrichment_rescored", requested=len(rows), changed=changed)
+    return changed
+
+
+def rescore_due_sync(
+    session: Session,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    now: Optional[datetime] = None,
+    profile: Optional[CompiledProfile] = None,
+) -> Dict[str, int]:
+    """Rescore IOCs whose recency bucket boundary has passed.
+
+    Work is proportional to bucket transitions: each rescored row gets its
+    next boundary (or NULL once it reaches the oldest bucket), so it drops
+    out of the indexed next_rescore_at <= now scan until then.
+    """
+    now = now or datetime.now(timezone.utc)
+    profile = profile or get_active_profile()
+    scanned = changed = 0
+
+    while True:
+        columns = _load_columns(
+            session,
+            f"{_LOAD_COLUMNS} WHERE i.next_rescore_at <= :now "
+            "ORDER BY i.next_rescore_at LIMIT :limit",
+            {"now": now, "limit": batch_size},
+            profile,
+        )
+        if not columns["id"]:
+            break
+
+        # Due rows always move to a later boundary (or NULL), so this terminates
+        changed += _score_and_write(session, columns, now, profile)
+        session.commit()
+        scanned += len(columns["id"])
+
+    logger.info("decay_rescore_complete", due=scanned, changed=changed)
+    return {"due": scanned, "changed": changed}
+
+
+def rescore_iocs_sync(
+    session: Session,
+    ioc_ids: List,
+    now: Optional[datetime] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    profile: Optional[CompiledProfile] = None,
+) -> int:
+    """Recompute threat scores for specific IOCs. Returns how many changed."""
+    now = now or datetime.now(timezone.utc)
+    profile = profile or get_active_profile()
+    ids = [str(i) for i in ioc_ids]
+    changed = 0
+
+    for start in range(0, len(ids), batch_size):
+        columns = _load_columns(
+            session,
+            f"{_LOAD_COLUMNS} WHERE i.id = ANY(CAST(:ids AS uuid[]))",
+            {"ids": ids[start:start + batch_size]},
+            profile,
+        )
+        if columns["id"]:
+            changed += _score_and_write(session, columns, now, profile)
+    session.flush()
+
+    logger.info("iocs_rescored", requested=len(ids), changed=changed)
+    return changed
+
+
+def _load_columns(
+    session: Session, sql: str, params: Dict[str, Any], profile: CompiledProfile
+) -> Dict[str, Any]:
+    """Load one batch of scoring inputs as parallel arrays."""
+    params = {
+        **params,
+        "high_risk_tags": sorted(profile.high_risk_tags),
+        "medium_risk_tags": sorted(profile.medium_risk_tags),
+    }
+    rows = session.execute(text(sql), params).all()
+
+    n = len(rows)
+    columns = {
+        "id": [row.id for row in rows],
+        "threat_score": np.fromiter((row.threat_score for row in rows), dtype=np.int64, count=n),
+        "reputation_avg": np.fromiter(
+            (_reputation_average(row.reputation_scores) for row in rows), dtype=np.float64, count=n
+        ),
+        "last_seen_known": np.fromiter((row.last_seen_us is not None for row in rows), dtype=bool, count=n),
+        "last_seen_us": np.fromiter((row.last_seen_us or 0 for row in rows), dtype=np.int64, count=n),
+        "sighting_count": np.fromiter((row.sighting_count for row in rows), dtype=np.int64, count=n),
+        "source_count": np.fromiter((row.source_count for row in rows), dtype=np.int64, count=n),
+        "high_risk_tag": np.fromiter((row.high_risk_tag for row in rows), dtype=bool, count=n),
+        "medium_risk_tag": np.fromiter((row.medium_risk_tag for row in rows), dtype=bool, count=n),
+        "technique_count": np.fromiter((row.technique_count for row in rows), dtype=np.int64, count=n),
+        "next_rescore_us": np.fromiter(
+            (_NO_BOUNDARY if row.next_rescore_us is None else row.next_rescore_us for row in rows),
+            dtype=np.int64, count=n,
+        ),
+        # Cached components as an (n, 6) matrix, NaN where never computed
+        "cached_components": np.array(
+            [[np.nan if getattr(row, c) is None else getattr(row, c) for c in COMPONENT_COLUMNS] for row in rows],
+            dtype=np.float64,
+        ).reshape(n, len(COMPONENT_COLUMNS)),
+        "scored_by": np.fromiter(
+            ((row.score_profile, row.score_profile_version) == (profile.name, profile.version) for row in rows),
+            dtype=bool, count=n,
+        ),
+    }
+    return columns
+
+
+def _load_enrichment_signals(
+    session: Session, ids: List, now: datetime, profile: CompiledProfile
+) -> Dict[str, np.ndarray]:
+    """Sum per-IOC (risk, possible) enrichment signals for a batch."""
+    position = {str(ioc_id): i for i, ioc_id in enumerate(ids)}
+    risk = np.zeros(len(ids), dtype=np.int64)
+    total = np.zeros(len(ids), dtype=np.int64)
+
+    rows = session.execute(text(_LOAD_ENRICHMENT), {"ids": list(position)}).all()
+    for row in rows:
+        # Absent keys and JSON nulls both fall back to the scalar path's defaults
+        data = {k: v for k, v in zip(_ENRICHMENT_FIELDS, row[2:]) if v is not None}
+        r, t = enrichment_signals(row.source, data, now, profile.high_risk_countries)
+        i = position[str(row.ioc_id)]
+        risk[i] += r
+        total[i] += t
+
+    return {"risk": risk, "total": total}
+
+
+def _score_and_write(
+    session: Session, columns: Dict[str, Any], now: datetime, profile: CompiledProfile
+) -> int:
+    """Score a loaded batch and persist rows whose score, components or next boundary changed.
+
+    Returns the number of scores that changed.
+    """
+    columns.update(_load_enrichment_signals(session, columns["id"], now, profile))
+    components = compute_components(columns, now, profile)
+    scores = compose(components, profile)
+    next_rescore = compute_next_rescore(columns, now)
+
+    score_changed = scores != columns["threat_score"]
+    dirty = (
+        score_changed
+        | (next_rescore != columns["next_rescore_us"])
+        # NaN never compares equal, so rows without cached components are written
+        | ~np.all(components == columns["cached_components"], axis=1)
+        | ~columns["scored_by"]
+    )
+    if not dirty.any():
+        return 0
+
+    params = {
+        "now": now,
+        "profile": profile.name,
+        "profile_version": profile.version,
+        "ids": [str(i) for i, d in zip(columns["id"], dirty) if d],
+        "scores": scores[dirty].tolist(),
+        "next_rescore_at": [
+            None if us == _NO_BOUNDARY else _EPOCH + timedelta(microseconds=us)
+            for us in next_rescore[dirty].tolist()
+        ],
+    }
+    for position, name in enumerate(COMPONENTS):
+        params[name] = components[dirty, position].tolist()
+    session.execute(text(_WRITE_SCORES), params)
+    return int(score_changed.sum())
+
+
+def compute_next_rescore(columns: Dict[str, np.ndarray], now: datetime) -> np.ndarray:
+    """Vectorized next_recency_boundary, in epoch microseconds (-1 for none)."""
+    now_us = (now - _EPOCH) // _ONE_US
+    last_seen = columns["last_seen_us"]
+    boundaries = [last_seen + max_age // _ONE_US for max_age, _ in RECENCY_BUCKETS]
+    next_rescore = np.select(
+        [b > now_us for b in boundaries], boundaries, default=_NO_BOUNDARY
+    )
+    return np.where(columns["last_seen_known"], next_rescore, _NO_BOUNDARY)
+
+
+def compute_scores(
+    columns: Dict[str, np.ndarray], now: datetime, profile: Optional[CompiledProfile] = None
+) -> np.ndarray:
+    """Vectorized calculate_threat_score over a columnar batch."""
+    profile = profile or get_active_profile()
+    return compose(compute_components(columns, now, profile), profile)
+
+
+def compose(components: np.ndarray, profile: CompiledProfile) -> np.ndarray:
+    """Vectorized composite_score over an (n, 6) component matrix."""
+    # Same summation order as the scalar path so floating-point results match
+    composite = np.zeros(len(components))
+    for position, (_, weight) in enumerate(profile.weights):
+        composite = composite + components[:, position] * weight
+
+    # np.rint rounds half to even, like Python's round()
+    return np.clip(np.rint(composite), 0, 100).astype(np.int64)
+
+
+def compute_components(
+    columns: Dict[str, np.ndarray], now: datetime, profile: CompiledProfile
+) -> np.ndarray:
+    """Vectorized score_components; returns an (n, 6) matrix in COMPONENTS order."""
+    threat_score = columns["threat_score"].astype(np.float64)
+
+    base_reputation = columns["cached_components"][:, 0]
+    reputation = np.select(
+        [~np.isnan(columns["reputation_avg"]), ~np.isnan(base_reputation), threat_score > 0],
+        [columns["reputation_avg"], base_reputation, threat_score],
+        default=DEFAULT_REPUTATION_SCORE,
+    )
+
+    source_count = columns["source_count"]
+    if profile.total_feeds == 0:
+        diversity = np.zeros(len(source_count))
+    else:
+        diversity = np.select(
+            [source_count >= minimum for minimum, _ in DIVERSITY_BUCKETS],
+            [score for _, score in DIVERSITY_BUCKETS],
+            default=DIVERSITY_DEFAULT,
+        )
+
+    age_us = (now - _EPOCH) // _ONE_US - columns["last_seen_us"]
+    recency = np.select(
+        [age_us < max_age // _ONE_US for max_age, _ in RECENCY_BUCKETS],
+        [score for _, score in RECENCY_BUCKETS],
+        default=RECENCY_DEFAULT,
+    )
+    recency = np.where(columns["last_seen_known"], recency, RECENCY_UNKNOWN)
+
+    sightings = columns["sighting_count"]
+    frequency = np.select(
+        [sightings >= minimum for minimum, _ in FREQUENCY_BUCKETS],
+        [score for _, score in FREQUENCY_BUCKETS],
+        default=FREQUENCY_DEFAULT,
+    )
+
+    enrichment = compute_enrichment(columns["risk"], columns["total"])
+
+    context = (
+        0.0
+        + np.where(columns["high_risk_tag"], HIGH_RISK_TAG_SCORE, 0.0)
+        + np.where(columns["medium_risk_tag"], MEDIUM_RISK_TAG_SCORE, 0.0)
+        + np.minimum(TECHNIQUE_SCORE_CAP, columns["technique_count"] * TECHNIQUE_SCORE)
+    )
+    context = np.minimum(100.0, context)
+
+    return np.column_stack(
+        [np.asarray(c, dtype=np.float64) for c in
+         (reputation, diversity, recency, frequency, enrichment, context)]
+    ).reshape(len(enrichment), len(COMPONENTS))
+
+
+def compute_enrichment(risk: np.ndarray, total: np.ndarray) -> np.ndarray:
+    """Vectorized enrichment component from summed (risk, possible) signals."""
+    enrichment = np.full(len(risk), ENRICHMENT_DEFAULT)
+    has_signals = total > 0
+    enrichment[has_signals] = np.minimum(
+        100.0, (risk[has_signals] / total[has_signals]) * 100
+    )
+    return enrichment
+
+
+def _reputation_average(reputation_scores: Any) -> float:
+    """Mean of metadata.reputation_scores, or NaN when absent/empty."""
+    if not reputation_scores or not isinstance(reputation_scores, dict):
+        return np.nan
+    return sum(reputation_scores.values()) / len(reputation_scores)
+
+
+def scoring_input(ioc: IOC) -> Dict[str, Any]:
+    """Build the calculate_threat_score input dict for a stored IOC."""
+    return {
+        "type": ioc.type,
+        "value": ioc.value,
+        "threat_score": ioc.threat_score or 0,
+        "tags": ioc.tags or [],
+        "mitre_techniques": ioc.mitre_techniques or [],
+        "last_seen": ioc.last_seen,
+        "sighting_count": ioc.sighting_count or 1,
+        "metadata": ioc.metadata_,
+        "score_reputation": ioc.score_reputation,
+    }
+
+
+def check_parity(
+    session: Session,
+    sample_size: int = 500,
+    profile: Optional[CompiledProfile] = None,
+) -> List[Dict[str, Any]]:
+    """Compare the vectorized and SQL paths against calculate_threat_score on sampled rows.
+
+    The SQL path is checked only when its functions are installed. Returns
+    the mismatching rows (empty when all paths agree).
+    """
+    from collections import defaultdict
+    from sqlalchemy import func
+    from app.models.enrichment import Enrichment
+    from app.models.ioc_source import IOCSource
+
+    now = datetime.now(timezone.utc)
+    profile = profile or get_active_profile()
+    iocs = session.query(IOC).order_by(func.random()).limit(sample_size).all()
+    if not iocs:
+        return []
+    ids = [ioc.id for ioc in iocs]
+
+    source_counts = dict(
+        session.query(IOCSource.ioc_id, func.count(IOCSource.id))
+        .filter(IOCSource.ioc_id.in_(ids))
+        .group_by(IOCSource.ioc_id)
+        .all()
+    )
+    enrichments = defaultdict(list)
+    for row in session.query(Enrichment).filter(Enrichment.ioc_id.in_(ids)):
+        enrichments[row.ioc_id].append({"source": row.source, "data": row.data})
+
+    columns = _load_columns(
+        session,
+        f"{_LOAD_COLUMNS} WHERE i.id = ANY(CAST(:ids AS uuid[]))",
+        {"ids": [str(i) for i in ids]},
+        profile,
+    )
+    columns.update(_load_enrichment_signals(session, columns["id"], now, profile))
+    vectorized = dict(zip(
+        (str(i) for i in columns["id"]), compute_scores(columns, now, profile).tolist()
+    ))
+
+    in_database: Dict[str, int] = {}
+    if scoring_functions_installed(session):
+        rows = session.execute(
+            text("SELECT id, sentinel_score_ioc(id, :now) FROM iocs WHERE id = ANY(CAST(:ids AS uuid[]))"),
+            {"now": now, "ids": [str(i) for i in ids]},
+        ).all()
+        in_database = {str(ioc_id): score for ioc_id, score in rows}
+
+    mismatches = []
+    for ioc in iocs:
+        scalar = calculate_threat_score(
+            scoring_input(ioc),
+            source_count=source_counts.get(ioc.id, 0),
+            enrichment_data=enrichments.get(ioc.id),
+            now=now,
+            profile=profile,
+        )
+        key = str(ioc.id)
+        if scalar != vectorized.get(key) or (in_database and scalar != in_database.get(key)):
+            mismatches.append({
+                "id": key,
+                "scalar": scalar,
+                "vectorized": vectorized.get(key),
+                "sql": in_database.get(key),
+            })
+
+    if mismatches:
+        logger.error("scoring_parity_mismatch", count=len(mismatches), sample=mismatches[:5])
+    return mismatches
+
+
+def scoring_functions_installed(session: Session) -> bool:
+    return session.execute(
+        text("SELECT to_regprocedure('sentinel_score_ioc(uuid, timestamptz)') IS NOT NULL")
+    ).scalar()
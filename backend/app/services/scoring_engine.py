@@ -1,6 +1,8 @@
 """IOC threat scoring engine.
 
-Calculates a composite threat score (0-100) based on multiple factors:
+Calculates a composite threat score (0-100) based on multiple factors
+(default weights shown; a scoring profile can override weights, risk tag
+and country sets, and the feed count):
 - Base reputation from feeds (30%)
 - Source diversity (20%) 
 - Recency (15%)
@@ -10,33 +12,175 @@ Calculates a composite threat score (0-100) based on multiple factors:
 """
 
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional, Tuple
+
+# Component weights; the composite is summed in this order
+WEIGHTS = (
+    ("reputation", 0.30),
+    ("diversity", 0.20),
+    ("recency", 0.15),
+    ("frequency", 0.15),
+    ("enrichment", 0.10),
+    ("context", 0.10),
+)
+
+DEFAULT_REPUTATION_SCORE = 30.0
+
+# (minimum source count, score), checked in order
+DIVERSITY_BUCKETS = ((5, 100.0), (3, 80.0), (2, 60.0))
+DIVERSITY_DEFAULT = 30.0
+
+# (maximum age, score), checked in order
+RECENCY_BUCKETS = (
+    (timedelta(hours=1), 100.0),
+    (timedelta(hours=24), 85.0),
+    (timedelta(days=7), 65.0),
+    (timedelta(days=30), 40.0),
+    (timedelta(days=90), 20.0),
+)
+RECENCY_DEFAULT = 5.0
+RECENCY_UNKNOWN = 20.0
+
+# (minimum sightings, score), checked in order
+FREQUENCY_BUCKETS = (
+    (100, 100.0), (50, 85.0), (20, 70.0), (10, 55.0), (5, 40.0), (2, 25.0),
+)
+FREQUENCY_DEFAULT = 10.0
+
+ENRICHMENT_DEFAULT = 20.0
+HIGH_RISK_COUNTRIES = frozenset({"RU", "CN", "KP", "IR"})
+NEW_DOMAIN_DAYS = 30
+
+HIGH_RISK_TAGS = frozenset({"apt", "ransomware", "c2", "c&c", "botnet", "exploit", "zero-day"})
+MEDIUM_RISK_TAGS = frozenset({"malware", "phishing", "trojan", "backdoor", "dropper"})
+HIGH_RISK_TAG_SCORE = 50.0
+MEDIUM_RISK_TAG_SCORE = 30.0
+TECHNIQUE_SCORE = 10.0
+TECHNIQUE_SCORE_CAP = 50.0
+
+DEFAULT_TOTAL_FEEDS = 10
+
+COMPONENTS = tuple(name for name, _ in WEIGHTS)
+
+
+class CompiledProfile:
+    """A scoring profile resolved into the weight table and lookup sets the scorers use.
+
+    Unset fields fall back to the module defaults above. Weights may name any
+    subset of COMPONENTS; the compiled table always lists all six in order.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        weights: Optional[Dict[str, float]] = None,
+        high_risk_tags: Optional[Iterable[str]] = None,
+        medium_risk_tags: Optional[Iterable[str]] = None,
+        high_risk_countries: Optional[Iterable[str]] = None,
+        total_feeds: Optional[int] = None,
+        version: int = 0,
+    ):
+        merged = dict(WEIGHTS)
+        for component, weight in (weights or {}).items():
+            if component not in merged:
+                raise ValueError(f"Unknown scoring component: {component}")
+            if weight < 0:
+                raise ValueError(f"Weight for {component} must not be negative")
+            merged[component] = float(weight)
+
+        self.name = name
+        self.version = version
+        self.weights: Tuple[Tuple[str, float], ...] = tuple((c, merged[c]) for c in COMPONENTS)
+        self.high_risk_tags = (
+            HIGH_RISK_TAGS if high_risk_tags is None else frozenset(t.lower() for t in high_risk_tags)
+        )
+        self.medium_risk_tags = (
+            MEDIUM_RISK_TAGS if medium_risk_tags is None else frozenset(t.lower() for t in medium_risk_tags)
+        )
+        self.high_risk_countries = (
+            HIGH_RISK_COUNTRIES if high_risk_countries is None
+            else frozenset(c.upper() for c in high_risk_countries)
+        )
+        self.total_feeds = DEFAULT_TOTAL_FEEDS if total_feeds is None else total_feeds
+
+    def same_components(self, other: "CompiledProfile") -> bool:
+        """True if both profiles derive identical component scores (only weights may differ)."""
+        return (
+            self.high_risk_tags == other.high_risk_tags
+            and self.medium_risk_tags == other.medium_risk_tags
+            and self.high_risk_countries == other.high_risk_countries
+            and (self.total_feeds == 0) == (other.total_feeds == 0)
+        )
+
+    def __repr__(self):
+        return f"<CompiledProfile(name={self.name}, version={self.version})>"
+
+
+DEFAULT_PROFILE = CompiledProfile()
+_active_profile = DEFAULT_PROFILE
+
+
+def get_active_profile() -> CompiledProfile:
+    """The profile scoring uses when none is passed explicitly."""
+    return _active_profile
+
+
+def set_active_profile(profile: CompiledProfile) -> None:
+    global _active_profile
+    _active_profile = profile
 
 
 def calculate_threat_score(
     ioc_data: Dict[str, Any],
     source_count: int = 1,
-    total_feeds: int = 10,
+    total_feeds: Optional[int] = None,
     enrichment_data: Optional[List[Dict]] = None,
+    now: Optional[datetime] = None,
+    profile: Optional[CompiledProfile] = None,
 ) -> int:
     """Calculate composite threat score for an IOC."""
-    
-    base_score = _base_reputation_score(ioc_data)
-    diversity_score = _source_diversity_score(source_count, total_feeds)
-    recency = _recency_score(ioc_data.get("last_seen"))
-    frequency = _sighting_frequency_score(ioc_data.get("sighting_count", 1))
-    enrichment = _enrichment_risk_score(enrichment_data or [])
-    context = _context_score(ioc_data.get("tags", []), ioc_data.get("mitre_techniques", []))
-
-    composite = (
-        base_score * 0.30
-        + diversity_score * 0.20
-        + recency * 0.15
-        + frequency * 0.15
-        + enrichment * 0.10
-        + context * 0.10
+    profile = profile or _active_profile
+    components = score_components(
+        ioc_data, source_count, total_feeds, enrichment_data, now, profile
     )
+    return composite_score(components, profile)
+
 
+def score_components(
+    ioc_data: Dict[str, Any],
+    source_count: int = 1,
+    total_feeds: Optional[int] = None,
+    enrichment_data: Optional[List[Dict]] = None,
+    now: Optional[datetime] = None,
+    profile: Optional[CompiledProfile] = None,
+) -> Dict[str, float]:
+    """The six component scores (0-100) for an IOC, keyed in COMPONENTS order."""
+    profile = profile or _active_profile
+    now = now or datetime.now(timezone.utc)
+    if total_feeds is None:
+        total_feeds = profile.total_feeds
+
+    return {
+        "reputation": _base_reputation_score(ioc_data),
+        "diversity": _source_diversity_score(source_count, total_feeds),
+        "recency": _recency_score(ioc_data.get("last_seen"), now),
+        "frequency": _sighting_frequency_score(ioc_data.get("sighting_count", 1)),
+        "enrichment": _enrichment_risk_score(
+            enrichment_data or [], now, profile.high_risk_countries
+        ),
+        "context": _context_score(
+            ioc_data.get("tags", []), ioc_data.get("mitre_techniques", []),
+            profile.high_risk_tags, profile.medium_risk_tags,
+        ),
+    }
+
+
+def composite_score(components: Dict[str, float], profile: Optional[CompiledProfile] = None) -> int:
+    """Weighted 0-100 composite of component scores under a profile's weights."""
+    profile = profile or _active_profile
+    composite = 0.0
+    for name, weight in profile.weights:
+        composite += components[name] * weight
     return max(0, min(100, round(composite)))
 
 
@@ -49,144 +193,171 @@ def _base_reputation_score(ioc_data: Dict[str, Any]) -> float:
         if scores:
             return sum(scores.values()) / len(scores)
     
-    existing_score = ioc_data.get("threat_score", 0)
+    # The reputation an earlier scoring pass persisted; the stored threat_score
+    # stands in only for IOCs never decomposed (a score supplied by a feed),
+    # since it is itself a composite of this component
+    base_score = ioc_data.get("score_reputation")
+    if base_score is not None:
+        return float(base_score)
+
+    existing_score = ioc_data.get("threat_score") or 0
     if existing_score > 0:
         return float(existing_score)
     
-    return 30.0
+    return DEFAULT_REPUTATION_SCORE
 
 
 def _source_diversity_score(source_count: int, total_feeds: int) -> float:
     """More independent sources reporting = higher threat score."""
     if total_feeds == 0:
         return 0.0
-    ratio = source_count / max(total_feeds, 1)
-    if source_count >= 5:
-        return 100.0
-    elif source_count >= 3:
-        return 80.0
-    elif source_count >= 2:
-        return 60.0
-    else:
-        return 30.0
+    for minimum, score in DIVERSITY_BUCKETS:
+        if source_count >= minimum:
+            return score
+    return DIVERSITY_DEFAULT
 
 
-def _recency_score(last_seen: Optional[datetime]) -> float:
+def _recency_score(last_seen: Optional[datetime], now: Optional[datetime] = None) -> float:
     """Recently observed IOCs score higher."""
+    last_seen = _as_utc(last_seen)
     if last_seen is None:
-        return 20.0
+        return RECENCY_UNKNOWN
 
-    if isinstance(last_seen, str):
-        try:
-            last_seen = datetime.fromisoformat(last_seen.replace("Z", "+00:00"))
-        except (ValueError, AttributeError):
-            return 20.0
+    now = now or datetime.now(timezone.utc)
+    age = now - last_seen
+    for max_age, score in RECENCY_BUCKETS:
+        if age < max_age:
+            return score
+    return RECENCY_DEFAULT
 
-    now = datetime.now(timezone.utc)
-    if last_seen.tzinfo is None:
-        last_seen = last_seen.replace(tzinfo=timezone.utc)
 
-    age = now - last_seen
-    
-    if age < timedelta(hours=1):
-        return 100.0
-    elif age < timedelta(hours=24):
-        return 85.0
-    elif age < timedelta(days=7):
-        return 65.0
-    elif age < timedelta(days=30):
-        return 40.0
-    elif age < timedelta(days=90):
-        return 20.0
-    else:
-        return 5.0
+def next_recency_boundary(
+    last_seen: Optional[datetime], now: Optional[datetime] = None
+) -> Optional[datetime]:
+    """When the recency component next drops a bucket, or None if it never will."""
+    last_seen = _as_utc(last_seen)
+    if last_seen is None:
+        return None
+
+    now = now or datetime.now(timezone.utc)
+    for max_age, _ in RECENCY_BUCKETS:
+        boundary = last_seen + max_age
+        if boundary > now:
+            return boundary
+    return None
+
+
+def _as_utc(value) -> Optional[datetime]:
+    """Coerce a datetime or ISO string to an aware datetime (naive means UTC)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except (ValueError, AttributeError):
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
 
 
 def _sighting_frequency_score(sighting_count: int) -> float:
     """More sightings = higher confidence in the threat."""
-    if sighting_count >= 100:
-        return 100.0
-    elif sighting_count >= 50:
-        return 85.0
-    elif sighting_count >= 20:
-        return 70.0
-    elif sighting_count >= 10:
-        return 55.0
-    elif sighting_count >= 5:
-        return 40.0
-    elif sighting_count >= 2:
-        return 25.0
-    else:
-        return 10.0
+    for minimum, score in FREQUENCY_BUCKETS:
+        if sighting_count >= minimum:
+            return score
+    return FREQUENCY_DEFAULT
 
 
-def _enrichment_risk_score(enrichment_data: List[Dict]) -> float:
+def _enrichment_risk_score(
+    enrichment_data: List[Dict],
+    now: Optional[datetime] = None,
+    high_risk_countries: FrozenSet[str] = HIGH_RISK_COUNTRIES,
+) -> float:
     """Score based on risk indicators from enrichment."""
     if not enrichment_data:
-        return 20.0
+        return ENRICHMENT_DEFAULT
 
+    now = now or datetime.now(timezone.utc)
     risk_signals = 0
     total_signals = 0
 
     for enrichment in enrichment_data:
-        source = enrichment.get("source", "")
-        data = enrichment.get("data", {})
-
-        if source == "geoip":
-            country = data.get("country_code", "")
-            high_risk_countries = {"RU", "CN", "KP", "IR"}
-            if country in high_risk_countries:
-                risk_signals += 2
-            total_signals += 2
-
-        elif source == "whois":
-            if data.get("privacy_protected"):
-                risk_signals += 1
-            creation_date = data.get("creation_date")
-            if creation_date:
-                try:
-                    created = datetime.fromisoformat(str(creation_date).replace("Z", "+00:00"))
-                    if (datetime.now(timezone.utc) - created).days < 30:
-                        risk_signals += 2
-                except (ValueError, TypeError):
-                    pass
-            total_signals += 3
-
-        elif source == "dns":
-            if data.get("fast_flux"):
-                risk_signals += 2
-            total_signals += 2
-
-        elif source == "reputation":
-            score = data.get("aggregate_score", 0)
-            if score > 70:
-                risk_signals += 3
-            elif score > 40:
-                risk_signals += 1
-            total_signals += 3
+        risk, total = enrichment_signals(
+            enrichment.get("source", ""), enrichment.get("data", {}), now, high_risk_countries
+        )
+        risk_signals += risk
+        total_signals += total
 
     if total_signals == 0:
-        return 20.0
+        return ENRICHMENT_DEFAULT
 
     return min(100.0, (risk_signals / total_signals) * 100)
 
 
-def _context_score(tags: List[str], mitre_techniques: List[str]) -> float:
+def enrichment_signals(
+    source: str,
+    data: Dict[str, Any],
+    now: datetime,
+    high_risk_countries: FrozenSet[str] = HIGH_RISK_COUNTRIES,
+) -> Tuple[int, int]:
+    """(risk signals, possible signals) contributed by one enrichment record."""
+    risk_signals = 0
+    total_signals = 0
+
+    if source == "geoip":
+        country = data.get("country_code", "")
+        if country in high_risk_countries:
+            risk_signals += 2
+        total_signals += 2
+
+    elif source == "whois":
+        if data.get("privacy_protected"):
+            risk_signals += 1
+        creation_date = data.get("creation_date")
+        if creation_date:
+            try:
+                created = datetime.fromisoformat(str(creation_date).replace("Z", "+00:00"))
+                if (now - created).days < NEW_DOMAIN_DAYS:
+                    risk_signals += 2
+            except (ValueError, TypeError):
+                pass
+        total_signals += 3
+
+    elif source == "dns":
+        if data.get("fast_flux"):
+            risk_signals += 2
+        total_signals += 2
+
+    elif source == "reputation":
+        score = data.get("aggregate_score", 0)
+        if score > 70:
+            risk_signals += 3
+        elif score > 40:
+            risk_signals += 1
+        total_signals += 3
+
+    return risk_signals, total_signals
+
+
+def _context_score(
+    tags: List[str],
+    mitre_techniques: List[str],
+    high_risk_tags: FrozenSet[str] = HIGH_RISK_TAGS,
+    medium_risk_tags: FrozenSet[str] = MEDIUM_RISK_TAGS,
+) -> float:
     """Score based on contextual information."""
     score = 0.0
 
-    high_risk_tags = {"apt", "ransomware", "c2", "c&c", "botnet", "exploit", "zero-day"}
-    medium_risk_tags = {"malware", "phishing", "trojan", "backdoor", "dropper"}
-    
-    tag_set = {t.lower() for t in tags}
+    tag_set = {t.lower() for t in tags or []}
 
     if tag_set & high_risk_tags:
-        score += 50.0
+        score += HIGH_RISK_TAG_SCORE
     if tag_set & medium_risk_tags:
-        score += 30.0
+        score += MEDIUM_RISK_TAG_SCORE
 
     if mitre_techniques:
-        score += min(50.0, len(mitre_techniques) * 10.0)
+        score += min(TECHNIQUE_SCORE_CAP, len(mitre_techniques) * TECHNIQUE_SCORE)
 
     return min(100.0, score)
 
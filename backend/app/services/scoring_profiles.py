@@ -0,0 +1,75 @@
+"""Loading the active scoring profile from the database.
+
+Each process keeps the compiled active profile in ``scoring_engine`` and
+re-reads it at most every ``_PROFILE_TTL`` seconds, so a profile switch made
+through the API reaches API workers and Celery tasks without a restart.
+"""
+
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.scoring_profile import ScoringProfile
+from app.services.scoring_engine import (
+    CompiledProfile, DEFAULT_PROFILE, get_active_profile, set_active_profile,
+)
+
+import structlog
+
+logger = structlog.get_logger()
+
+_PROFILE_TTL = 60.0
+_loaded_at = 0.0
+
+
+def compile_profile(profile: ScoringProfile) -> CompiledProfile:
+    """Resolve a stored profile into weight and lookup tables (raises ValueError if invalid)."""
+    return CompiledProfile(
+        name=profile.name,
+        weights=profile.weights,
+        high_risk_tags=profile.high_risk_tags,
+        medium_risk_tags=profile.medium_risk_tags,
+        high_risk_countries=profile.high_risk_countries,
+        total_feeds=profile.total_feeds,
+        version=profile.version or 0,
+    )
+
+
+def _activate(profile: ScoringProfile) -> CompiledProfile:
+    global _loaded_at
+    compiled = DEFAULT_PROFILE
+    if profile is not None:
+        try:
+            compiled = compile_profile(profile)
+        except ValueError as e:
+            logger.error("scoring_profile_invalid", profile=profile.name, error=str(e))
+    current = get_active_profile()
+    if (compiled.name, compiled.version) != (current.name, current.version):
+        logger.info("scoring_profile_loaded", profile=compiled.name, version=compiled.version)
+    set_active_profile(compiled)
+    _loaded_at = time.monotonic()
+    return compiled
+
+
+def _is_fresh(force: bool) -> bool:
+    return not force and _loaded_at and time.monotonic() - _loaded_at < _PROFILE_TTL
+
+
+async def ensure_active_profile(db: AsyncSession, force: bool = False) -> CompiledProfile:
+    """Return the active profile, reloading it from the database when the cache is old."""
+    if _is_fresh(force):
+        return get_active_profile()
+    result = await db.execute(select(ScoringProfile).where(ScoringProfile.is_active.is_(True)))
+    return _activate(result.scalar_one_or_none())
+
+
+def ensure_active_profile_sync(session: Session, force: bool = False) -> CompiledProfile:
+    """Sync variant of ensure_active_profile for Celery tasks."""
+    if _is_fresh(force):
+        return get_active_profile()
+    profile = session.execute(
+        select(ScoringProfile).where(ScoringProfile.is_active.is_(True))
+    ).scalar_one_or_none()
+    return _activate(profile)
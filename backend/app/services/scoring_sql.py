@@ -0,0 +1,306 @@
+"""PostgreSQL implementation of the threat scoring formula.
+
+The functions below are generated from the constants in ``scoring_engine``
+and a compiled scoring profile, so the database computes exactly what
+``calculate_threat_score`` does, letting bulk upserts and mass rescoring
+score rows without round-tripping them through Python.
+``install_scoring_functions`` (re)creates them; it is run by migrations, at
+API startup and whenever the active profile changes.
+``rescoring.check_parity`` compares them against the Python path.
+
+- ``sentinel_score_components(metadata, threat_score, base_reputation,
+  source_count, last_seen, sighting_count, tags, mitre_techniques,
+  enrichment, now)``
+  returns the six component scores of one row as a float8 array in
+  ``COMPONENTS`` order; ``sentinel_composite_score(components)`` weighs them.
+- ``sentinel_threat_score(...)`` composes the two (IMMUTABLE, usable in
+  ``INSERT ... ON CONFLICT``).
+- ``sentinel_enrichment_score(ioc_id, now)`` derives the enrichment
+  component from stored enrichment records.
+- ``sentinel_ioc_components(ioc_id, now)`` and ``sentinel_score_ioc(ioc_id,
+  now)`` score a stored IOC end to end.
+- ``sentinel_next_rescore_at(last_seen, now)`` mirrors
+  ``next_recency_boundary``.
+"""
+
+from datetime import timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+
+from app.services.scoring_engine import (
+    CompiledProfile, get_active_profile,
+    DEFAULT_REPUTATION_SCORE,
+    DIVERSITY_BUCKETS, DIVERSITY_DEFAULT,
+    RECENCY_BUCKETS, RECENCY_DEFAULT, RECENCY_UNKNOWN,
+    FREQUENCY_BUCKETS, FREQUENCY_DEFAULT,
+    ENRICHMENT_DEFAULT, NEW_DOMAIN_DAYS,
+    HIGH_RISK_TAG_SCORE, MEDIUM_RISK_TAG_SCORE,
+    TECHNIQUE_SCORE, TECHNIQUE_SCORE_CAP,
+)
+
+import structlog
+
+logger = structlog.get_logger()
+
+FUNCTION_SIGNATURES = (
+    "sentinel_aware_timestamptz(text)",
+    "sentinel_score_components(jsonb, integer, double precision, bigint, timestamptz, integer, text[], text[], "
+    "double precision, timestamptz)",
+    "sentinel_composite_score(double precision[])",
+    "sentinel_threat_score(jsonb, integer, double precision, bigint, timestamptz, integer, text[], text[], "
+    "double precision, timestamptz)",
+    "sentinel_enrichment_score(uuid, timestamptz)",
+    "sentinel_ioc_components(uuid, timestamptz)",
+    "sentinel_score_ioc(uuid, timestamptz)",
+    "sentinel_next_rescore_at(timestamptz, timestamptz)",
+)
+
+# Only timezone-aware ISO timestamps count: the Python path cannot subtract
+# naive datetimes from an aware "now" and skips them (as it does unparseable ones).
+_AWARE_ISO_TIMESTAMP = r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}(:?\d{2})?)$"
+
+
+def _float(value: float) -> str:
+    """Exact float8 literal (repr round-trips the Python double)."""
+    return f"CAST('{float(value)!r}' AS double precision)"
+
+
+def _interval(delta) -> str:
+    # Seconds rather than days/months so the comparison matches timedelta arithmetic
+    return f"interval '{delta.total_seconds()!r} seconds'"
+
+
+def _text_array(values: Iterable[str]) -> str:
+    quoted = ", ".join("'" + v.replace("'", "''") + "'" for v in sorted(values))
+    return f"ARRAY[{quoted}]::text[]"
+
+
+def _case(conditions: List[str], scores: List[float], default: float) -> str:
+    branches = " ".join(
+        f"WHEN {condition} THEN {_float(score)}" for condition, score in zip(conditions, scores)
+    )
+    return f"CASE {branches} ELSE {_float(default)} END"
+
+
+def _jsonb_truthy(expr: str) -> str:
+    """Python truthiness of a decoded JSON value."""
+    return (
+        f"(CASE jsonb_typeof({expr})"
+        f" WHEN 'boolean' THEN ({expr})::text::boolean"
+        f" WHEN 'number' THEN ({expr})::text::numeric <> 0"
+        f" WHEN 'string' THEN ({expr}) #>> '{{}}' <> ''"
+        f" WHEN 'array' THEN jsonb_array_length({expr}) > 0"
+        f" WHEN 'object' THEN ({expr}) <> '{{}}'::jsonb"
+        f" ELSE false END)"
+    )
+
+
+def _reputation_sql() -> str:
+    scores = "p_metadata -> 'reputation_scores'"
+    return f"""
+        CASE
+            WHEN jsonb_typeof({scores}) = 'object' AND {scores} <> '{{}}'::jsonb THEN
+                (SELECT sum(value::text::double precision) / count(*) FROM jsonb_each({scores}))
+            WHEN p_base_reputation IS NOT NULL THEN p_base_reputation
+            WHEN COALESCE(p_threat_score, 0) > 0 THEN p_threat_score::double precision
+            ELSE {_float(DEFAULT_REPUTATION_SCORE)}
+        END"""
+
+
+def _diversity_sql(profile: CompiledProfile) -> str:
+    if profile.total_feeds == 0:
+        return _float(0.0)
+    return _case(
+        [f"p_source_count >= {minimum}" for minimum, _ in DIVERSITY_BUCKETS],
+        [score for _, score in DIVERSITY_BUCKETS],
+        DIVERSITY_DEFAULT,
+    )
+
+
+def _recency_sql() -> str:
+    recency = _case(
+        [f"p_now - p_last_seen < {_interval(max_age)}" for max_age, _ in RECENCY_BUCKETS],
+        [score for _, score in RECENCY_BUCKETS],
+        RECENCY_DEFAULT,
+    )
+    return f"CASE WHEN p_last_seen IS NULL THEN {_float(RECENCY_UNKNOWN)} ELSE {recency} END"
+
+
+def _frequency_sql() -> str:
+    return _case(
+        [f"COALESCE(p_sighting_count, 1) >= {minimum}" for minimum, _ in FREQUENCY_BUCKETS],
+        [score for _, score in FREQUENCY_BUCKETS],
+        FREQUENCY_DEFAULT,
+    )
+
+
+def _context_sql(profile: CompiledProfile) -> str:
+    def has_tag(tags):
+        return f"EXISTS (SELECT 1 FROM unnest(p_tags) t WHERE lower(t) = ANY({_text_array(tags)}))"
+
+    return f"""
+        LEAST({_float(100.0)},
+            {_float(0.0)}
+            + CASE WHEN {has_tag(profile.high_risk_tags)} THEN {_float(HIGH_RISK_TAG_SCORE)} ELSE {_float(0.0)} END
+            + CASE WHEN {has_tag(profile.medium_risk_tags)} THEN {_float(MEDIUM_RISK_TAG_SCORE)} ELSE {_float(0.0)} END
+            + LEAST({_float(TECHNIQUE_SCORE_CAP)},
+                    COALESCE(cardinality(p_techniques), 0) * {_float(TECHNIQUE_SCORE)}))"""
+
+
+_ROW_PARAMS = """
+    p_metadata jsonb, p_threat_score integer, p_base_reputation double precision,
+    p_source_count bigint, p_last_seen timestamptz, p_sighting_count integer,
+    p_tags text[], p_techniques text[], p_enrichment double precision, p_now timestamptz
+"""
+
+
+def _components_ddl(profile: CompiledProfile) -> str:
+    components = (
+        _reputation_sql(), _diversity_sql(profile), _recency_sql(), _frequency_sql(),
+        f"COALESCE(p_enrichment, {_float(ENRICHMENT_DEFAULT)})", _context_sql(profile),
+    )
+    separator = ",\n        "
+    return f"""
+CREATE OR REPLACE FUNCTION sentinel_score_components({_ROW_PARAMS})
+RETURNS double precision[] LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    SELECT ARRAY[{separator.join(f"({c})" for c in components)}]
+$fn$"""
+
+
+def _composite_ddl(profile: CompiledProfile) -> str:
+    # Accumulate left to right in weight order, as the Python loop does
+    composite = _float(0.0)
+    for position, (_, weight) in enumerate(profile.weights, start=1):
+        composite = f"({composite} + p_components[{position}] * {_float(weight)})"
+
+    return f"""
+CREATE OR REPLACE FUNCTION sentinel_composite_score(p_components double precision[])
+RETURNS integer LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    -- round(double precision) rounds half to even, like Python's round()
+    SELECT GREATEST(0, LEAST(100, round({composite})))::integer
+$fn$"""
+
+
+def _threat_score_ddl() -> str:
+    return f"""
+CREATE OR REPLACE FUNCTION sentinel_threat_score({_ROW_PARAMS})
+RETURNS integer LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    SELECT sentinel_composite_score(sentinel_score_components(
+        p_metadata, p_threat_score, p_base_reputation, p_source_count, p_last_seen,
+        p_sighting_count, p_tags, p_techniques, p_enrichment, p_now
+    ))
+$fn$"""
+
+
+def _enrichment_score_ddl(profile: CompiledProfile) -> str:
+    data = "e.data"
+    created = f"({data} ->> 'creation_date')"
+    aggregate = f"CASE WHEN jsonb_typeof({data} -> 'aggregate_score') = 'number' " \
+                f"THEN ({data} ->> 'aggregate_score')::double precision ELSE 0 END"
+    risk = f"""
+        CASE e.source
+            WHEN 'geoip' THEN
+                CASE WHEN {data} ->> 'country_code' = ANY({_text_array(profile.high_risk_countries)}) THEN 2 ELSE 0 END
+            WHEN 'whois' THEN
+                CASE WHEN {_jsonb_truthy(f"{data} -> 'privacy_protected'")} THEN 1 ELSE 0 END
+                + CASE WHEN sentinel_aware_timestamptz({created})
+                            > p_now - {_interval(timedelta(days=NEW_DOMAIN_DAYS))}
+                       THEN 2 ELSE 0 END
+            WHEN 'dns' THEN
+                CASE WHEN {_jsonb_truthy(f"{data} -> 'fast_flux'")} THEN 2 ELSE 0 END
+            WHEN 'reputation' THEN
+                CASE WHEN {aggregate} > 70 THEN 3 WHEN {aggregate} > 40 THEN 1 ELSE 0 END
+        END"""
+    total = "CASE e.source WHEN 'geoip' THEN 2 WHEN 'whois' THEN 3 WHEN 'dns' THEN 2 WHEN 'reputation' THEN 3 END"
+
+    return f"""
+CREATE OR REPLACE FUNCTION sentinel_enrichment_score(p_ioc_id uuid, p_now timestamptz)
+RETURNS double precision LANGUAGE sql STABLE PARALLEL SAFE AS $fn$
+    SELECT CASE
+        WHEN COALESCE(sum(total), 0) = 0 THEN {_float(ENRICHMENT_DEFAULT)}
+        ELSE LEAST({_float(100.0)}, (sum(risk)::double precision / sum(total)) * 100)
+    END
+    FROM (
+        SELECT {risk} AS risk, {total} AS total
+        FROM enrichments e
+        WHERE e.ioc_id = p_ioc_id AND e.source IN ('geoip', 'whois', 'dns', 'reputation')
+    ) s
+$fn$"""
+
+
+def _aware_timestamptz_ddl() -> str:
+    return f"""
+CREATE OR REPLACE FUNCTION sentinel_aware_timestamptz(p_value text)
+RETURNS timestamptz LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE AS $fn$
+BEGIN
+    IF p_value IS NULL OR p_value !~ '{_AWARE_ISO_TIMESTAMP}' THEN
+        RETURN NULL;
+    END IF;
+    RETURN p_value::timestamptz;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END
+$fn$"""
+
+
+def _ioc_components_ddl() -> str:
+    return """
+CREATE OR REPLACE FUNCTION sentinel_ioc_components(p_ioc_id uuid, p_now timestamptz)
+RETURNS double precision[] LANGUAGE sql STABLE PARALLEL SAFE AS $fn$
+    SELECT sentinel_score_components(
+        i.metadata, i.threat_score, i.score_reputation,
+        (SELECT count(*) FROM ioc_sources s WHERE s.ioc_id = i.id),
+        i.last_seen, i.sighting_count, i.tags, i.mitre_techniques,
+        sentinel_enrichment_score(i.id, p_now), p_now
+    )
+    FROM iocs i WHERE i.id = p_ioc_id
+$fn$"""
+
+
+def _score_ioc_ddl() -> str:
+    return """
+CREATE OR REPLACE FUNCTION sentinel_score_ioc(p_ioc_id uuid, p_now timestamptz)
+RETURNS integer LANGUAGE sql STABLE PARALLEL SAFE AS $fn$
+    SELECT sentinel_composite_score(sentinel_ioc_components(p_ioc_id, p_now))
+$fn$"""
+
+
+def _next_rescore_ddl() -> str:
+    branches = " ".join(
+        f"WHEN p_last_seen + {_interval(max_age)} > p_now THEN p_last_seen + {_interval(max_age)}"
+        for max_age, _ in RECENCY_BUCKETS
+    )
+    return f"""
+CREATE OR REPLACE FUNCTION sentinel_next_rescore_at(p_last_seen timestamptz, p_now timestamptz)
+RETURNS timestamptz LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+    SELECT CASE {branches} ELSE NULL END
+$fn$"""
+
+
+def scoring_function_ddl(profile: Optional[CompiledProfile] = None) -> List[str]:
+    """CREATE OR REPLACE statements for every scoring function, in dependency order."""
+    profile = profile or get_active_profile()
+    return [
+        _aware_timestamptz_ddl(), _components_ddl(profile), _composite_ddl(profile),
+        _threat_score_ddl(), _enrichment_score_ddl(profile), _ioc_components_ddl(), _score_ioc_ddl(),
+        _next_rescore_ddl(),
+    ]
+
+
+def install_scoring_functions(connection, profile: Optional[CompiledProfile] = None) -> None:
+    """(Re)create the scoring functions on a sync connection or session.
+
+    An advisory lock serializes concurrent installers (several API workers
+    starting at once would otherwise race on the catalog rows).
+    """
+    profile = profile or get_active_profile()
+    connection.execute(text("SELECT pg_advisory_xact_lock(hashtext('sentinel_scoring_functions'))"))
+    for statement in scoring_function_ddl(profile):
+        connection.execute(text(statement))
+    logger.info("scoring_functions_installed", count=len(FUNCTION_SIGNATURES), profile=profile.name)
+
+
+def drop_scoring_functions(connection) -> None:
+    for signature in reversed(FUNCTION_SIGNATURES):
+        connection.execute(text(f"DROP FUNCTION IF EXISTS {signature}"))
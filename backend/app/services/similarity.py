@@ -0,0 +1,228 @@
+"""MinHash/LSH similarity index over IOC tag, technique and family sets.
+
+Each IOC's feature set (significant tags, MITRE techniques and the malware
+family named in its metadata) is reduced to a MinHash signature of
+NUM_PERMUTATIONS 32-bit values; the fraction of equal positions between two
+signatures estimates the Jaccard similarity of the sets. Signatures are cut
+into LSH_BANDS bands and each band is hashed to a 64-bit key stored in a
+GIN-indexed array, so candidates are the IOCs sharing at least one band key:
+with 16 bands of 4 rows, pairs at Jaccard 0.5 collide with ~65% probability
+and pairs at 0.2 with ~3%.
+
+Changing the permutation count, band layout or seed invalidates every stored
+signature; bump SIGNATURE_VERSION so the backfill task rebuilds them.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.ioc import IOC
+from app.models.ioc_signature import IOCSignature
+from app.services.batch_correlation import GENERIC_TAGS
+
+import structlog
+
+logger = structlog.get_logger()
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // LSH_BANDS
+SIGNATURE_VERSION = 1
+
+MAX_CANDIDATES = 2000
+_RERANK_FACTOR = 3
+_BACKFILL_BATCH_SIZE = 2000
+_WRITE_BATCH_SIZE = 1000
+
+# Metadata keys feeds use for the malware family
+FAMILY_KEYS = ("malware", "malware_family", "family", "signature")
+
+_MERSENNE_61 = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(0x5E17)
+_A = _rng.integers(1, 1 << 32, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def ioc_features(tags, techniques, metadata) -> Set[str]:
+    """Feature set of an IOC; the prefixes keep a tag from matching a family name."""
+    features = {f"tag:{t.lower()}" for t in tags or [] if t and t.lower() not in GENERIC_TAGS}
+    features.update(f"ttp:{t.upper()}" for t in techniques or [] if t)
+    if isinstance(metadata, dict):
+        for key in FAMILY_KEYS:
+            family = metadata.get(key)
+            if isinstance(family, str) and family.strip():
+                features.add(f"family:{family.strip().lower()}")
+    return features
+
+
+def minhash(features: Iterable[str]) -> np.ndarray:
+    """MinHash signature (uint32[NUM_PERMUTATIONS]) of a non-empty feature set."""
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(f.encode(), digest_size=4).digest(), "little")
+            for f in features
+        ),
+        dtype=np.uint64,
+    )
+    # (a*x + b) mod p with a, b, x < 2^32 cannot overflow uint64
+    permuted = (np.outer(hashes, _A) + _B) % _MERSENNE_61
+    return (permuted & np.uint64(0xFFFFFFFF)).min(axis=0).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> List[int]:
+    """One signed 64-bit key per LSH band (the band number is part of the key)."""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(bytes([band]) + rows.tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def signature_row(ioc_id, tags, techniques, metadata, now: datetime) -> Optional[Dict]:
+    """Row for ioc_signatures, or None if the IOC has no features."""
+    features = ioc_features(tags, techniques, metadata)
+    if not features:
+        return None
+    signature = minhash(features)
+    return {
+        "ioc_id": ioc_id,
+        "minhash": signature.view(np.int32).tolist(),
+        "bands": band_keys(signature),
+        "feature_count": len(features),
+        "version": SIGNATURE_VERSION,
+        "updated_at": now,
+    }
+
+
+def _statements(iocs: Iterable[IOC]):
+    now = datetime.now(timezone.utc)
+    rows, empty = {}, []
+    # A feed batch can repeat an IOC; one row per id keeps the upsert valid
+    for ioc in {ioc.id: ioc for ioc in iocs}.values():
+        row = signature_row(ioc.id, ioc.tags, ioc.mitre_techniques, ioc.metadata_, now)
+        if row is None:
+            empty.append(ioc.id)
+        else:
+            rows[ioc.id] = row
+
+    rows = list(rows.values())
+    for start in range(0, len(rows), _WRITE_BATCH_SIZE):
+        stmt = insert(IOCSignature).values(rows[start:start + _WRITE_BATCH_SIZE])
+        yield stmt.on_conflict_do_update(
+            index_elements=[IOCSignature.ioc_id],
+            set_={
+                "minhash": stmt.excluded.minhash,
+                "bands": stmt.excluded.bands,
+                "feature_count": stmt.excluded.feature_count,
+                "version": stmt.excluded.version,
+                "updated_at": stmt.excluded.updated_at,
+            },
+            # Re-seen IOCs usually keep their features; skip rewriting those rows
+            where=IOCSignature.minhash.is_distinct_from(stmt.excluded.minhash)
+            | IOCSignature.version.is_distinct_from(stmt.excluded.version),
+        )
+    if empty:
+        yield delete(IOCSignature).where(IOCSignature.ioc_id.in_(empty))
+
+
+async def update_signatures(session: AsyncSession, iocs: Iterable[IOC]) -> None:
+    """Upsert the signatures of IOCs whose tags, techniques or metadata may have changed."""
+    for stmt in _statements(iocs):
+        await session.execute(stmt)
+
+
+def update_signatures_sync(session: Session, iocs: Iterable[IOC]) -> None:
+    """Synchronous variant of update_signatures for Celery tasks."""
+    for stmt in _statements(iocs):
+        session.execute(stmt)
+
+
+def backfill_signatures_sync(session: Session, batch_size: int = _BACKFILL_BATCH_SIZE) -> Dict[str, int]:
+    """(Re)build signatures for every IOC, keyset-batched and committed per batch."""
+    scanned = 0
+    last_id = None
+    while True:
+        query = select(IOC).order_by(IOC.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(IOC.id > last_id)
+        iocs = session.execute(query).scalars().all()
+        if not iocs:
+            break
+        update_signatures_sync(session, iocs)
+        session.commit()
+        session.expunge_all()
+        scanned += len(iocs)
+        last_id = iocs[-1].id
+
+    indexed = session.execute(text("SELECT count(*) FROM ioc_signatures")).scalar() or 0
+    logger.info("similarity_backfill_complete", scanned=scanned, indexed=indexed)
+    return {"scanned": scanned, "indexed": indexed}
+
+
+async def find_similar(
+    session: AsyncSession,
+    ioc: IOC,
+    k: int = 10,
+    min_similarity: float = 0.0,
+) -> List[Dict]:
+    """Top-k IOCs by Jaccard similarity of their feature sets.
+
+    LSH band collisions pick the candidates, signature agreement ranks
+    them, and the best few are re-ranked by their exact Jaccard similarity.
+    """
+    features = ioc_features(ioc.tags, ioc.mitre_techniques, ioc.metadata_)
+    if not features:
+        return []
+    signature = minhash(features)
+
+    result = await session.execute(
+        select(IOCSignature.ioc_id, IOCSignature.minhash)
+        .where(
+            IOCSignature.bands.overlap(band_keys(signature)),
+            IOCSignature.ioc_id != ioc.id,
+        )
+        .limit(MAX_CANDIDATES)
+    )
+    candidates = result.all()
+    if not candidates:
+        return []
+
+    matrix = np.array([m for _, m in candidates], dtype=np.int32).view(np.uint32)
+    estimates = (matrix == signature).mean(axis=1)
+    top = np.argsort(-estimates, kind="stable")[: k * _RERANK_FACTOR]
+
+    ids = [candidates[i][0] for i in top.tolist()]
+    rows = await session.execute(
+        select(IOC.id, IOC.type, IOC.value, IOC.threat_score, IOC.tags, IOC.mitre_techniques, IOC.metadata_)
+        .where(IOC.id.in_(ids))
+    )
+
+    estimate_by_id = {candidates[i][0]: float(estimates[i]) for i in top.tolist()}
+    similar = []
+    for row in rows:
+        other = ioc_features(row.tags, row.mitre_techniques, row.metadata_)
+        if not other:
+            continue
+        jaccard = len(features & other) / len(features | other)
+        if jaccard < min_similarity:
+            continue
+        similar.append({
+            "id": str(row.id),
+            "type": row.type,
+            "value": row.value,
+            "threat_score": row.threat_score,
+            "similarity": round(jaccard, 4),
+            "estimated_similarity": round(estimate_by_id[row.id], 4),
+            "shared_features": sorted(features & other),
+        })
+
+    similar.sort(key=lambda s: (-s["similarity"], -(s["threat_score"] or 0), s["id"]))
+    return similar[:k]
@@ -0,0 +1,85 @@
+"""Index-backed matching of analyst queries against IOC values.
+
+Queries become ``ILIKE '%q%'``, which the pg_trgm GIN index on
+``iocs.value`` answers from trigrams instead of a table scan. IPv4 CIDR
+blocks (``10.0.0.0/16``) instead match the IP IOCs in the block.
+
+Queries that look like the start of an address or hash keep their substring
+match, ORed with a prefix match on IOCs of that type so the planner can also
+use the btree ``text_pattern_ops`` index:
+
+* dotted-decimal fragments (``192.168.``) for IP IOCs;
+* hex strings of HASH_PREFIX_MIN+ characters for hash IOCs.
+"""
+
+import ipaddress
+import re
+
+from sqlalchemy import and_, func, or_
+
+from app.models.ioc import IOC
+
+HASH_PREFIX_MIN = 8
+
+_IP_FRAGMENT = re.compile(r"^\d{1,3}(?:\.\d{0,3}){1,3}$")
+_HEX = re.compile(r"^[0-9a-f]+$")
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _starts_with(prefix: str):
+    # The pattern is built here so the planner sees a constant prefix
+    return IOC.value.like(_like_escape(prefix) + "%")
+
+
+def _cidr_condition(network: ipaddress.IPv4Network):
+    # Blocks off an octet boundary expand to at most 128 per-octet prefixes (a /17)
+    octets = str(network.network_address).split(".")
+    full, rest = divmod(network.prefixlen, 8)
+    if full == 4:
+        return IOC.value == str(network.network_address)
+    if rest == 0:
+        if full == 0:
+            return IOC.type == "ip"
+        return and_(IOC.type == "ip", _starts_with(".".join(octets[:full]) + "."))
+
+    first = int(octets[full])
+    heads = [".".join(octets[:full] + [str(first + i)]) for i in range(2 ** (8 - rest))]
+    if full == 3:
+        return and_(IOC.type == "ip", IOC.value.in_(heads))
+    return and_(IOC.type == "ip", or_(*(_starts_with(head + ".") for head in heads)))
+
+
+def value_condition(q: str, fuzzy: bool = False):
+    """WHERE clause matching IOC values against a search string; None if blank.
+
+    ``fuzzy`` also accepts values containing a word trigram-similar to the
+    query, which catches typos in domains and hostnames.
+    """
+    q = q.strip()
+    if not q:
+        return None
+
+    if "/" in q:
+        try:
+            network = ipaddress.ip_network(q, strict=False)
+        except ValueError:
+            network = None
+        if isinstance(network, ipaddress.IPv4Network):
+            return _cidr_condition(network)
+
+    condition = IOC.value.ilike(f"%{_like_escape(q)}%")
+    if _IP_FRAGMENT.match(q):
+        condition = or_(and_(IOC.type == "ip", _starts_with(q)), condition)
+    elif len(q) >= HASH_PREFIX_MIN and _HEX.match(q.lower()):
+        condition = or_(and_(IOC.type == "hash", _starts_with(q.lower())), condition)
+    if fuzzy:
+        condition = or_(condition, IOC.value.op("%>")(q))
+    return condition
+
+
+def relevance(q: str):
+    """Trigram similarity of a value to the query, for ``sort_by=relevance``."""
+    return func.similarity(IOC.value, q.strip())
@@ -12,6 +12,8 @@ celery_app = Celery(
     include=[
         "app.tasks.feed_tasks",
         "app.tasks.enrichment_tasks",
+        "app.tasks.scoring_tasks",
+        "app.tasks.correlation_tasks",
     ],
 )
 
@@ -38,4 +40,29 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.feed_tasks.sync_critical_feeds",
         "schedule": crontab(minute="*/15"),  # Every 15 minutes
     },
+    "refresh-expired-enrichments": {
+        "task": "app.tasks.enrichment_tasks.refresh_expired_enrichments",
+        "schedule": float(settings.ENRICHMENT_REFRESH_INTERVAL),
+    },
+    "rescore-decayed-iocs": {
+        "task": "app.tasks.scoring_tasks.rescore_decayed_iocs",
+        "schedule": float(settings.RESCORE_DECAY_INTERVAL),
+    },
+    "rescore-enriched-iocs": {
+        "task": "app.tasks.scoring_tasks.rescore_enriched_iocs",
+        "schedule": float(settings.RESCORE_QUEUE_INTERVAL),
+    },
+    "correlate-recent-iocs": {
+        "task": "app.tasks.correlation_tasks.correlate_iocs",
+        "schedule": float(settings.CORRELATION_INTERVAL),
+        "kwargs": {"since_hours": settings.CORRELATION_LOOKBACK_HOURS},
+    },
+    "cluster-iocs": {
+        "task": "app.tasks.correlation_tasks.cluster_iocs",
+        "schedule": float(settings.CLUSTER_REBUILD_INTERVAL),
+    },
+    "update-clusters": {
+        "task": "app.tasks.correlation_tasks.update_clusters",
+        "schedule": float(settings.CLUSTER_UPDATE_INTERVAL),
+    },
 }
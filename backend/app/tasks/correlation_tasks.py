@@ -0,0 +1,98 @@
+"""Celery tasks for building the IOC relationship graph."""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import structlog
+from app.config import settings
+from app.tasks.celery_app import celery_app
+from app.database import SyncSessionLocal
+from app.services.batch_correlation import correlate_corpus_sync
+from app.services.clustering import cluster_corpus_sync, cluster_new_edges_sync
+from app.services.similarity import backfill_signatures_sync
+
+logger = structlog.get_logger()
+
+
+@celery_app.task(
+    name="app.tasks.correlation_tasks.correlate_iocs",
+    soft_time_limit=3300,
+    time_limit=3600,
+)
+def correlate_iocs(since_hours: Optional[int] = None, max_posting: Optional[int] = None):
+    """Correlate IOCs through shared tags, techniques and /24 networks.
+
+    With ``since_hours`` only pairs involving recently updated IOCs are
+    generated; without it the whole corpus is correlated.
+    """
+    since = None
+    if since_hours:
+        since = datetime.now(timezone.utc) - timedelta(hours=since_hours)
+
+    session = SyncSessionLocal()
+    try:
+        stats = correlate_corpus_sync(session, since=since, max_posting=max_posting)
+        return {"status": "success", **stats}
+    except Exception as e:
+        session.rollback()
+        logger.error("correlate_iocs_error", error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        session.close()
+
+
+@celery_app.task(
+    name="app.tasks.correlation_tasks.cluster_iocs",
+    soft_time_limit=3300,
+    time_limit=3600,
+)
+def cluster_iocs():
+    """Recompute infrastructure clusters over the whole corpus."""
+    session = SyncSessionLocal()
+    try:
+        stats = cluster_corpus_sync(session)
+        return {"status": "success", **stats}
+    except Exception as e:
+        session.rollback()
+        logger.error("cluster_iocs_error", error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        session.close()
+
+
+@celery_app.task(name="app.tasks.correlation_tasks.update_clusters")
+def update_clusters(since_seconds: Optional[int] = None):
+    """Merge clusters joined by recently created relationships."""
+    # Look back two intervals so a late or skipped run loses nothing; merges are idempotent
+    since_seconds = since_seconds or 2 * settings.CLUSTER_UPDATE_INTERVAL
+    since = datetime.now(timezone.utc) - timedelta(seconds=since_seconds)
+
+    session = SyncSessionLocal()
+    try:
+        stats = cluster_new_edges_sync(session, since)
+        return {"status": "success", **stats}
+    except Exception as e:
+        session.rollback()
+        logger.error("update_clusters_error", error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        session.close()
+
+
+@celery_app.task(
+    name="app.tasks.correlation_tasks.backfill_similarity_index",
+    soft_time_limit=3300,
+    time_limit=3600,
+)
+def backfill_similarity_index():
+    """Build MinHash signatures for every IOC (after a migration or signature change)."""
+    session = SyncSessionLocal()
+    try:
+        stats = backfill_signatures_sync(session)
+        return {"status": "success", **stats}
+    except Exception as e:
+        session.rollback()
+        logger.error("backfill_similarity_index_error", error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        session.close()
@@ -1,15 +1,33 @@
 """Celery tasks for background enrichment."""
 
 import asyncio
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
 from uuid import UUID
 
 import structlog
+from celery.exceptions import SoftTimeLimitExceeded
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.config import settings
 from app.tasks.celery_app import celery_app
 from app.database import SyncSessionLocal
+from app.enrichers.registry import enricher_registry
 from app.models.ioc import IOC
+from app.models.enrichment import Enrichment
+from app.services.enrichment_engine import store_enrichment_sync
+from app.services.feed_ingestion import apply_asn
+from app.services.rescoring import rescore_iocs_sync
+from app.services.scoring_profiles import ensure_active_profile_sync
+from app.utils.asn_table import get_asn_table
 
 logger = structlog.get_logger()
 
+# Retry window for records whose source returned nothing, so they don't hog the
+# budget; their expiry is left alone so readers still see them as stale
+_FAILED_REFRESH_BACKOFF = 3600
+
 
 @celery_app.task(bind=True, name="app.tasks.enrichment_tasks.enrich_ioc_task")
 def enrich_ioc_task(self, ioc_id: str):
@@ -42,3 +60,201 @@ def batch_enrich(ioc_ids: list):
         result = enrich_ioc_task.delay(ioc_id)
         results.append({"ioc_id": ioc_id, "task_id": str(result.id)})
     return results
+
+
+def _source_capacity(source: str) -> Optional[int]:
+    """Lookups a source's rate limit allows in one refresh task; None if unlimited."""
+    enricher = enricher_registry.get(source)
+    if enricher is None or not enricher.rate_limit:
+        return None
+    max_requests, window_seconds = enricher.rate_limit
+    seconds = min(settings.ENRICHMENT_REFRESH_RUN_SECONDS, settings.ENRICHMENT_REFRESH_INTERVAL)
+    return max(1, max_requests * seconds // window_seconds)
+
+
+def _refreshable(query, now: datetime):
+    """Restrict an Enrichment query to expired records outside the failure backoff."""
+    return query.filter(
+        Enrichment.expires_at <= now,
+        or_(
+            Enrichment.refresh_failed_at.is_(None),
+            Enrichment.refresh_failed_at <= now - timedelta(seconds=_FAILED_REFRESH_BACKOFF),
+        ),
+    )
+
+
+def refresh_candidates(session: Session, now: datetime, budget: int) -> Dict[str, List[UUID]]:
+    """IOC ids to refresh per source, highest-risk first.
+
+    Each source contributes at most what its rate limit lets one task look up,
+    and the sources together at most ``budget``.
+    """
+    rows = []
+    for source in enricher_registry.names():
+        capacity = _source_capacity(source)
+        rows.extend(
+            _refreshable(
+                session.query(Enrichment.ioc_id, Enrichment.source, IOC.threat_score, IOC.last_seen)
+                .join(IOC, IOC.id == Enrichment.ioc_id)
+                .filter(Enrichment.source == source),
+                now,
+            )
+            .order_by(IOC.threat_score.desc(), IOC.last_seen.desc().nulls_first())
+            .limit(budget if capacity is None else min(budget, capacity))
+            .all()
+        )
+
+    # Same order as the per-source queries: DESC puts unknown last_seen first
+    latest = datetime.max.replace(tzinfo=timezone.utc)
+    rows.sort(key=lambda row: (row.threat_score or 0, row.last_seen or latest), reverse=True)
+    candidates = defaultdict(list)
+    for row in rows[:budget]:
+        candidates[row.source].append(row.ioc_id)
+    return dict(candidates)
+
+
+@celery_app.task(name="app.tasks.enrichment_tasks.refresh_expired_enrichments")
+def refresh_expired_enrichments():
+    """Queue re-enrichment of expired records ahead of demand, highest-risk IOCs first.
+
+    Each run takes its share of ENRICHMENT_REFRESH_BUDGET_PER_HOUR and fans it
+    out as one refresh_source_enrichments task per source, sized so the
+    source's rate limit lets the task finish within the soft time limit.
+    """
+    budget = max(
+        1,
+        settings.ENRICHMENT_REFRESH_BUDGET_PER_HOUR * settings.ENRICHMENT_REFRESH_INTERVAL // 3600,
+    )
+    session = SyncSessionLocal()
+    try:
+        candidates = refresh_candidates(session, datetime.now(timezone.utc), budget)
+        for source, ioc_ids in candidates.items():
+            refresh_source_enrichments.delay(source, [str(ioc_id) for ioc_id in ioc_ids])
+
+        queued = sum(len(ioc_ids) for ioc_ids in candidates.values())
+        logger.info("enrichment_refresh_queued", sources=len(candidates), candidates=queued)
+        return {"status": "success", "sources": len(candidates), "queued": queued}
+
+    except Exception as e:
+        logger.error("enrichment_refresh_error", error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        session.close()
+
+
+@celery_app.task(name="app.tasks.enrichment_tasks.refresh_source_enrichments")
+def refresh_source_enrichments(source: str, ioc_ids: list):
+    """Re-enrich one source's expired records for the given IOCs, then rescore them.
+
+    Lookups are batched per IOC type through the enricher registry's rate
+    budget and committed batch by batch, so hitting the soft time limit keeps
+    whatever was already refreshed.
+    """
+    now = datetime.now(timezone.utc)
+    session = SyncSessionLocal()
+    loop = asyncio.new_event_loop()
+    try:
+        # Records refreshed on demand since they were queued drop out here
+        rows = (
+            _refreshable(
+                session.query(Enrichment.ioc_id, IOC.type, IOC.value)
+                .join(IOC, IOC.id == Enrichment.ioc_id)
+                .filter(Enrichment.source == source, Enrichment.ioc_id.in_([UUID(i) for i in ioc_ids])),
+                now,
+            )
+            .order_by(IOC.threat_score.desc(), IOC.last_seen.desc())
+            .all()
+        )
+
+        groups = defaultdict(list)
+        for row in rows:
+            groups[row.type].append((row.ioc_id, row.value))
+
+        batch_size = settings.ENRICHMENT_REFRESH_BATCH_SIZE
+        refreshed = set()
+        try:
+            for ioc_type, items in groups.items():
+                for start in range(0, len(items), batch_size):
+                    batch = items[start:start + batch_size]
+                    values = list({value for _, value in batch})
+                    try:
+                        results = loop.run_until_complete(
+                            enricher_registry.run_batch(source, values, ioc_type)
+                        )
+                    except SoftTimeLimitExceeded:
+                        raise
+                    except Exception as e:
+                        logger.error("enrichment_refresh_batch_error", source=source, error=str(e))
+                        results = {}
+
+                    for ioc_id, value in batch:
+                        data = results.get(value)
+                        if data:
+                            store_enrichment_sync(session, ioc_id, source, data)
+                            refreshed.add(ioc_id)
+                        else:
+                            session.query(Enrichment).filter(
+                                Enrichment.ioc_id == ioc_id,
+                                Enrichment.source == source,
+                            ).update(
+                                {Enrichment.refresh_failed_at: now},
+                                synchronize_session=False,
+                            )
+                    session.commit()
+        except SoftTimeLimitExceeded:
+            session.rollback()
+            logger.warning("enrichment_refresh_time_limit", source=source, refreshed=len(refreshed))
+
+        ensure_active_profile_sync(session)
+        rescored = rescore_iocs_sync(session, list(refreshed))
+        session.commit()
+
+        logger.info(
+            "enrichment_refresh_complete",
+            source=source, candidates=len(rows), refreshed=len(refreshed), rescored=rescored,
+        )
+        return {"status": "success", "refreshed": len(refreshed), "rescored": rescored}
+
+    except Exception as e:
+        session.rollback()
+        logger.error("enrichment_refresh_error", source=source, error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        loop.close()
+        session.close()
+
+
+@celery_app.task(name="app.tasks.enrichment_tasks.backfill_asn")
+def backfill_asn(batch_size: int = 5000):
+    """Attach ASN and prefix to existing IP IOCs from the local ASN table."""
+    if get_asn_table() is None:
+        return {"status": "error", "message": "ASN table not installed"}
+
+    session = SyncSessionLocal()
+    updated = 0
+    last_id = None
+    try:
+        while True:
+            query = session.query(IOC).filter(IOC.type == "ip", IOC.asn.is_(None))
+            if last_id is not None:
+                query = query.filter(IOC.id > last_id)
+            batch = query.order_by(IOC.id).limit(batch_size).all()
+            if not batch:
+                break
+
+            for ioc in batch:
+                apply_asn(ioc)
+                if ioc.asn is not None:
+                    updated += 1
+            last_id = batch[-1].id
+            session.commit()
+            session.expunge_all()
+
+        logger.info("asn_backfill_complete", updated=updated)
+        return {"status": "success", "updated": updated}
+    except Exception as e:
+        session.rollback()
+        logger.error("asn_backfill_error", error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        session.close()
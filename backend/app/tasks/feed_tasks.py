@@ -8,6 +8,7 @@ from app.tasks.celery_app import celery_app
 from app.database import SyncSessionLocal
 from app.models.feed import FeedSource
 from app.services.feed_ingestion import ingest_iocs_sync
+from app.utils.response_cache import bump_data_version_sync
 
 logger = structlog.get_logger()
 
@@ -68,6 +69,7 @@ def sync_feed(self, feed_slug: str, api_key: Optional[str] = None):
 
             count = ingest_iocs_sync(session, feed, iocs)
             session.commit()
+            bump_data_version_sync()
 
             logger.info("sync_feed_complete", feed=feed_slug, count=count)
             return {"status": "success", "iocs_ingested": count}
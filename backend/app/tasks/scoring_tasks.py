@@ -0,0 +1,98 @@
+"""Celery tasks for threat score maintenance."""
+
+import structlog
+from app.tasks.celery_app import celery_app
+from app.database import SyncSessionLocal
+from app.services.rescoring import (
+    rescore_all_sync, rescore_all_in_database, rescore_due_sync, recompose_scores,
+    check_parity, DEFAULT_BATCH_SIZE,
+)
+from app.services.rescore_queue import drain_rescore_queue
+from app.services.scoring_profiles import ensure_active_profile_sync
+from app.services.scoring_sql import install_scoring_functions
+
+logger = structlog.get_logger()
+
+
+@celery_app.task(name="app.tasks.scoring_tasks.rescore_all_iocs")
+def rescore_all_iocs(batch_size: int = DEFAULT_BATCH_SIZE, in_database: bool = False):
+    """Recompute every IOC's threat score with the vectorized or SQL bulk scorer."""
+    session = SyncSessionLocal()
+    try:
+        ensure_active_profile_sync(session)
+        # Refuse to write anything if the bulk path disagrees with the scalar scorer
+        mismatches = check_parity(session)
+        if mismatches:
+            return {"status": "error", "message": "Scoring parity check failed", "mismatches": len(mismatches)}
+
+        if in_database:
+            stats = rescore_all_in_database(session, batch_size=batch_size)
+        else:
+            stats = rescore_all_sync(session, batch_size=batch_size)
+        return {"status": "success", **stats}
+    except Exception as e:
+        session.rollback()
+        logger.error("rescore_all_error", error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        session.close()
+
+
+@celery_app.task(name="app.tasks.scoring_tasks.rescore_decayed_iocs")
+def rescore_decayed_iocs(batch_size: int = DEFAULT_BATCH_SIZE):
+    """Rescore only IOCs whose recency bucket boundary has passed since their last scoring."""
+    session = SyncSessionLocal()
+    try:
+        ensure_active_profile_sync(session)
+        stats = rescore_due_sync(session, batch_size=batch_size)
+        return {"status": "success", **stats}
+    except Exception as e:
+        session.rollback()
+        logger.error("rescore_decayed_error", error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        session.close()
+
+
+@celery_app.task(name="app.tasks.scoring_tasks.rescore_enriched_iocs")
+def rescore_enriched_iocs():
+    """Rescore IOCs queued after new enrichment results landed."""
+    session = SyncSessionLocal()
+    try:
+        ensure_active_profile_sync(session)
+        stats = drain_rescore_queue(session)
+        return {"status": "success", **stats}
+    except Exception as e:
+        session.rollback()
+        logger.error("rescore_enriched_error", error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        session.close()
+
+
+@celery_app.task(name="app.tasks.scoring_tasks.apply_scoring_profile")
+def apply_scoring_profile(full_rescore: bool = False, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Re-score the corpus after the active scoring profile changed.
+
+    A weights-only change recomposes threat_score from cached components in
+    one SQL pass; changes to tag, country or feed settings re-derive the
+    components with the vectorized scorer, taking reputation from each IOC's
+    persisted score_reputation rather than its current composite.
+    """
+    session = SyncSessionLocal()
+    try:
+        profile = ensure_active_profile_sync(session, force=True)
+        install_scoring_functions(session, profile)
+        session.commit()
+
+        if full_rescore:
+            stats = rescore_all_sync(session, batch_size=batch_size, profile=profile)
+        else:
+            stats = recompose_scores(session, profile=profile)
+        return {"status": "success", "profile": profile.name, "full_rescore": full_rescore, **stats}
+    except Exception as e:
+        session.rollback()
+        logger.error("apply_scoring_profile_error", error=str(e))
+        return {"status": "error", "message": str(e)}
+    finally:
+        session.close()
@@ -0,0 +1,190 @@
+"""Offline IP-to-ASN lookups from a locally loaded prefix table.
+
+Supports a MaxMind GeoLite2-ASN ``.mmdb`` database or one or more
+GeoLite2-ASN-Blocks style CSV files (``network,autonomous_system_number,
+autonomous_system_organization``). CSV prefixes are flattened into sorted,
+non-overlapping intervals held in compact arrays, so a lookup is a single
+binary search and millions of prefixes cost a few bytes each.
+"""
+
+import csv
+import ipaddress
+import os
+from array import array
+from bisect import bisect_right
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+
+class _IntervalIndex:
+    """Sorted non-overlapping [start, end] ranges mapped to record indexes."""
+
+    def __init__(self, wide: bool):
+        # IPv4 bounds fit in 32-bit array slots; IPv6 needs Python ints
+        self.starts = [] if wide else array("I")
+        self.ends = [] if wide else array("I")
+        self.records = array("I")
+
+    def build(self, ranges: List[Tuple[int, int, int]]) -> None:
+        for start, end, record in _flatten(ranges):
+            self.starts.append(start)
+            self.ends.append(end)
+            self.records.append(record)
+
+    def find(self, address: int) -> Optional[int]:
+        pos = bisect_right(self.starts, address) - 1
+        if pos >= 0 and address <= self.ends[pos]:
+            return self.records[pos]
+        return None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+def _flatten(ranges: List[Tuple[int, int, int]]) -> Iterable[Tuple[int, int, int]]:
+    """Split nested prefixes so every address maps to its most specific prefix."""
+    ranges.sort(key=lambda r: (r[0], -r[1]))
+    stack: List[Tuple[int, int]] = []  # (end, record) of currently open prefixes
+    cursor = 0
+
+    for start, end, record in ranges:
+        while stack and stack[-1][0] < start:
+            top_end, top_record = stack.pop()
+            if cursor <= top_end:
+                yield cursor, top_end, top_record
+                cursor = top_end + 1
+        if stack and cursor < start:
+            yield cursor, start - 1, stack[-1][1]
+        stack.append((end, record))
+        cursor = start
+
+    while stack:
+        top_end, top_record = stack.pop()
+        if cursor <= top_end:
+            yield cursor, top_end, top_record
+            cursor = top_end + 1
+
+
+class ASNTable:
+    """Prefix table loaded from GeoLite2-ASN style CSV files."""
+
+    def __init__(self):
+        self._v4 = _IntervalIndex(wide=False)
+        self._v6 = _IntervalIndex(wide=True)
+        self._asns = array("I")
+        self._org_ids = array("I")
+        self._prefixes: List[str] = []
+        self._orgs: List[str] = []
+
+    @classmethod
+    def from_csv(cls, paths: List[str]) -> "ASNTable":
+        table = cls()
+        org_index: Dict[str, int] = {}
+        v4_ranges: List[Tuple[int, int, int]] = []
+        v6_ranges: List[Tuple[int, int, int]] = []
+
+        for path in paths:
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        network = ipaddress.ip_network(row["network"], strict=False)
+                        asn = int(row["autonomous_system_number"])
+                    except (KeyError, ValueError):
+                        continue
+                    org = row.get("autonomous_system_organization") or ""
+                    if org not in org_index:
+                        org_index[org] = len(table._orgs)
+                        table._orgs.append(org)
+
+                    record = len(table._asns)
+                    table._asns.append(asn)
+                    table._org_ids.append(org_index[org])
+                    table._prefixes.append(str(network))
+
+                    bounds = (
+                        int(network.network_address),
+                        int(network.broadcast_address),
+                        record,
+                    )
+                    (v4_ranges if network.version == 4 else v6_ranges).append(bounds)
+
+        table._v4.build(v4_ranges)
+        table._v6.build(v6_ranges)
+        logger.info(
+            "asn_table_loaded",
+            prefixes=len(table._asns), v4_intervals=len(table._v4), v6_intervals=len(table._v6),
+        )
+        return table
+
+    def lookup(self, ip: str) -> Optional[Dict[str, Any]]:
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None
+        index = self._v4 if address.version == 4 else self._v6
+        record = index.find(int(address))
+        if record is None:
+            return None
+        return {
+            "asn": self._asns[record],
+            "as_org": self._orgs[self._org_ids[record]] or None,
+            "prefix": self._prefixes[record],
+        }
+
+
+class MMDBASNTable:
+    """Prefix table backed by a MaxMind GeoLite2-ASN database (already a radix tree)."""
+
+    def __init__(self, path: str):
+        import geoip2.database
+        self._reader = geoip2.database.Reader(path)
+
+    def lookup(self, ip: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self._reader.asn(ip)
+        except Exception:
+            return None
+        return {
+            "asn": response.autonomous_system_number,
+            "as_org": response.autonomous_system_organization,
+            "prefix": str(response.network) if response.network else None,
+        }
+
+
+_table = None
+_load_attempted = False
+
+
+def get_asn_table():
+    """Load the configured ASN table once; returns None if none is installed."""
+    global _table, _load_attempted
+    if _load_attempted:
+        return _table
+    _load_attempted = True
+
+    paths = [p.strip() for p in settings.ASN_DB_PATH.split(",") if p.strip()]
+    existing = [p for p in paths if os.path.exists(p)]
+    if not existing:
+        logger.info("asn_table_not_found", path=settings.ASN_DB_PATH)
+        return None
+
+    try:
+        if existing[0].endswith(".mmdb"):
+            _table = MMDBASNTable(existing[0])
+        else:
+            _table = ASNTable.from_csv(existing)
+    except Exception as e:
+        logger.error("asn_table_load_failed", path=settings.ASN_DB_PATH, error=str(e))
+        _table = None
+    return _table
+
+
+def lookup_asn(ip: str) -> Optional[Dict[str, Any]]:
+    """Resolve an IP to {asn, as_org, prefix} from the local table, if loaded."""
+    table = get_asn_table()
+    return table.lookup(ip) if table else None
@@ -0,0 +1,47 @@
+"""Opaque keyset cursors for IOC listings.
+
+A cursor holds the sort column, direction and the (sort value, id) of the
+last row on a page; the next page starts strictly after that key, so any
+page costs one index range scan instead of an OFFSET over every row before it.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple
+from uuid import UUID
+
+# Sort columns with a (column DESC, id DESC) index and no NULLs
+KEYSET_SORT_COLUMNS = ("last_seen", "threat_score")
+
+_DATETIME_COLUMNS = frozenset({"last_seen"})
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, ioc_id: UUID) -> str:
+    """Cursor pointing just past the row with this sort value and id."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = {"s": sort_by, "o": sort_order, "v": value, "id": str(ioc_id)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, UUID]:
+    """(sort value, id) from a cursor; ValueError if it is malformed or for another sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        key_sort, key_order, value = payload["s"], payload["o"], payload["v"]
+        ioc_id = UUID(payload["id"])
+    except (ValueError, TypeError, KeyError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+    if (key_sort, key_order) != (sort_by, sort_order):
+        raise ValueError("Cursor was issued for a different sort order")
+    if sort_by in _DATETIME_COLUMNS:
+        if not isinstance(value, str):
+            raise ValueError("Invalid cursor")
+        value = datetime.fromisoformat(value)
+    elif not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError("Invalid cursor")
+    return value, ioc_id
@@ -1,31 +1,27 @@
 """Rate limiting utilities for external API calls."""
 
 import time
+import uuid
 import asyncio
 from collections import defaultdict
-from typing import Optional
+from typing import Tuple
 
-import redis
-from app.config import settings
+from app.utils.redis_client import get_async_redis, get_sync_redis
 
 
 class RateLimiter:
-    """Token bucket rate limiter backed by Redis."""
+    """Sliding-window rate limiter backed by Redis, with a local token bucket fallback.
 
-    def __init__(self, redis_url: Optional[str] = None):
-        self._redis_url = redis_url or settings.REDIS_URL
-        self._redis = None
+    Redis connections come from the shared helpers, which back off after a
+    failed ping instead of retrying on every check.
+    """
+
+    def __init__(self):
         self._local_limits = defaultdict(lambda: {"tokens": 10, "last_refill": time.time()})
 
     @property
     def redis_client(self):
-        if self._redis is None:
-            try:
-                self._redis = redis.from_url(self._redis_url)
-                self._redis.ping()
-            except Exception:
-                self._redis = None
-        return self._redis
+        return get_sync_redis()
 
     def _check_local(self, key: str, max_requests: int, window_seconds: int) -> bool:
         """Fallback local rate limiting when Redis is unavailable."""
@@ -49,24 +45,55 @@ class RateLimiter:
 
         try:
             pipe = client.pipeline()
-            now = time.time()
-            window_key = f"ratelimit:{key}"
-
-            pipe.zremrangebyscore(window_key, 0, now - window_seconds)
-            pipe.zcard(window_key)
-            pipe.zadd(window_key, {str(now): now})
-            pipe.expire(window_key, window_seconds)
+            window_key, member = _queue_window_commands(pipe, key, window_seconds)
             results = pipe.execute()
 
             current_count = results[1]
-            return current_count < max_requests
+            if current_count >= max_requests:
+                # Rejected attempts must not occupy a slot, or pollers starve
+                client.zrem(window_key, member)
+                return False
+            return True
+        except Exception:
+            return self._check_local(key, max_requests, window_seconds)
+
+    async def check_rate_limit_async(self, key: str, max_requests: int, window_seconds: int) -> bool:
+        """check_rate_limit for the event loop, on the asyncio Redis client."""
+        client = await get_async_redis()
+        if client is None:
+            return self._check_local(key, max_requests, window_seconds)
+
+        try:
+            pipe = client.pipeline()
+            window_key, member = _queue_window_commands(pipe, key, window_seconds)
+            results = await pipe.execute()
+
+            current_count = results[1]
+            if current_count >= max_requests:
+                await client.zrem(window_key, member)
+                return False
+            return True
         except Exception:
             return self._check_local(key, max_requests, window_seconds)
 
     async def wait_for_slot(self, key: str, max_requests: int, window_seconds: int):
         """Async wait until rate limit slot is available."""
-        while not self.check_rate_limit(key, max_requests, window_seconds):
-            await asyncio.sleep(1.0)
+        interval = min(1.0, window_seconds / max(max_requests, 1))
+        while not await self.check_rate_limit_async(key, max_requests, window_seconds):
+            await asyncio.sleep(interval)
+
+
+def _queue_window_commands(pipe, key: str, window_seconds: int) -> Tuple[str, str]:
+    """Queue trim/count/add/expire for one attempt; returns (window key, member added)."""
+    now = time.time()
+    window_key = f"ratelimit:{key}"
+    member = f"{now}:{uuid.uuid4().hex[:8]}"
+
+    pipe.zremrangebyscore(window_key, 0, now - window_seconds)
+    pipe.zcard(window_key)
+    pipe.zadd(window_key, {member: now})
+    pipe.expire(window_key, window_seconds)
+    return window_key, member
 
 
 rate_limiter = RateLimiter()
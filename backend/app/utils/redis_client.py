@@ -0,0 +1,66 @@
+"""Shared Redis client helpers for async and sync (Celery) code paths."""
+
+import asyncio
+import time
+import weakref
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+# Seconds to wait before retrying a Redis server that failed to answer a ping
+_RETRY_AFTER = 30.0
+
+# asyncio Redis connections are bound to the event loop that opened them, and
+# Celery tasks spin up a fresh loop per run, so clients are cached per loop.
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+async def get_async_redis() -> Optional[aioredis.Redis]:
+    """Return an asyncio Redis client for the running loop, or None if Redis is down."""
+    loop = asyncio.get_running_loop()
+    client, checked_at = _async_clients.get(loop, (None, 0.0))
+    if client is not None:
+        return client
+    if checked_at and time.monotonic() - checked_at < _RETRY_AFTER:
+        return None
+
+    try:
+        client = aioredis.from_url(settings.REDIS_URL)
+        await client.ping()
+    except Exception as e:
+        logger.warning("redis_unavailable", error=str(e))
+        _async_clients[loop] = (None, time.monotonic())
+        return None
+
+    _async_clients[loop] = (client, time.monotonic())
+    return client
+
+
+_sync_client: Optional[redis.Redis] = None
+_sync_checked_at = 0.0
+
+
+def get_sync_redis() -> Optional[redis.Redis]:
+    """Return a process-wide sync Redis client, or None if Redis is down."""
+    global _sync_client, _sync_checked_at
+    if _sync_client is not None:
+        return _sync_client
+    if _sync_checked_at and time.monotonic() - _sync_checked_at < _RETRY_AFTER:
+        return None
+
+    _sync_checked_at = time.monotonic()
+    try:
+        client = redis.from_url(settings.REDIS_URL)
+        client.ping()
+    except Exception as e:
+        logger.warning("redis_unavailable", error=str(e))
+        return None
+
+    _sync_client = client
+    return client
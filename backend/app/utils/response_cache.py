@@ -0,0 +1,157 @@
+"""Redis-backed caching of read-heavy GET responses with ETag revalidation.
+
+Dashboard, ATT&CK and IOC detail responses are stored per route and
+normalized query string for a route-specific TTL. Every response carries a
+strong ETag, and a matching ``If-None-Match`` gets a bodiless 304, so a
+polling client that already has the data costs one Redis round trip.
+
+Cache keys include a data version that feed ingestion and successful API
+writes bump once committed, so new feed data and edits show up on the next
+request; other background changes (rescoring, enrichment) appear within the
+TTL. Without Redis, requests pass straight through.
+"""
+
+import hashlib
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+import structlog
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.config import settings
+from app.utils.redis_client import get_async_redis, get_sync_redis
+
+logger = structlog.get_logger()
+
+VERSION_KEY = "response_cache:version"
+_KEY_PREFIX = "response_cache"
+
+_WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+# Writes under these prefixes change data behind cached responses...
+_INVALIDATING_PREFIXES = ("/api/v1/iocs", "/api/v1/feeds", "/api/v1/enrichment", "/api/v1/scoring")
+# ...except these POSTs, which only read
+_READ_ONLY_POSTS = frozenset({
+    "/api/v1/iocs/search", "/api/v1/iocs/bulk", "/api/v1/iocs/bulk/stream", "/api/v1/iocs/export",
+})
+_IOC_DETAIL = re.compile(r"^/api/v1/iocs/[0-9a-fA-F-]{36}$")
+
+
+def cache_ttl(path: str) -> Optional[int]:
+    """Seconds to cache a GET response for this path; None if it is not cached."""
+    if path.startswith("/api/v1/dashboard/"):
+        return settings.CACHE_TTL_DASHBOARD
+    if path.startswith("/api/v1/attack/"):
+        return settings.CACHE_TTL_ATTACK
+    if _IOC_DETAIL.match(path):
+        return settings.CACHE_TTL_IOC_DETAIL
+    return None
+
+
+def invalidates(method: str, path: str) -> bool:
+    """Whether a successful request changes data that cached responses show."""
+    return (
+        method in _WRITE_METHODS
+        and path.startswith(_INVALIDATING_PREFIXES)
+        and not (method == "POST" and path in _READ_ONLY_POSTS)
+    )
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _cache_key(version: int, request: Request) -> str:
+    query = urlencode(sorted(parse_qsl(request.url.query, keep_blank_values=True)))
+    digest = hashlib.sha1(f"{request.url.path}?{query}".encode()).hexdigest()
+    return f"{_KEY_PREFIX}:{version}:{digest}"
+
+
+def _cached_response(request: Request, body: bytes, etag: str, media_type: str, status: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Cache": status}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+async def bump_data_version() -> None:
+    """Invalidate every cached response (async code paths)."""
+    client = await get_async_redis()
+    if client is None:
+        return
+    try:
+        await client.incr(VERSION_KEY)
+    except Exception as e:
+        logger.warning("response_cache_error", error=str(e))
+
+
+def bump_data_version_sync() -> None:
+    """Invalidate every cached response (Celery tasks)."""
+    client = get_sync_redis()
+    if client is None:
+        return
+    try:
+        client.incr(VERSION_KEY)
+    except Exception as e:
+        logger.warning("response_cache_error", error=str(e))
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """Serve cacheable GETs from Redis and bump the data version after API writes.
+
+    Registered inside CORSMiddleware so cached responses still get CORS headers.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        if invalidates(request.method, request.url.path):
+            # The request's session has committed by the time the response starts
+            response = await call_next(request)
+            if response.status_code < 400:
+                await bump_data_version()
+            return response
+
+        ttl = cache_ttl(request.url.path) if request.method == "GET" else None
+        client = await get_async_redis() if ttl else None
+        if client is None:
+            return await call_next(request)
+
+        try:
+            version = int(await client.get(VERSION_KEY) or 0)
+            key = _cache_key(version, request)
+            cached = None
+            if "no-cache" not in request.headers.get("cache-control", ""):
+                cached = await client.hgetall(key)
+        except Exception as e:
+            logger.warning("response_cache_error", error=str(e))
+            return await call_next(request)
+        if cached:
+            return _cached_response(
+                request, cached[b"body"], cached[b"etag"].decode(),
+                cached[b"media_type"].decode(), "HIT",
+            )
+
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = _etag(body)
+        media_type = response.headers.get("content-type", "application/json")
+
+        try:
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={"body": body, "etag": etag, "media_type": media_type})
+                pipe.expire(key, ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("response_cache_error", error=str(e))
+        return _cached_response(request, body, etag, media_type, "MISS")
@@ -0,0 +1,130 @@
+"""Request coalescing (singleflight) for concurrent identical lookups."""
+
+import asyncio
+import json
+import uuid
+import weakref
+from typing import Any, Awaitable, Callable, Dict
+
+import structlog
+
+from app.utils.redis_client import get_async_redis
+
+logger = structlog.get_logger()
+
+# Release the lock only if we still own it (it may have expired and been re-taken)
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Coalesce concurrent calls sharing a key into a single execution.
+
+    Callers in the same process await one shared future. Across processes a
+    Redis lock elects a leader that publishes its result for a few seconds;
+    followers poll for it and fall back to running the call themselves if the
+    leader dies or Redis is unavailable. Results must be JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        lock_ttl: int = 30,
+        result_ttl: int = 10,
+        poll_interval: float = 0.1,
+    ):
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._inflight: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` once for all concurrent callers of ``key`` and share its result."""
+        loop = asyncio.get_running_loop()
+        inflight: Dict[str, asyncio.Future] = self._inflight.setdefault(loop, {})
+
+        future = inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: take over the call
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.do(key, fn)
+                raise
+
+        future = loop.create_future()
+        # Followers may not exist; mark exceptions as retrieved to avoid log noise
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        inflight[key] = future
+        try:
+            result = await self._run_distributed(key, fn)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if inflight.get(key) is future:
+                del inflight[key]
+
+    async def _run_distributed(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Coalesce across processes through a Redis lock and result key."""
+        client = await get_async_redis()
+        if client is None:
+            return await fn()
+
+        lock_key = f"{self.namespace}:lock:{key}"
+        result_key = f"{self.namespace}:result:{key}"
+        token = uuid.uuid4().hex
+
+        try:
+            acquired = await client.set(lock_key, token, nx=True, ex=self.lock_ttl)
+        except Exception as e:
+            logger.warning("singleflight_redis_error", key=key, error=str(e))
+            return await fn()
+
+        if acquired:
+            try:
+                result = await fn()
+                try:
+                    await client.set(
+                        result_key, json.dumps(result, default=str), ex=self.result_ttl
+                    )
+                except Exception as e:
+                    logger.warning("singleflight_publish_failed", key=key, error=str(e))
+                return result
+            finally:
+                try:
+                    await client.eval(_RELEASE_LOCK, 1, lock_key, token)
+                except Exception:
+                    pass
+
+        # Another process is running the lookup: wait for its published result
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_ttl
+        try:
+            while loop.time() < deadline:
+                cached = await client.get(result_key)
+                if cached is not None:
+                    return json.loads(cached)
+                if not await client.exists(lock_key):
+                    cached = await client.get(result_key)
+                    if cached is not None:
+                        return json.loads(cached)
+                    break
+                await asyncio.sleep(self.poll_interval)
+        except Exception as e:
+            logger.warning("singleflight_redis_error", key=key, error=str(e))
+
+        logger.info("singleflight_leader_lost", key=key)
+        return await fn()
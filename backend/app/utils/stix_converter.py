@@ -104,6 +104,14 @@ def create_stix_bundle(iocs: List[Dict[str, Any]]) -> Dict[str, Any]:
     return bundle
 
 
+def stix_bundle_prefix() -> str:
+    """Opening of a streamed STIX 2.1 Bundle; indicators and STIX_BUNDLE_SUFFIX follow."""
+    return f'{{"type": "bundle", "id": "bundle--{uuid4()}", "objects": ['
+
+
+STIX_BUNDLE_SUFFIX = "]}"
+
+
 def export_stix_json(iocs: List[Dict[str, Any]]) -> str:
     """Export IOCs as a STIX 2.1 JSON string."""
     bundle = create_stix_bundle(iocs)
@@ -0,0 +1,67 @@
+"""Shared fixtures.
+
+Tests that need PostgreSQL are skipped unless TEST_DATABASE_URL points at a
+database migrated to head (``alembic upgrade head``). Each test runs in a
+transaction that is rolled back, so commits inside the code under test only
+release savepoints.
+"""
+
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+@pytest.fixture(scope="session")
+def sync_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_engine(TEST_DATABASE_URL)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(sync_engine):
+    connection = sync_engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def async_session_factory():
+    """Async context manager factory for a rolled-back AsyncSession.
+
+    Used from ``asyncio.run`` inside a test, as the suite has no async plugin.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    url = TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+
+    class _RolledBack:
+        async def __aenter__(self):
+            self.engine = create_async_engine(url)
+            self.connection = await self.engine.connect()
+            self.transaction = await self.connection.begin()
+            self.session = AsyncSession(
+                bind=self.connection, join_transaction_mode="create_savepoint", expire_on_commit=False,
+            )
+            return self.session
+
+        async def __aexit__(self, *exc):
+            await self.session.close()
+            await self.transaction.rollback()
+            await self.connection.close()
+            await self.engine.dispose()
+
+    return _RolledBack
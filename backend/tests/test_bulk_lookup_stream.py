@@ -0,0 +1,56 @@
+"""Input limits of the streaming NDJSON bulk lookup."""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.ioc import bulk_lookup_stream
+from app.config import settings
+
+
+class _Body:
+    def __init__(self, *chunks: bytes):
+        self.chunks = chunks
+        self.read = 0
+
+    async def stream(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+def _lookup(body):
+    return asyncio.run(bulk_lookup_stream(body))
+
+
+def test_values_split_across_chunks_are_accepted():
+    response = _lookup(_Body(b'"evil.exa', b'mple"\n{"value": "10.0.0.1"}\n', b"d41d8cd98f00b204e9800998ecf8427e"))
+    assert response.media_type == "application/x-ndjson"
+
+
+def test_unterminated_line_is_rejected_before_the_body_is_read(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_LOOKUP_MAX_LINE_BYTES", 64)
+    body = _Body(*[b"a" * 40] * 10)
+    with pytest.raises(HTTPException) as error:
+        _lookup(body)
+    assert error.value.status_code == 413
+    assert body.read == 2
+
+
+def test_long_complete_line_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_LOOKUP_MAX_LINE_BYTES", 64)
+    with pytest.raises(HTTPException) as error:
+        _lookup(_Body(b"evil.example\n" + b"a" * 65 + b"\n"))
+    assert error.value.status_code == 413
+
+
+@pytest.mark.parametrize("trailing_newline", [True, False])
+def test_value_cap_is_checked_per_line(monkeypatch, trailing_newline):
+    monkeypatch.setattr(settings, "BULK_LOOKUP_MAX_VALUES", 3)
+    lines = b"\n".join(f"host{i}.example".encode() for i in range(4))
+    with pytest.raises(HTTPException) as error:
+        _lookup(_Body(lines + (b"\n" if trailing_newline else b"")))
+    assert error.value.status_code == 400
+    # Exactly at the cap is fine
+    _lookup(_Body(b"\n".join(lines.split(b"\n")[:3])))
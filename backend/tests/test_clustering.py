@@ -0,0 +1,84 @@
+"""Union-find, label propagation and cluster id assignment."""
+
+import numpy as np
+
+from app.services.clustering import assign_cluster_ids, connected_components, propagate_labels
+
+
+def _edges(pairs):
+    u, v = zip(*pairs) if pairs else ((), ())
+    return np.array(u, dtype=np.int64), np.array(v, dtype=np.int64)
+
+
+def _reference_components(n, pairs):
+    root = list(range(n))
+
+    def find(x):
+        while root[x] != x:
+            x = root[x]
+        return x
+
+    for a, b in pairs:
+        ra, rb = find(a), find(b)
+        root[max(ra, rb)] = min(ra, rb)
+    return [find(x) for x in range(n)]
+
+
+def test_components_are_rooted_at_their_smallest_node():
+    u, v = _edges([(1, 2), (6, 4), (5, 4), (2, 0)])
+    assert connected_components(7, u, v).tolist() == [0, 0, 0, 3, 4, 4, 4]
+
+
+def test_components_without_edges_are_singletons():
+    u, v = _edges([])
+    assert connected_components(3, u, v).tolist() == [0, 1, 2]
+
+
+def test_components_match_a_scalar_union_find():
+    rng = np.random.default_rng(7)
+    # A long chain listed backwards needs repeated hooking and pointer jumping
+    chain = [(i + 1, i) for i in reversed(range(199))]
+    assert connected_components(200, *_edges(chain)).tolist() == [0] * 200
+    for _ in range(20):
+        pairs = [tuple(pair) for pair in rng.integers(0, 300, size=(250, 2)).tolist()]
+        assert connected_components(300, *_edges(pairs)).tolist() == _reference_components(300, pairs)
+
+
+def _both_ways(pairs, weights):
+    u, v = _edges(pairs)
+    w = np.array(weights, dtype=np.float64)
+    return np.concatenate([u, v]), np.concatenate([v, u]), np.concatenate([w, w])
+
+
+def test_label_propagation_splits_weakly_joined_communities():
+    clique_a = [(a, b) for a in range(5) for b in range(a + 1, 5)]
+    clique_b = [(a, b) for a in range(5, 10) for b in range(a + 1, 10)]
+    pairs = clique_a + clique_b + [(4, 5)]
+    u, v, w = _both_ways(pairs, [1.0] * (len(pairs) - 1) + [0.2])
+
+    labels = propagate_labels(np.arange(10), u, v, w)
+    assert len(set(labels[:5].tolist())) == 1
+    assert len(set(labels[5:].tolist())) == 1
+    assert labels[0] != labels[5]
+
+
+def test_label_propagation_follows_edge_weight():
+    # Node 0 hangs off two settled groups and joins the more heavily linked one
+    groups = [(1, 2), (2, 3), (1, 3), (4, 5), (5, 6), (4, 6)]
+    u, v, w = _both_ways(groups + [(0, 1), (0, 4)], [1.0] * len(groups) + [0.3, 0.9])
+    labels = propagate_labels(np.array([0, 10, 10, 10, 20, 20, 20]), u, v, w)
+    assert labels.tolist() == [20, 10, 10, 10, 20, 20, 20]
+
+
+def test_label_propagation_without_edges_keeps_labels():
+    labels = np.array([3, 1, 2])
+    result = propagate_labels(labels, *_both_ways([], []))
+    assert result.tolist() == [3, 1, 2]
+    assert result is not labels
+
+
+def test_cluster_ids_are_the_smallest_member_id():
+    ids = ["a", "b", "c", "d", "e"]
+    labels = np.array([7, 3, 7, 9, 3])
+    assert assign_cluster_ids(ids, labels) == ["a", "b", "a", None, "b"]
+    assert assign_cluster_ids(["a"], np.array([0])) == [None]
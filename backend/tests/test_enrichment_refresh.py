@@ -0,0 +1,57 @@
+"""Proactive enrichment refresh: per-source sizing and candidate selection."""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.enrichers.registry import enricher_registry
+from app.models.enrichment import Enrichment
+from app.models.ioc import IOC
+from app.tasks.celery_app import celery_app
+from app.tasks.enrichment_tasks import _source_capacity, refresh_candidates
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def test_each_source_task_fits_in_the_soft_time_limit():
+    soft_limit = celery_app.conf.task_soft_time_limit
+    for source in enricher_registry.names():
+        capacity = _source_capacity(source)
+        rate_limit = enricher_registry.get(source).rate_limit
+        if rate_limit is None:
+            assert capacity is None
+            continue
+        max_requests, window_seconds = rate_limit
+        assert capacity * window_seconds / max_requests < soft_limit
+
+
+def _enrich(session, source, count, threat_score=50, **fields):
+    iocs = [IOC(type="domain", value=f"{uuid.uuid4()}.test", threat_score=threat_score) for _ in range(count)]
+    for ioc in iocs:
+        ioc.enrichments = [Enrichment(source=source, data={}, expires_at=NOW - timedelta(minutes=1), **fields)]
+    session.add_all(iocs)
+    session.flush()
+    return [ioc.id for ioc in iocs]
+
+
+def test_candidates_respect_rate_capacity_budget_and_backoff(db_session):
+    capacity = _source_capacity("whois")
+    whois = _enrich(db_session, "whois", capacity + 5, threat_score=100)
+    dns = _enrich(db_session, "dns", 3, threat_score=99)
+    backed_off = _enrich(db_session, "dns", 1, threat_score=100, refresh_failed_at=NOW - timedelta(minutes=5))
+    retry = _enrich(db_session, "dns", 1, threat_score=99, refresh_failed_at=NOW - timedelta(hours=2))
+    fresh = _enrich(db_session, "geoip", 1, threat_score=100)
+    db_session.query(Enrichment).filter(Enrichment.ioc_id.in_(fresh)).update(
+        {Enrichment.expires_at: NOW + timedelta(hours=1)}, synchronize_session=False,
+    )
+
+    candidates = refresh_candidates(db_session, NOW, budget=10_000)
+    assert len(candidates["whois"]) == capacity
+    assert set(candidates["whois"]) < set(whois)
+    assert set(dns + retry) <= set(candidates["dns"])
+    assert not set(backed_off) & set(candidates["dns"])
+    assert not set(fresh) & set(candidates.get("geoip", []))
+
+    # The budget goes to the highest-risk records across sources
+    limited = refresh_candidates(db_session, NOW, budget=capacity + 2)
+    assert len(limited["whois"]) == capacity
+    assert sum(len(ids) for ids in limited.values()) == capacity + 2
@@ -0,0 +1,32 @@
+"""Re-ingesting a known IOC keeps the score components ingestion cannot see."""
+
+import uuid
+
+from app.models.enrichment import Enrichment
+from app.models.feed import FeedSource
+from app.models.ioc import IOC
+from app.services.feed_ingestion import ingest_iocs_sync
+from app.services.rescoring import rescore_all_sync
+from app.services.scoring_engine import COMPONENTS, ENRICHMENT_DEFAULT, composite_score, get_active_profile
+
+
+def test_resighting_keeps_the_enrichment_component(db_session):
+    feed = FeedSource(name="test feed", slug=f"test-{uuid.uuid4()}", feed_type="api")
+    ioc = IOC(type="domain", value=f"{uuid.uuid4()}.test", threat_score=40)
+    ioc.enrichments = [
+        Enrichment(source="reputation", data={"aggregate_score": 90}),
+        Enrichment(source="dns", data={"fast_flux": True}),
+    ]
+    db_session.add_all([feed, ioc])
+    db_session.flush()
+    rescore_all_sync(db_session)
+    db_session.refresh(ioc)
+    enrichment = ioc.score_enrichment
+    assert enrichment is not None and enrichment != ENRICHMENT_DEFAULT
+
+    assert ingest_iocs_sync(db_session, feed, [{"type": "domain", "value": ioc.value}]) == 1
+    db_session.refresh(ioc)
+    assert ioc.sighting_count == 2
+    assert ioc.score_enrichment == enrichment
+    components = {name: getattr(ioc, f"score_{name}") for name in COMPONENTS}
+    assert ioc.threat_score == composite_score(components, get_active_profile())
@@ -0,0 +1,120 @@
+"""Traversal over the in-memory relationship graph."""
+
+import numpy as np
+
+from app.services.graph_store import RelationshipGraph
+
+
+def _graph(edges):
+    """A graph over string node ids from (source, target, type) triples."""
+    node_ids, type_names = [], []
+    for source, target, name in edges:
+        for node in (source, target):
+            if node not in node_ids:
+                node_ids.append(node)
+        if name not in type_names:
+            type_names.append(name)
+    return RelationshipGraph(
+        node_ids, type_names,
+        np.array([node_ids.index(s) for s, _, _ in edges], dtype=np.int32),
+        np.array([node_ids.index(t) for _, t, _ in edges], dtype=np.int32),
+        np.array([type_names.index(n) for _, _, n in edges], dtype=np.int16),
+        np.full(len(edges), 70, dtype=np.int16),
+    )
+
+
+def _edges(result):
+    return {(e["source"], e["target"], e["relationship_type"]) for e in result["edges"]}
+
+
+def _stored(graph):
+    sources, targets, types, confidence = graph.edge_arrays()
+    return sorted(
+        (graph.node_ids[s], graph.node_ids[t], graph.type_names[c], int(conf))
+        for s, t, c, conf in zip(sources.tolist(), targets.tolist(), types.tolist(), confidence.tolist())
+    )
+
+
+CHAIN = [("a", "b", "resolves_to"), ("c", "b", "resolves_to"), ("c", "d", "hosts"), ("d", "e", "hosts")]
+
+
+def test_neighborhood_hop_depths_ignore_direction():
+    result = _graph(CHAIN).neighborhood("a", depth=2, limit=100)
+    assert result["nodes"] == {"a": 0, "b": 1, "c": 2}
+    # Edges come back as stored, not as traversed
+    assert _edges(result) == {("a", "b", "resolves_to"), ("c", "b", "resolves_to")}
+    assert not result["truncated"]
+
+
+def test_neighborhood_stops_at_depth_and_unreached_start():
+    graph = _graph(CHAIN)
+    assert graph.neighborhood("a", depth=10, limit=100)["nodes"] == {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4}
+    assert graph.neighborhood("zzz", depth=2, limit=100) == {"nodes": {"zzz": 0}, "edges": [], "truncated": False}
+
+
+def test_neighborhood_keeps_each_edge_once():
+    graph = _graph([("a", "b", "related"), ("b", "c", "related"), ("c", "a", "related")])
+    result = graph.neighborhood("a", depth=3, limit=100)
+    assert len(result["edges"]) == 3
+    assert _edges(result) == {("a", "b", "related"), ("b", "c", "related"), ("c", "a", "related")}
+
+
+def test_neighborhood_limit_caps_nodes_in_discovery_order():
+    star = [("hub", f"leaf{i}", "related") for i in range(5)] + [("leaf0", "far", "related")]
+    result = _graph(star).neighborhood("hub", depth=2, limit=3)
+    assert result["nodes"] == {"hub": 0, "leaf0": 1, "leaf1": 1}
+    assert result["truncated"]
+    # Only edges between reached nodes
+    assert _edges(result) == {("hub", "leaf0", "related"), ("hub", "leaf1", "related")}
+
+
+def test_neighborhood_filters_relationship_types():
+    graph = _graph(CHAIN)
+    assert graph.neighborhood("c", depth=3, limit=100, relationship_types=["hosts"])["nodes"] == {
+        "c": 0, "d": 1, "e": 2,
+    }
+    assert graph.neighborhood("c", depth=3, limit=100, relationship_types=["unknown"])["nodes"] == {"c": 0}
+
+
+def test_shortest_path():
+    graph = _graph(CHAIN + [("a", "e", "related")])
+    path = graph.shortest_path("a", "d", max_depth=5)
+    assert [(p["source"], p["target"]) for p in path] == [("a", "e"), ("d", "e")]
+    assert graph.shortest_path("a", "a", max_depth=5) == []
+    assert graph.shortest_path("a", "missing", max_depth=5) is None
+    assert graph.shortest_path("a", "d", max_depth=1) is None
+    assert graph.shortest_path("a", "d", max_depth=5, relationship_types=["resolves_to"]) is None
+
+
+def test_overlay_edges_are_traversed():
+    graph = _graph(CHAIN)
+    assert graph.add_edge("e", "new", "hosts", 90)
+    assert graph.add_edge("new", "a", None, None)
+    # Already stored, in the CSR or in the overlay
+    assert not graph.add_edge("a", "b", "resolves_to", 70)
+    assert not graph.add_edge("e", "new", "hosts", 10)
+    assert graph.overlay_edges == 2
+
+    path = graph.shortest_path("b", "new", max_depth=5)
+    assert [(p["source"], p["target"], p["relationship_type"], p["confidence"]) for p in path] == [
+        ("a", "b", "resolves_to", 70), ("new", "a", "related", 50),
+    ]
+    result = graph.neighborhood("new", depth=1, limit=100)
+    assert result["nodes"] == {"new": 0, "a": 1, "e": 1}
+    assert _edges(result) == {("e", "new", "hosts"), ("new", "a", "related")}
+
+
+def test_compaction_preserves_edges_and_traversal():
+    graph = _graph(CHAIN)
+    graph.add_edge("e", "new", "hosts", 90)
+    graph.add_edge("new", "a", "resolves_to", 40)
+    compact = graph.compacted()
+
+    assert compact.overlay == {} and compact.overlay_edges == 0
+    assert compact.edge_count == len(CHAIN) + 2
+    assert _stored(compact) == _stored(graph)
+    for node in ("a", "c", "new"):
+        before, after = graph.neighborhood(node, depth=3, limit=100), compact.neighborhood(node, depth=3, limit=100)
+        assert after["nodes"] == before["nodes"]
+        assert _edges(after) == _edges(before)
+    assert compact.shortest_path("b", "new", max_depth=5) == graph.shortest_path("b", "new", max_depth=5)
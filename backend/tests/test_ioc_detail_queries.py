@@ -0,0 +1,61 @@
+"""IOC detail and relationship endpoints run a fixed number of statements."""
+
+import asyncio
+import uuid
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.api.ioc import get_ioc, get_relationships
+from app.models.ioc import IOC
+from app.models.ioc_relationship import IOCRelationship
+
+
+@contextmanager
+def _count_statements(session):
+    statements = []
+    engine = session.bind.engine.sync_engine
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def _statements_per_request(session_factory, related: int):
+    async with session_factory() as session:
+        ioc = IOC(type="domain", value=f"{uuid.uuid4()}.test", threat_score=50)
+        neighbours = [IOC(type="domain", value=f"{uuid.uuid4()}.test") for _ in range(related)]
+        session.add_all([ioc, *neighbours])
+        await session.flush()
+        session.add_all([
+            IOCRelationship(
+                source_ioc_id=ioc.id if i % 2 else other.id,
+                target_ioc_id=other.id if i % 2 else ioc.id,
+                relationship_type="resolves_to",
+            )
+            for i, other in enumerate(neighbours)
+        ])
+        await session.flush()
+        session.expunge_all()
+
+        with _count_statements(session) as detail:
+            response = await get_ioc(ioc.id, db=session)
+        session.expunge_all()
+        with _count_statements(session) as relationships:
+            rows = await get_relationships(ioc.id, db=session)
+
+        assert len(response.relationships) == related
+        assert len(rows) == related
+        return len(detail), len(relationships)
+
+
+def test_statement_count_does_not_grow_with_relationships(async_session_factory):
+    few = asyncio.run(_statements_per_request(async_session_factory, 1))
+    many = asyncio.run(_statements_per_request(async_session_factory, 30))
+    # The IOC, its enrichments and sources, and one UNION ALL for relationships
+    assert few == many == (4, 1)
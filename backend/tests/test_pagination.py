@@ -0,0 +1,58 @@
+"""Keyset cursor encoding."""
+
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+IOC_ID = uuid.UUID("0b7c2a4e-9d51-4f0a-8e3b-6a1f2d9c4e57")
+
+
+@pytest.mark.parametrize("sort_by, value", [
+    ("last_seen", datetime(2026, 10, 19, 12, 30, 15, 123456, tzinfo=timezone.utc)),
+    ("threat_score", 87),
+    ("threat_score", 0),
+])
+def test_round_trip(sort_by, value):
+    cursor = encode_cursor(sort_by, "desc", value, IOC_ID)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, sort_by, "desc") == (value, IOC_ID)
+
+
+def test_cursor_is_bound_to_its_sort():
+    cursor = encode_cursor("threat_score", "desc", 50, IOC_ID)
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "threat_score", "asc")
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "last_seen", "desc")
+
+
+def _raw(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor",
+    "!!!!",
+    _raw(["threat_score", "desc"]),
+    _raw({"s": "threat_score", "o": "desc", "v": 50}),
+    _raw({"s": "threat_score", "o": "desc", "v": 50, "id": "not-a-uuid"}),
+    _raw({"s": "threat_score", "o": "desc", "v": "50", "id": str(IOC_ID)}),
+    _raw({"s": "threat_score", "o": "desc", "v": True, "id": str(IOC_ID)}),
+    _raw({"s": "threat_score", "o": "desc", "v": 5.5, "id": str(IOC_ID)}),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "threat_score", "desc")
+
+
+@pytest.mark.parametrize("value", [1700000000, None, "yesterday"])
+def test_malformed_datetime_values_are_rejected(value):
+    cursor = _raw({"s": "last_seen", "o": "desc", "v": value, "id": str(IOC_ID)})
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "last_seen", "desc")
@@ -0,0 +1,137 @@
+"""The vectorized rescorer must match calculate_threat_score and be idempotent."""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.services.rescoring import (
+    COMPONENT_COLUMNS, _EPOCH, _ONE_US, _reputation_average, compose, compute_components,
+)
+from app.services.scoring_engine import (
+    COMPONENTS, CompiledProfile, DEFAULT_PROFILE, composite_score, enrichment_signals, score_components,
+)
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+IOCS = [
+    {"threat_score": 0, "sighting_count": 1, "last_seen": NOW},
+    # Stored composite with no components: the case that used to drift
+    {"threat_score": 34, "sighting_count": 3, "last_seen": NOW - timedelta(hours=5)},
+    # Feed-supplied score
+    {"threat_score": 90, "sighting_count": 1, "last_seen": NOW - timedelta(days=3), "tags": ["APT"]},
+    {
+        "threat_score": 55, "sighting_count": 60, "last_seen": NOW - timedelta(days=40),
+        "metadata": {"reputation_scores": {"abuseipdb": 80, "otx": 45}},
+        "tags": ["malware", "c2"], "mitre_techniques": ["T1071", "T1105", "T1041"],
+        "source_count": 4,
+        "enrichments": [
+            {"source": "geoip", "data": {"country_code": "RU"}},
+            {"source": "reputation", "data": {"aggregate_score": 75}},
+        ],
+    },
+    {
+        "threat_score": 12, "sighting_count": 7, "last_seen": None,
+        "mitre_techniques": [f"T10{i}" for i in range(8)], "source_count": 2,
+        "enrichments": [
+            {"source": "whois", "data": {
+                "privacy_protected": True, "creation_date": (NOW - timedelta(days=3)).isoformat(),
+            }},
+            {"source": "dns", "data": {"fast_flux": False}},
+        ],
+    },
+    {"threat_score": 70, "sighting_count": 150, "last_seen": NOW - timedelta(days=200), "source_count": 6},
+]
+
+
+def _scalar(ioc, profile):
+    components = score_components(
+        ioc, source_count=ioc.get("source_count", 1), enrichment_data=ioc.get("enrichments"),
+        now=NOW, profile=profile,
+    )
+    return components, composite_score(components, profile)
+
+
+def _columns(iocs, profile):
+    """The columnar batch _load_columns would build for these IOCs."""
+    n = len(iocs)
+    signals = [
+        [enrichment_signals(e["source"], e["data"], NOW, profile.high_risk_countries)
+         for e in ioc.get("enrichments", [])]
+        for ioc in iocs
+    ]
+    tags = [{t.lower() for t in ioc.get("tags", [])} for ioc in iocs]
+    return {
+        "id": list(range(n)),
+        "threat_score": np.array([ioc["threat_score"] for ioc in iocs], dtype=np.int64),
+        "reputation_avg": np.array(
+            [_reputation_average((ioc.get("metadata") or {}).get("reputation_scores")) for ioc in iocs]
+        ),
+        "last_seen_known": np.array([ioc["last_seen"] is not None for ioc in iocs]),
+        "last_seen_us": np.array(
+            [(ioc["last_seen"] - _EPOCH) // _ONE_US if ioc["last_seen"] else 0 for ioc in iocs], dtype=np.int64,
+        ),
+        "sighting_count": np.array([ioc["sighting_count"] for ioc in iocs], dtype=np.int64),
+        "source_count": np.array([ioc.get("source_count", 1) for ioc in iocs], dtype=np.int64),
+        "high_risk_tag": np.array([bool(t & profile.high_risk_tags) for t in tags]),
+        "medium_risk_tag": np.array([bool(t & profile.medium_risk_tags) for t in tags]),
+        "technique_count": np.array([len(ioc.get("mitre_techniques", [])) for ioc in iocs], dtype=np.int64),
+        "risk": np.array([sum(r for r, _ in s) for s in signals], dtype=np.int64),
+        "total": np.array([sum(t for _, t in s) for s in signals], dtype=np.int64),
+        "cached_components": np.array(
+            [[np.nan if ioc.get(c) is None else ioc[c] for c in COMPONENT_COLUMNS] for ioc in iocs],
+            dtype=np.float64,
+        ).reshape(n, len(COMPONENTS)),
+    }
+
+
+def _rescore(iocs, profile):
+    """One rescoring pass; returns the IOCs as they would be stored afterwards."""
+    columns = _columns(iocs, profile)
+    components = compute_components(columns, NOW, profile)
+    scores = compose(components, profile)
+
+    stored = []
+    for ioc, row, score in zip(iocs, components, scores.tolist()):
+        scalar_components, scalar_score = _scalar(ioc, profile)
+        assert row.tolist() == [scalar_components[c] for c in COMPONENTS]
+        assert score == scalar_score
+        stored.append({
+            **ioc,
+            "threat_score": score,
+            **{column: value for column, value in zip(COMPONENT_COLUMNS, row.tolist())},
+        })
+    return stored
+
+
+@pytest.mark.parametrize("profile", [
+    DEFAULT_PROFILE,
+    CompiledProfile(
+        name="custom", weights={"reputation": 0.5, "context": 0.0}, high_risk_tags=["malware"], total_feeds=0,
+    ),
+])
+def test_vectorized_matches_scalar_and_is_idempotent(profile):
+    first = _rescore(IOCS, profile)
+    second = _rescore(first, profile)
+    third = _rescore(second, profile)
+    assert second == first
+    assert third == first
+
+
+def test_reputation_is_not_fed_back_from_the_composite():
+    ioc = {"threat_score": 34, "sighting_count": 1, "last_seen": NOW}
+    first = _rescore([ioc], DEFAULT_PROFILE)[0]
+    # A composite without components seeds the base reputation once...
+    assert first["score_reputation"] == 34.0
+    # ...and later passes keep it instead of reading back the new composite
+    assert _rescore([first], DEFAULT_PROFILE)[0] == first
+
+
+def test_feed_supplied_score_keeps_its_base_reputation():
+    stored = [{"threat_score": 90, "sighting_count": 1, "last_seen": NOW}]
+    scores = []
+    for _ in range(3):
+        stored = _rescore(stored, DEFAULT_PROFILE)
+        scores.append(stored[0]["threat_score"])
+    assert stored[0]["score_reputation"] == 90.0
+    assert len(set(scores)) == 1
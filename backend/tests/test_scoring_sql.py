@@ -0,0 +1,139 @@
+"""The SQL scoring functions and bulk rescoring against PostgreSQL."""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text, update
+
+from app.models.enrichment import Enrichment
+from app.models.feed import FeedSource
+from app.models.ioc import IOC
+from app.models.ioc_source import IOCSource
+from app.services.rescoring import (
+    rescore_all_in_database, rescore_all_sync, rescore_due_sync, rescore_enrichment_sync, scoring_input,
+)
+from app.services.scoring_engine import DEFAULT_PROFILE, CompiledProfile, calculate_threat_score
+from app.services.scoring_sql import install_scoring_functions
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+SEEDS = [
+    {"threat_score": 0, "last_seen": NOW},
+    {"threat_score": 34, "sighting_count": 3, "last_seen": NOW - timedelta(hours=5)},
+    {"threat_score": 90, "last_seen": NOW - timedelta(days=3), "tags": ["APT"]},
+    {
+        "threat_score": 55, "sighting_count": 60, "last_seen": NOW - timedelta(days=40),
+        "metadata_": {"reputation_scores": {"abuseipdb": 80, "otx": 45}},
+        "tags": ["malware", "c2"], "mitre_techniques": ["T1071", "T1105", "T1041"],
+        "sources": 4,
+        "enrichments": [
+            ("geoip", {"country_code": "RU"}),
+            ("reputation", {"aggregate_score": 75}),
+            ("whois", {"privacy_protected": True, "creation_date": (NOW - timedelta(days=3)).isoformat()}),
+        ],
+    },
+    {"threat_score": 70, "sighting_count": 150, "last_seen": NOW - timedelta(days=200), "sources": 6},
+]
+
+
+@pytest.fixture
+def seeded(db_session):
+    feeds = [
+        FeedSource(name=f"test feed {i}", slug=f"test-{uuid.uuid4()}", feed_type="api") for i in range(6)
+    ]
+    db_session.add_all(feeds)
+    db_session.flush()
+    iocs = []
+    for seed in SEEDS:
+        seed = dict(seed)
+        sources = seed.pop("sources", 1)
+        enrichments = seed.pop("enrichments", [])
+        ioc = IOC(type="domain", value=f"{uuid.uuid4()}.test", **seed)
+        ioc.sources = [IOCSource(feed_id=feed.id) for feed in feeds[:sources]]
+        ioc.enrichments = [Enrichment(source=source, data=data) for source, data in enrichments]
+        iocs.append(ioc)
+    db_session.add_all(iocs)
+    db_session.flush()
+    install_scoring_functions(db_session)
+    return iocs
+
+
+def _scalar(ioc):
+    return calculate_threat_score(
+        scoring_input(ioc),
+        source_count=len(ioc.sources),
+        enrichment_data=[{"source": e.source, "data": e.data} for e in ioc.enrichments],
+        now=NOW,
+    )
+
+
+def _sql_scores(session, iocs):
+    rows = session.execute(
+        text("SELECT id, sentinel_score_ioc(id, :now) FROM iocs WHERE id = ANY(CAST(:ids AS uuid[]))"),
+        {"now": NOW, "ids": [str(ioc.id) for ioc in iocs]},
+    ).all()
+    return dict(rows)
+
+
+def test_sql_functions_match_python(db_session, seeded):
+    # Before and after the first rescore, which persists the base reputation
+    for _ in range(2):
+        sql = _sql_scores(db_session, seeded)
+        for ioc in seeded:
+            assert sql[ioc.id] == _scalar(ioc)
+        rescore_all_sync(db_session, now=NOW)
+        db_session.expire_all()
+
+
+def test_rescoring_twice_changes_nothing(db_session, seeded):
+    rescore_all_sync(db_session, now=NOW)
+    db_session.expire_all()
+    scores = {ioc.id: ioc.threat_score for ioc in seeded}
+
+    assert rescore_all_sync(db_session, now=NOW)["changed"] == 0
+    # The SQL path derives the same components, so it has nothing to write either
+    assert rescore_all_in_database(db_session, now=NOW)["updated"] == 0
+    db_session.expire_all()
+    assert {ioc.id: ioc.threat_score for ioc in seeded} == scores
+
+
+def test_profile_round_trip_restores_scores(db_session, seeded):
+    rescore_all_sync(db_session, now=NOW)
+    db_session.expire_all()
+    before = {ioc.id: ioc.threat_score for ioc in seeded}
+
+    # A tag change forces a full rescore; switching back must not drift reputation
+    other = CompiledProfile(name="test-other", weights={"reputation": 0.6}, high_risk_tags=["malware"], version=1)
+    rescore_all_sync(db_session, now=NOW, profile=other)
+    rescore_all_sync(db_session, now=NOW, profile=DEFAULT_PROFILE)
+    db_session.expire_all()
+    assert {ioc.id: ioc.threat_score for ioc in seeded} == before
+
+
+def test_due_rescore_is_idempotent(db_session, seeded):
+    rescore_all_sync(db_session, now=NOW)
+    later = NOW + timedelta(days=2)
+    assert rescore_due_sync(db_session, now=later)["due"] > 0
+    db_session.expire_all()
+    stored = {ioc.id: (ioc.threat_score, ioc.score_reputation) for ioc in seeded}
+
+    # Due again with unchanged inputs: nothing may move
+    db_session.execute(
+        update(IOC).where(IOC.id.in_([ioc.id for ioc in seeded])).values(next_rescore_at=later)
+    )
+    assert rescore_due_sync(db_session, now=later)["changed"] == 0
+    db_session.expire_all()
+    assert {ioc.id: (ioc.threat_score, ioc.score_reputation) for ioc in seeded} == stored
+
+
+def test_enrichment_rescore_matches_full_rescore(db_session, seeded):
+    rescore_all_sync(db_session, now=NOW)
+    ioc = seeded[0]
+    db_session.add(Enrichment(ioc_id=ioc.id, source="dns", data={"fast_flux": True}))
+    db_session.flush()
+
+    rescore_enrichment_sync(db_session, [ioc.id], now=NOW)
+    db_session.expire_all()
+    assert ioc.threat_score == _scalar(ioc)
+    assert rescore_all_sync(db_session, now=NOW)["changed"] == 0
@@ -0,0 +1,59 @@
+"""MinHash signatures and LSH band keys."""
+
+import numpy as np
+
+from app.services.similarity import (
+    LSH_BANDS, NUM_PERMUTATIONS, ROWS_PER_BAND, band_keys, ioc_features, minhash, signature_row,
+)
+
+
+def _estimate(a, b):
+    return float(np.mean(minhash(a) == minhash(b)))
+
+
+def test_signature_shape_and_determinism():
+    features = {f"tag:t{i}" for i in range(10)}
+    signature = minhash(features)
+    assert signature.dtype == np.uint32
+    assert signature.shape == (NUM_PERMUTATIONS,)
+    # Independent of iteration order and duplicates
+    assert np.array_equal(minhash(sorted(features) * 2), signature)
+    assert np.array_equal(minhash(sorted(features, reverse=True)), signature)
+
+
+def test_signature_agreement_estimates_jaccard():
+    shared = [f"ttp:T{i}" for i in range(100)]
+    a = shared + [f"tag:a{i}" for i in range(50)]
+    b = shared + [f"tag:b{i}" for i in range(50)]
+    assert _estimate(a, a) == 1.0
+    assert abs(_estimate(a, b) - 0.5) < 0.15
+    assert _estimate([f"tag:x{i}" for i in range(50)], [f"tag:y{i}" for i in range(50)]) < 0.15
+
+
+def test_band_keys_change_only_with_their_band():
+    signature = minhash({"tag:a", "tag:b", "family:emotet"})
+    keys = band_keys(signature)
+    assert len(keys) == LSH_BANDS
+    assert all(-(1 << 63) <= key < (1 << 63) for key in keys)
+    assert band_keys(signature.copy()) == keys
+
+    changed = signature.copy()
+    changed[ROWS_PER_BAND] += 1
+    other = band_keys(changed)
+    assert [i for i, (k, o) in enumerate(zip(keys, other)) if k != o] == [1]
+
+
+def test_band_number_is_part_of_the_key():
+    # Identical rows in different bands must not collide
+    keys = band_keys(np.zeros(NUM_PERMUTATIONS, dtype=np.uint32))
+    assert len(set(keys)) == LSH_BANDS
+
+
+def test_signature_row():
+    assert signature_row("id", [], [], {}, now=None) is None
+    features = ioc_features(["Emotet"], ["t1071"], {"malware_family": " Emotet "})
+    assert features == {"tag:emotet", "ttp:T1071", "family:emotet"}
+    row = signature_row("id", ["Emotet"], ["t1071"], {"malware_family": " Emotet "}, now=None)
+    assert row["feature_count"] == 3
+    assert row["bands"] == band_keys(minhash(features))
+    assert np.array_equal(np.array(row["minhash"], dtype=np.int32).view(np.uint32), minhash(features))
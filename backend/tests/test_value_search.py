@@ -0,0 +1,59 @@
+"""value_condition builds the expected WHERE clauses."""
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.value_search import value_condition
+
+
+def _sql(q, fuzzy=False):
+    condition = value_condition(q, fuzzy)
+    return str(condition.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_blank_query_has_no_condition():
+    assert value_condition("   ") is None
+
+
+@pytest.mark.parametrize("q", ["evil.example", "1.2.3.4", "192.168.", "deadbeef", "12345678", "a3f9c2e1d4b5"])
+def test_queries_keep_substring_semantics(q):
+    # URLs containing an address and mid-hash fragments must still match
+    assert f"ILIKE '%%{q}%%'" in _sql(q)
+
+
+@pytest.mark.parametrize("q, ioc_type, prefix", [
+    ("1.2.3.4", "ip", "1.2.3.4%%"),
+    ("192.168.", "ip", "192.168.%%"),
+    ("DEADBEEF", "hash", "deadbeef%%"),
+])
+def test_address_and_hash_prefixes_add_an_index_arm(q, ioc_type, prefix):
+    sql = _sql(q)
+    assert f"iocs.type = '{ioc_type}'" in sql
+    assert f"iocs.value LIKE '{prefix}'" in sql
+    assert " OR " in sql
+
+
+@pytest.mark.parametrize("q", ["evil.example", "deadbee", "1.2.3.4.5"])
+def test_other_queries_are_substring_only(q):
+    sql = _sql(q)
+    assert "iocs.type" not in sql
+    assert " LIKE " not in sql
+
+
+def test_like_wildcards_are_escaped():
+    assert value_condition("50%_off").right.value == "%50\\%\\_off%"
+
+
+def test_fuzzy_adds_word_similarity():
+    assert "iocs.value %%> 'evl.example'" in _sql("evl.example", fuzzy=True)
+
+
+@pytest.mark.parametrize("q, expected", [
+    ("10.0.0.0/8", "iocs.value LIKE '10.%%'"),
+    ("10.1.2.3/32", "iocs.value = '10.1.2.3'"),
+    ("10.1.2.0/25", "iocs.value IN ("),
+])
+def test_cidr_blocks_match_ip_iocs(q, expected):
+    sql = _sql(q)
+    assert expected in sql
+    assert "ILIKE" not in sql
@@ -154,7 +154,7 @@ function IOCSearchContent() {
       <div className="sentinel-card overflow-hidden">
         <div className="px-5 py-3 border-b border-sentinel-border flex items-center justify-between">
           <span className="text-xs font-mono text-sentinel-text-muted">
-            {data ? `${data.total} results` : 'Searching...'}
+            {data ? `${data.total_is_exact === false ? '~' : ''}${data.total} results` : 'Searching...'}
           </span>
           {data && data.total > 0 && (
             <span className="text-[10px] font-mono text-sentinel-text-muted">
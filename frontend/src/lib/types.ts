@@ -47,6 +47,8 @@ export interface PaginatedResponse<T> {
   page: number;
   page_size: number;
   pages: number;
+  total_is_exact?: boolean;
+  next_cursor?: string | null;
 }
 
 export interface FeedSource {